@@ -0,0 +1,42 @@
+import click
+import frappe
+from frappe.commands import get_site, pass_context
+
+
+@click.command("rebuild-attendance-rollup")
+@click.option("--from-date", help="First date to rebuild, defaults to the first submitted attendance")
+@click.option("--to-date", help="Last date to rebuild, defaults to today")
+@pass_context
+def rebuild_attendance_rollup(context, from_date=None, to_date=None):
+    """Backfill the Attendance Daily Rollup for a date range"""
+    from custom_app_api.custom_api.helper_function.attendance_rollup import (
+        rebuild_attendance_rollup as rebuild,
+    )
+
+    site = get_site(context)
+    frappe.init(site=site)
+    frappe.connect()
+    try:
+        rebuild(from_date, to_date)
+    finally:
+        frappe.destroy()
+
+
+@click.command("rebuild-employee-hierarchy")
+@pass_context
+def rebuild_employee_hierarchy(context):
+    """Rebuild the Employee Hierarchy closure table from reports_to"""
+    from custom_app_api.custom_api.helper_function.employee_hierarchy import (
+        rebuild_employee_hierarchy as rebuild,
+    )
+
+    site = get_site(context)
+    frappe.init(site=site)
+    frappe.connect()
+    try:
+        rebuild()
+    finally:
+        frappe.destroy()
+
+
+commands = [rebuild_attendance_rollup, rebuild_employee_hierarchy]
@@ -1,93 +1,86 @@
+import time
 import frappe
-from frappe.utils import today, getdate
+from frappe.utils import today
+from custom_app_api.custom_api.helper_function.additional_salary_bulk import bulk_insert_additional_salaries
+
+# Rs. per kilometer above the travel limit
+EXTRA_KM_RATE = 3
 
 def calculate_extra_km_salary():
     """
     Cron job to calculate additional salary for delivery employees who exceed their travel limit.
     Runs daily at 11 PM.
+    The extra kilometers of every eligible attendance are computed in one query, attendances that
+    already have an Extra Travel entry are skipped and the allowances are created in one batch.
     """
     try:
-        # Get today's attendance records
-        attendance_records = frappe.get_all(
-            "Attendance",
-            filters={
-                "attendance_date": today(),
-                "status": "Present",
-                "custom_kilometers_travelled": [">", 0]  # Only get records with km traveled
-            },
-            fields=["employee", "custom_kilometers_travelled", "name"]
-        )
+        start_time = time.time()
+        attendance_date = today()
 
-        for attendance in attendance_records:
-            # Get employee details including designation
-            employee = frappe.get_doc("Employee", attendance.employee)
-            
-            # Check if employee is a delivery person and has a travel limit set
-            if not employee.designation or "Delivery" not in employee.designation:
-                continue
-            
-            # Skip if travel limit is not set (0 or None)
-            if not employee.custom_travel_limit:
-                continue
+        # Present delivery employees with a travel limit who travelled beyond it today, without an allowance yet
+        allowances = frappe.db.sql("""
+            SELECT
+                a.name AS attendance,
+                a.employee,
+                e.employee_name,
+                e.company,
+                a.custom_kilometers_travelled AS kilometers_travelled,
+                e.custom_travel_limit AS travel_limit,
+                a.custom_kilometers_travelled - e.custom_travel_limit AS extra_km
+            FROM `tabAttendance` a
+            INNER JOIN `tabEmployee` e ON e.name = a.employee
+            WHERE a.attendance_date = %(date)s
+            AND a.status = 'Present'
+            AND a.custom_kilometers_travelled > 0
+            AND e.designation LIKE '%%Delivery%%'
+            AND e.custom_travel_limit > 0
+            AND a.custom_kilometers_travelled > e.custom_travel_limit
+            AND NOT EXISTS (
+                SELECT 1 FROM `tabAdditional Salary` s
+                WHERE s.ref_doctype = 'Attendance'
+                AND s.ref_docname = a.name
+                AND s.salary_component = 'Extra Travel'
+                AND s.docstatus < 2
+            )
+        """, {"date": attendance_date}, as_dict=1)
 
-            # Calculate extra kilometers
-            extra_km = attendance.custom_kilometers_travelled - employee.custom_travel_limit
+        entries = []
+        for allowance in allowances:
+            amount = allowance.extra_km * EXTRA_KM_RATE
 
-            # If extra kilometers exist, create Additional Salary
-            if extra_km > 0:
-                amount = extra_km * 3  # Rs. 3 per extra kilometer
+            # Create descriptive reason
+            reason = (
+                # f"Extra KM Allowance for {frappe.utils.formatdate(today())}\n"
+                f"Total KMs Travelled: {allowance.kilometers_travelled} km\n"
+                f"Company Provision: {allowance.travel_limit} km\n"
+                f"Extra KMs: {allowance.extra_km} km\n"
+                f"Rate per Extra KM: Rs. {EXTRA_KM_RATE}\n"
+                # f"Total Amount: Rs. {amount}"
+            )
 
-                # Create descriptive reason
-                reason = (
-                    # f"Extra KM Allowance for {frappe.utils.formatdate(today())}\n"
-                    f"Total KMs Travelled: {attendance.custom_kilometers_travelled} km\n"
-                    f"Company Provision: {employee.custom_travel_limit} km\n"
-                    f"Extra KMs: {extra_km} km\n"
-                    f"Rate per Extra KM: Rs. 3\n"
-                    # f"Total Amount: Rs. {amount}"
-                )
+            entries.append({
+                "employee": allowance.employee,
+                "employee_name": allowance.employee_name,
+                "salary_component": "Extra Travel",
+                "amount": amount,
+                "payroll_date": attendance_date,
+                "company": allowance.company,
+                "ref_doctype": "Attendance",
+                "ref_docname": allowance.attendance,
+                "custom_reason": reason,
+                "overwrite_salary_structure_amount": 0
+            })
 
-                # Create Additional Salary entry
-                additional_salary = frappe.get_doc({
-                    "doctype": "Additional Salary",
-                    "employee": attendance.employee,
-                    "salary_component": "Extra Travel",
-                    "amount": amount,
-                    "payroll_date": today(),
-                    "company": employee.company,
-                    "ref_doctype": "Attendance",
-                    "ref_docname": attendance.name,
-                    "custom_reason": reason,
-                    "overwrite_salary_structure_amount": 0
-                })
+        created = bulk_insert_additional_salaries(entries)
+        frappe.db.commit()
 
-                # Bypass workflow and permissions
-                additional_salary.flags.ignore_permissions = True
-                additional_salary.flags.ignore_validate = True
-                additional_salary.flags.ignore_mandatory = True
-                additional_salary.flags.ignore_workflow = True
-                
-                # Insert without triggering workflow
-                additional_salary.insert()
-                
-                # Force update workflow state and docstatus in database directly
-                if additional_salary.salary_component != "Advance Salary":  # Safety check
-                    frappe.db.set_value('Additional Salary', additional_salary.name, {
-                        'workflow_state': 'Submitted',
-                        'docstatus': 1
-                    })
-                    
-                    # Reload the document to reflect the changes
-                    additional_salary.reload()
-                
-                # Remove submit() since we're handling it directly
-                # additional_salary.submit()
-
-                frappe.logger().info(
-                    f"Additional Salary created for {employee.employee_name} "
-                    f"for extra {extra_km} km. Amount: Rs. {amount}"
-                )
+        frappe.logger().info(
+            f"Extra KM allowance for {attendance_date}: {len(created)} Additional Salary entries created, "
+            f"Rs. {sum(entry['amount'] for entry in entries):,.2f} in total, "
+            f"in {time.time() - start_time:.2f} seconds"
+        )
 
     except Exception as e:
+        frappe.db.rollback()
         frappe.logger().error(f"Error in calculate_extra_km_salary: {str(e)}")
         frappe.log_error(frappe.get_traceback(), "Calculate Extra KM Salary Error")
@@ -1,13 +1,27 @@
 import frappe
-import requests
 from datetime import datetime, date
 from calendar import monthrange
 from frappe.utils import getdate, add_months, get_first_day, get_last_day
+from custom_app_api.custom_api.helper_function.analytics_feed import fetch_analytics_feed
+from custom_app_api.custom_api.helper_function.additional_salary_bulk import bulk_insert_additional_salaries
+from custom_app_api.custom_api.helper_function.packet_bonus_allocation import allocate_packet_bonus
 
-def calculate_packet_bonus():
+# Define eligible designations
+ELIGIBLE_DESIGNATIONS = [
+    "Delivery Partner",
+    "Backup Delivery Partner",
+    "Extra Delivery Partner",
+    "Agent Delivery Partner"
+]
+
+def calculate_packet_bonus(dry_run=False):
     """
     Monthly cron job to calculate and distribute packet bonus among delivery partners.
     Runs at the end of each month.
+    The month's attendance of every bonus route is read in one query and the bonus of each route is
+    split across its eligible days with allocate_packet_bonus. With dry_run the allocation table is
+    printed and returned without creating anything:
+    bench execute custom_app_api.cron_functions.additional_salary_packet_bonus.calculate_packet_bonus --kwargs "{'dry_run': 1}"
     """
     try:
         current_date = getdate()
@@ -25,17 +39,12 @@ def calculate_packet_bonus():
         if not api_url or not api_key:
             frappe.throw("Analytics API configuration missing in site config")
         
-        # Get API data
-        response = requests.get(api_url, params={"api_key": api_key})
-        if response.status_code != 200:
-            frappe.throw(f"API request failed with status code: {response.status_code}")
-        
-        data = response.json()
-        bonus_rows = data["query_result"]["data"]["rows"]
+        # Get API data, rows are streamed from the feed snapshot
+        feed = fetch_analytics_feed("packet_bonus", api_url, api_key)
         
         # Create API data map (route_name + city as key)
         api_bonus_map = {}
-        for row in bonus_rows:
+        for row in feed.iter_rows():
             if row["bonus amount"] <= 0:  # Using correct key name with space
                 continue
             key = f"{row['Route name']}_{row['city_cd']}"  # Using city_cd instead of city
@@ -46,177 +55,183 @@ def calculate_packet_bonus():
                 "area": row["area"]
             }
 
-        # Get all routes from system
+        # Get all routes from system, keep the ones with a bonus
         routes = frappe.get_all("Route", 
-            fields=["name", "route_name", "city_name", "branch"]
+            fields=["name", "route_name", "city_name", "branch"],
+            limit_page_length=None
         )
-
-        # Create route maps
-        route_name_map = {}  # System generated name as key
-        route_composite_map = {}  # route_name + city as key
-        
+        bonus_routes = []
         for route in routes:
-            route_name_map[route.name] = route
-            key = f"{route.route_name}_{route.city_name}"
-            route_composite_map[key] = route
+            bonus_info = api_bonus_map.get(f"{route.route_name}_{route.city_name}")
+            if bonus_info:
+                route.bonus_info = bonus_info
+                bonus_routes.append(route)
 
-        # Process bonus calculation
-        processed_routes = 0
-        bonus_entries_created = 0
-        errors = []
+        if not bonus_routes:
+            frappe.logger().info(f"No routes with packet bonus for {first_day} to {last_day}")
+            return []
 
-        # Define eligible designations
-        ELIGIBLE_DESIGNATIONS = [
-            "Delivery Partner",
-            "Backup Delivery Partner",
-            "Extra Delivery Partner",
-            "Agent Delivery Partner"
-        ]
+        # Month of route x date x employee x designation in one query. Within a route the latest
+        # modified attendance comes first and wins a day with multiple punches
+        attendance_rows = frappe.db.sql("""
+            SELECT
+                a.custom_route AS route,
+                a.attendance_date,
+                a.employee,
+                e.employee_name,
+                e.designation,
+                e.company
+            FROM `tabAttendance` a
+            INNER JOIN `tabEmployee` e ON e.name = a.employee
+            WHERE a.custom_route IN %(routes)s
+            AND a.attendance_date BETWEEN %(from_date)s AND %(to_date)s
+            AND a.status = 'Present'
+            AND a.docstatus = 1
+            ORDER BY a.custom_route, a.modified DESC
+        """, {
+            "routes": tuple(route.name for route in bonus_routes),
+            "from_date": first_day,
+            "to_date": last_day
+        }, as_dict=1)
 
-        for composite_key, route_data in route_composite_map.items():
-            try:
-                if composite_key not in api_bonus_map:
-                    continue
+        # Columnar table of the attendance
+        route_codes = {route.name: index for index, route in enumerate(bonus_routes)}
+        employee_codes = {}
+        employees = []
+        for row in attendance_rows:
+            if row.employee not in employee_codes:
+                employee_codes[row.employee] = len(employees)
+                employees.append(row)
 
-                bonus_info = api_bonus_map[composite_key]
-                total_bonus = bonus_info["bonus_amount"]
+        allocation = allocate_packet_bonus(
+            route_index=[route_codes[row.route] for row in attendance_rows],
+            day_index=[row.attendance_date.day for row in attendance_rows],
+            employee_index=[employee_codes[row.employee] for row in attendance_rows],
+            eligible=[row.designation in ELIGIBLE_DESIGNATIONS for row in attendance_rows],
+            route_bonus=[route.bonus_info["bonus_amount"] for route in bonus_routes]
+        )
 
-                # Get attendance records for this route with designation filter
-                attendance_records = frappe.get_all(
-                    "Attendance",
-                    filters={
-                        "custom_route": route_data.name,
-                        "attendance_date": ["between", [first_day, last_day]],
-                        "status": "Present",
-                        "docstatus": 1
-                    },
-                    fields=["employee", "attendance_date"]
-                )
+        # Ineligible employees and multi-punch conflicts per route, for the logs and the reason
+        ineligible_employees = {}
+        for row in attendance_rows:
+            if row.designation not in ELIGIBLE_DESIGNATIONS:
+                ineligible_employees.setdefault(row.route, set()).add(f"{row.employee_name} ({row.designation})")
 
-                # Create employee attendance map
-                employee_days = {}
-                date_employee_map = {}  # To track multiple punches on same day
-                ineligible_employees = set()  # Track employees with wrong designation
+        for route, names in ineligible_employees.items():
+            frappe.logger().warning(f"Skipped ineligible employees for route {route}: {', '.join(names)}")
 
-                for record in attendance_records:
-                    # Check employee designation first
-                    employee_doc = frappe.get_doc("Employee", record.employee)
-                    
-                    if employee_doc.designation not in ELIGIBLE_DESIGNATIONS:
-                        ineligible_employees.add(f"{employee_doc.employee_name} ({employee_doc.designation})")
-                        continue
+        for index in allocation["conflicts"]:
+            row = attendance_rows[index]
+            frappe.logger().warning(
+                f"Multiple attendance found for date {row.attendance_date} on route {row.route}"
+            )
 
-                    date_str = record.attendance_date.strftime('%Y-%m-%d')
-                    
-                    # Check for multiple punches on same day
-                    if date_str in date_employee_map:
-                        frappe.logger().warning(
-                            f"Multiple attendance found for date {date_str} on route {route_data.name}"
-                        )
-                        continue
-                    
-                    date_employee_map[date_str] = record.employee
-                    employee_days[record.employee] = employee_days.get(record.employee, 0) + 1
+        # Allocation table, one entry per route and employee
+        total_days = {}
+        for route_index, days in zip(allocation["route"], allocation["days"]):
+            total_days[route_index] = total_days.get(route_index, 0) + int(days)
 
-                # Log ineligible employees if any
-                if ineligible_employees:
-                    frappe.logger().warning(
-                        f"Skipped ineligible employees for route {route_data.route_name}: "
-                        f"{', '.join(ineligible_employees)}"
-                    )
+        allocation_table = []
+        for route_index, employee_index, days, amount in zip(
+            allocation["route"], allocation["employee"], allocation["days"], allocation["amount"]
+        ):
+            route = bonus_routes[route_index]
+            employee = employees[employee_index]
+            allocation_table.append(frappe._dict({
+                "route": route.name,
+                "route_name": route.route_name,
+                "employee": employee.employee,
+                "employee_name": employee.employee_name,
+                "designation": employee.designation,
+                "company": employee.company,
+                "days": int(days),
+                "total_days": total_days[route_index],
+                "route_bonus": route.bonus_info["bonus_amount"],
+                "amount": float(amount)
+            }))
 
-                # Calculate and create bonus entries
-                if employee_days:
-                    total_days = sum(employee_days.values())
-                    
-                    # Create a summary of attendance for the reason field
-                    employee_details = []
-                    for employee, days in employee_days.items():
-                        emp_doc = frappe.get_doc("Employee", employee)
-                        employee_details.append(
-                            f"{emp_doc.employee_name} ({emp_doc.designation}): {days} days"
-                        )
+        if dry_run:
+            print(f"Packet bonus allocation for {first_day} to {last_day} (dry run, nothing created)")
+            for entry in allocation_table:
+                print(
+                    f"{entry.route_name} | {entry.employee} {entry.employee_name} ({entry.designation}) | "
+                    f"{entry.days}/{entry.total_days} days | ₹{entry.amount:,.2f} of ₹{entry.route_bonus:,.2f}"
+                )
+            print(f"Multi-punch conflicts: {allocation['conflicts'].size}")
+            return allocation_table
+
+        # Format the reason of every route with detailed information
+        reasons = {}
+        for route_index, route in enumerate(bonus_routes):
+            route_entries = [entry for entry in allocation_table if entry.route == route.name]
+            if not route_entries:
+                continue
 
-                    # Format the reason with detailed information
-                    reason = f"""Packet Bonus for {first_day.strftime('%B %Y')}
-Route: {route_data.route_name}
-City: {route_data.city_name}
+            bonus_info = route.bonus_info
+            employee_details = [
+                f"{entry.employee_name} ({entry.designation}): {entry.days} days"
+                for entry in route_entries
+            ]
+            reason = f"""Packet Bonus for {first_day.strftime('%B %Y')}
+Route: {route.route_name}
+City: {route.city_name}
 Zone: {bonus_info['zone']}
 Area: {bonus_info['area']}
-Total Bonus Amount: ₹{total_bonus:,.2f}
-Total Working Days: {total_days}
+Total Bonus Amount: ₹{bonus_info['bonus_amount']:,.2f}
+Total Working Days: {total_days[route_index]}
 Employee Distribution:
 {chr(10).join(employee_details)}"""
 
-                    if ineligible_employees:
-                        reason += f"\n\nIneligible Employees (Skipped):\n{chr(10).join(ineligible_employees)}"
+            if route.name in ineligible_employees:
+                reason += f"\n\nIneligible Employees (Skipped):\n{chr(10).join(ineligible_employees[route.name])}"
+            reasons[route.name] = reason
 
-                    for employee, days in employee_days.items():
-                        # Calculate proportional bonus
-                        employee_bonus = (days / total_days) * total_bonus
-                        emp_doc = frappe.get_doc("Employee", employee)
-
-                        if employee_bonus > 0:
-                            # Create Additional Salary entry with detailed reason
-                            additional_salary = frappe.get_doc({
-                                "doctype": "Additional Salary",
-                                "employee": employee,
-                                "employee_name": emp_doc.employee_name,
-                                "salary_component": "Packet Bonus",
-                                "amount": employee_bonus,
-                                "payroll_date": last_day,
-                                "company": emp_doc.company,
-                                "custom_route": route_data.name,
-                                "custom_attendance_days": days,
-                                "custom_reason": reason,
-                                "overwrite_salary_structure_amount": 0
-                            })
-
-                            # Bypass workflow and permissions
-                            additional_salary.flags.ignore_permissions = True
-                            additional_salary.flags.ignore_validate = True
-                            additional_salary.flags.ignore_mandatory = True
-                            additional_salary.flags.ignore_workflow = True
-                            
-                            # Insert without triggering workflow
-                            additional_salary.insert()
-                            
-                            # Force update workflow state and docstatus in database directly
-                            if additional_salary.salary_component != "Advance Salary":  # Safety check
-                                frappe.db.set_value('Additional Salary', additional_salary.name, {
-                                    'workflow_state': 'Submitted',
-                                    'docstatus': 1
-                                })
-                                
-                                # Reload the document to reflect the changes
-                                additional_salary.reload()
-                            
-                            # Remove submit() since we're handling it directly
-                            # additional_salary.submit()
-                            bonus_entries_created += 1
-
-                            frappe.logger().info(
-                                f"Created bonus entry for {emp_doc.employee_name} "
-                                f"({emp_doc.designation}) - ₹{employee_bonus:,.2f} "
-                                f"for {days}/{total_days} days"
-                            )
-
-                processed_routes += 1
+        # Bonus already created for the month, the job can run again without paying twice
+        existing_bonus = {
+            (entry.employee, entry.custom_route)
+            for entry in frappe.get_all(
+                "Additional Salary",
+                filters={"salary_component": "Packet Bonus", "payroll_date": last_day, "docstatus": 1},
+                fields=["employee", "custom_route"],
+                limit_page_length=None
+            )
+        }
 
-            except Exception as e:
-                error_msg = f"Error processing route {composite_key}: {str(e)}"
-                errors.append(error_msg)
-                frappe.logger().error(error_msg)
-                continue
+        bonus_entries = [
+            {
+                "employee": entry.employee,
+                "employee_name": entry.employee_name,
+                "salary_component": "Packet Bonus",
+                "amount": entry.amount,
+                "payroll_date": last_day,
+                "company": entry.company,
+                "custom_route": entry.route,
+                "custom_attendance_days": entry.days,
+                "custom_reason": reasons[entry.route],
+                "overwrite_salary_structure_amount": 0
+            }
+            for entry in allocation_table
+            if entry.amount > 0 and (entry.employee, entry.route) not in existing_bonus
+        ]
 
-        # Commit all changes
-        frappe.db.commit()
+        errors = []
+        bonus_entries_created = 0
+        try:
+            bonus_entries_created = len(bulk_insert_additional_salaries(bonus_entries))
+            # Commit all changes
+            frappe.db.commit()
+        except Exception as e:
+            frappe.db.rollback()
+            error_msg = f"Error creating {len(bonus_entries)} packet bonus entries: {str(e)}"
+            errors.append(error_msg)
+            frappe.logger().error(error_msg)
 
         # Log summary
         summary = f"""
 Packet Bonus Calculation completed for {first_day} to {last_day}:
-- Total routes processed: {processed_routes}
+- Total routes processed: {len(bonus_routes)}
 - Bonus entries created: {bonus_entries_created}
+- Multi-punch conflicts skipped: {allocation['conflicts'].size}
 - Errors encountered: {len(errors)}
 - Timestamp: {datetime.now()}
 """
@@ -229,6 +244,8 @@ Packet Bonus Calculation completed for {first_day} to {last_day}:
                 message="\n".join(errors)
             )
 
+        return allocation_table
+
     except Exception as e:
         error_msg = f"Packet bonus calculation failed: {str(e)}"
         frappe.logger().error(error_msg)
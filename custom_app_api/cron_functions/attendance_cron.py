@@ -1,14 +1,54 @@
 import frappe
 from frappe import _
-from typing import Dict, Any, Optional
-from custom_app_api.custom_api.helper_function.calculate_distance import calculate_total_distance
+from typing import Dict, Any, List, Optional
+from custom_app_api.custom_api.helper_function.clean_track import clean_track_distance
+from custom_app_api.custom_api.helper_function.distance_accumulator import get_track_cleaning_settings
+from custom_app_api.custom_api.helper_function.attendance_rollup import mark_attendance_dates_dirty
+from custom_app_api.custom_api.helper_function.naming_series import reserve_series_names
 import time
 
+# List of employee IDs to ignore
+EMPLOYEE_IDS_TO_IGNORE = ["SF-BDP-00140"]
+
+# Rows written per INSERT / UPDATE statement (and per commit) in bulk mode
+BULK_CHUNK_SIZE = 500
+
+# Sharded close-out, see close_out_attendance_in_shards
+DEFAULT_CLOSE_OUT_SHARDS = 1
+CLOSE_OUT_SUMMARY_KEY = "attendance_close_out_summary:{}"
+CLOSE_OUT_SHARD_COUNT_KEY = "attendance_close_out_shard_count:{}"
+CLOSE_OUT_REPORTED_KEY = "attendance_close_out_reported:{}"
+CLOSE_OUT_SUMMARY_TTL_SECONDS = 3 * 24 * 3600
+
+def calculate_attendance_distance(route_records) -> float:
+    """
+    Kilometers travelled for an attendance, from its Route Tracking rows ordered by recorded_at.
+    Low accuracy fixes, teleports and stationary jitter are removed before measuring.
+    """
+    return clean_track_distance(
+        [record.latitude for record in route_records],
+        [record.longitude for record in route_records],
+        [record.accuracy for record in route_records],
+        [record.recorded_at for record in route_records],
+        **get_track_cleaning_settings()
+    )
+
+
 def auto_mark_employee_absent_and_submit_all_todays_attendance() -> None:
     """
     Scheduled job to mark absent for employees with no attendance record
     Designed to run at the end of each day via scheduler
+    With `attendance_close_out_bulk_mode` set to 1 in site_config.json it runs the bulk close-out instead
+    (see bulk_close_out_attendance), sharded when `attendance_close_out_shards` > 1 or
+    `attendance_close_out_shard_by` is "branch".
     """
+    if frappe.utils.cint(frappe.conf.get("attendance_close_out_bulk_mode", 0)):
+        if frappe.conf.get("attendance_close_out_shard_by") == "branch" or frappe.utils.cint(frappe.conf.get("attendance_close_out_shards", DEFAULT_CLOSE_OUT_SHARDS)) > 1:
+            close_out_attendance_in_shards()
+        else:
+            bulk_close_out_attendance()
+        return
+
     start_time = time.time()
     try:
         today = frappe.utils.nowdate()
@@ -17,9 +57,6 @@ def auto_mark_employee_absent_and_submit_all_todays_attendance() -> None:
         # Get all active employees
         employee_start_time = time.time()
 
-        # List of employee IDs to ignore
-        employee_ids_to_ignore = ["SF-BDP-00140"]
-
 
         active_employees = frappe.get_all(
             "Employee",
@@ -58,7 +95,7 @@ def auto_mark_employee_absent_and_submit_all_todays_attendance() -> None:
 
         for employee in active_employees:
 
-            if employee.name in employee_ids_to_ignore:
+            if employee.name in EMPLOYEE_IDS_TO_IGNORE:
                 continue
 
             if employee.name not in employees_with_attendance:
@@ -120,7 +157,7 @@ def auto_mark_employee_absent_and_submit_all_todays_attendance() -> None:
                         # Get route tracking records for this attendance
                         route_fetch_start = time.time()
                         route_records = frappe.db.sql("""
-                            SELECT latitude, longitude, recorded_at
+                            SELECT latitude, longitude, accuracy, recorded_at
                             FROM `tabRoute Tracking`
                             WHERE attendance = %s
                             ORDER BY recorded_at ASC
@@ -130,9 +167,7 @@ def auto_mark_employee_absent_and_submit_all_todays_attendance() -> None:
                         # Calculate total distance if route records exist
                         if route_records:
                             distance_calc_start = time.time()
-                            coordinates = [[record.latitude, record.longitude] 
-                                        for record in route_records]
-                            total_distance = calculate_total_distance(coordinates)
+                            total_distance = calculate_attendance_distance(route_records)
                             
                             # Update the attendance record with total distance
                             attendance_doc.custom_kilometers_travelled = total_distance
@@ -175,6 +210,481 @@ def auto_mark_employee_absent_and_submit_all_todays_attendance() -> None:
             title="Auto Mark Absent Job Failed"
         )
 
+def get_attendance_naming_series() -> str:
+    """Default naming series of Attendance, as used by insert()"""
+    naming_series_field = frappe.get_meta("Attendance").get_field("naming_series")
+    if naming_series_field:
+        return naming_series_field.default or (naming_series_field.options or "").split("\n")[0] or "HR-ATT-.YYYY.-"
+    return "HR-ATT-.YYYY.-"
+
+
+def get_employees_on_leave(employees: List[str], attendance_date: str) -> set:
+    """Employees with an approved Leave Application covering the date"""
+    on_leave = set()
+    for chunk_start in range(0, len(employees), BULK_CHUNK_SIZE):
+        on_leave.update(frappe.get_all(
+            "Leave Application",
+            filters={
+                "employee": ["in", employees[chunk_start:chunk_start + BULK_CHUNK_SIZE]],
+                "from_date": ["<=", attendance_date],
+                "to_date": [">=", attendance_date],
+                "status": "Approved",
+                "docstatus": 1
+            },
+            pluck="employee"
+        ))
+    return on_leave
+
+
+def insert_absent_attendance_documents(employees: List[Dict[str, Any]], attendance_date: str) -> int:
+    """
+    Absent attendance through insert() and submit(), for the employees the bulk INSERT leaves out.
+    validate turns the attendance of an employee on leave into On Leave / Half Day with the leave
+    application linked. Returns the number of documents created.
+    """
+    created = 0
+    for employee in employees:
+        try:
+            attendance = frappe.get_doc({
+                "doctype": "Attendance",
+                "employee": employee.name,
+                "employee_name": employee.employee_name,
+                "attendance_date": attendance_date,
+                "status": "Absent",
+                "company": employee.company,
+                "department": employee.department,
+                "custom_route": employee.custom_route
+            })
+            attendance.insert()
+            attendance.submit()
+            frappe.db.commit()
+            created += 1
+        except Exception as e:
+            frappe.db.rollback()
+            frappe.log_error(
+                message=f"Error marking absent for employee {employee.name}: {str(e)}",
+                title="Auto Mark Absent Error"
+            )
+    return created
+
+
+def bulk_insert_absent_attendance(employees: List[Dict[str, Any]], attendance_date: str) -> int:
+    """
+    Insert submitted Absent attendance for the given employees with multi-row INSERT ... SELECT.
+    Names are reserved once for the whole set. The row is what insert() would have written:
+    - the fields fetched from the route (custom_branch, custom_zone, custom_area, custom_route_point)
+      are selected from Route, as the permission query of Last Mile Managers filters on custom_branch
+    - as in validate, an employee who is no longer Active or who got attendance for the date since the
+      employees were fetched (punch in during the close-out) is skipped inside the INSERT
+    - employees on approved leave are created with insert_absent_attendance_documents, so validate
+      marks them On Leave, and skipped inside the INSERT if their leave was approved meanwhile
+    Commits after every chunk. Returns the number of attendance records created.
+    """
+    if not employees:
+        return 0
+
+    on_leave = get_employees_on_leave([employee.name for employee in employees], attendance_date)
+    created = insert_absent_attendance_documents(
+        [employee for employee in employees if employee.name in on_leave], attendance_date
+    )
+    employees = [employee for employee in employees if employee.name not in on_leave]
+    if not employees:
+        return created
+
+    series = get_attendance_naming_series()
+    names = reserve_series_names(series, len(employees))
+    frappe.db.commit()
+
+    now = frappe.utils.now_datetime()
+    user = frappe.session.user
+    fields = [
+        "name", "creation", "modified", "owner", "modified_by", "docstatus", "idx",
+        "naming_series", "employee", "employee_name", "attendance_date", "status",
+        "company", "department", "custom_route"
+    ]
+    route_fields = {
+        "custom_branch": "branch",
+        "custom_zone": "zone_name",
+        "custom_area": "area_name",
+        "custom_route_point": "point_name"
+    }
+    columns = ", ".join(f"`{field}`" for field in [*fields, *route_fields])
+    selected = ", ".join(
+        [f"candidate.`{field}`" for field in fields]
+        + [f"route.`{route_field}`" for route_field in route_fields.values()]
+    )
+    row_placeholders = ", ".join(f"%s AS `{field}`" for field in fields)
+
+    for chunk_start in range(0, len(employees), BULK_CHUNK_SIZE):
+        chunk = employees[chunk_start:chunk_start + BULK_CHUNK_SIZE]
+        chunk_names = names[chunk_start:chunk_start + BULK_CHUNK_SIZE]
+        values = []
+        for name, employee in zip(chunk_names, chunk):
+            values.extend((
+                name, now, now, user, user, 1, 0,
+                series, employee.name, employee.employee_name, attendance_date, "Absent",
+                employee.company, employee.department, employee.custom_route
+            ))
+
+        candidates = " UNION ALL ".join(f"SELECT {row_placeholders}" for _ in chunk)
+        frappe.db.sql(f"""
+            INSERT INTO `tabAttendance` ({columns})
+            SELECT {selected}
+            FROM ({candidates}) candidate
+            INNER JOIN `tabEmployee` employee
+                ON employee.name = candidate.employee
+                AND employee.status = 'Active'
+            LEFT JOIN `tabRoute` route ON route.name = candidate.custom_route
+            WHERE NOT EXISTS (
+                SELECT 1 FROM `tabAttendance` existing
+                WHERE existing.employee = candidate.employee
+                AND existing.attendance_date = candidate.attendance_date
+                AND existing.docstatus < 2
+            )
+            AND NOT EXISTS (
+                SELECT 1 FROM `tabLeave Application` leave_application
+                WHERE leave_application.employee = candidate.employee
+                AND candidate.attendance_date BETWEEN leave_application.from_date AND leave_application.to_date
+                AND leave_application.status = 'Approved'
+                AND leave_application.docstatus = 1
+            )
+        """, tuple(values))
+        # Reserved names are unique, the rows carrying them are the ones inserted
+        created += frappe.db.count("Attendance", {"name": ["in", chunk_names]})
+        frappe.db.commit()
+
+    return created
+
+
+def get_draft_distances(drafts: List[Dict[str, Any]]) -> Dict[str, float]:
+    """
+    Kilometers travelled for each punched-in draft, measured on the stored tracks read with one query
+    per chunk. The running distance of distance_accumulator is only a live estimate and is not used
+    for the paid kilometers, so they are the same on every close-out path.
+    """
+    distances = {}
+    punched_in = [draft.name for draft in drafts if draft.custom_mobile_punch_in_at]
+
+    for chunk_start in range(0, len(punched_in), BULK_CHUNK_SIZE):
+        chunk = punched_in[chunk_start:chunk_start + BULK_CHUNK_SIZE]
+        route_records = frappe.db.sql("""
+            SELECT attendance, latitude, longitude, accuracy, recorded_at
+            FROM `tabRoute Tracking`
+            WHERE attendance IN %(attendances)s
+            ORDER BY attendance, recorded_at ASC
+        """, {"attendances": tuple(chunk)}, as_dict=1)
+
+        tracks = {}
+        for record in route_records:
+            tracks.setdefault(record.attendance, []).append(record)
+
+        for attendance, records in tracks.items():
+            distances[attendance] = calculate_attendance_distance(records)
+
+    return distances
+
+
+def bulk_submit_draft_attendance(drafts: List[Dict[str, Any]]) -> int:
+    """
+    Submit draft attendance in chunks with one UPDATE per chunk, setting kilometers travelled and
+    the auto punch out, and committing after every chunk. Drafts were validated when inserted,
+    so the documents are not loaded again.
+
+    The UPDATE leaves the row as submit() would. What submit() runs besides writing the row is skipped:
+    - validate: the draft passed it on insert, and the close-out only sets kilometers and punch out
+    - on_submit doc_events: the only one is update_attendance_rollup, the caller marks the date dirty instead
+    - HRMS Attendance on_update (publish_update): a realtime refresh for open attendance views, the
+      list is loaded again anyway the next time it is opened
+    - notifications on submit and the Version entry: sites relying on them keep bulk mode off, the
+      document path still runs them
+    """
+    if not drafts:
+        return 0
+
+    distances = get_draft_distances(drafts)
+    now = frappe.utils.now()
+    submitted = 0
+
+    for chunk_start in range(0, len(drafts), BULK_CHUNK_SIZE):
+        chunk = drafts[chunk_start:chunk_start + BULK_CHUNK_SIZE]
+        # Drafts submitted or cancelled since they were fetched are not touched
+        names = frappe.get_all(
+            "Attendance",
+            filters={"name": ["in", [draft.name for draft in chunk]], "docstatus": 0},
+            pluck="name",
+            for_update=True
+        )
+        if not names:
+            frappe.db.commit()
+            continue
+
+        km_cases = []
+        values = {"names": tuple(names), "now": now, "user": frappe.session.user}
+        for idx, draft in enumerate(chunk):
+            if draft.name in distances:
+                km_cases.append(f"WHEN %(name_{idx})s THEN %(km_{idx})s")
+                values[f"name_{idx}"] = draft.name
+                values[f"km_{idx}"] = distances[draft.name]
+
+        km_clause = (
+            f"custom_kilometers_travelled = CASE name {' '.join(km_cases)} ELSE custom_kilometers_travelled END,"
+            if km_cases else ""
+        )
+
+        # custom_is_mobile_auto_punch_out is assigned before custom_mobile_punch_out_at, so it sees the old value
+        frappe.db.sql(f"""
+            UPDATE `tabAttendance`
+            SET
+                {km_clause}
+                custom_is_mobile_auto_punch_out = IF(custom_mobile_punch_out_at IS NULL, 1, custom_is_mobile_auto_punch_out),
+                custom_mobile_punch_out_at = IFNULL(custom_mobile_punch_out_at, %(now)s),
+                docstatus = 1,
+                modified = %(now)s,
+                modified_by = %(user)s
+            WHERE name IN %(names)s
+            AND docstatus = 0
+        """, values)
+        submitted += len(names)
+        frappe.db.commit()
+
+    return submitted
+
+
+def get_shard_condition(shard: Optional[Dict[str, Any]], employee_column: str, branch_column: str):
+    """
+    SQL condition and values restricting a query to the employees of a shard, ("", {}) for no sharding.
+    Shards are {"mode": "hash", "index": i, "count": n} or {"mode": "branch", "branch": branch}.
+    The hash is MySQL CRC32 of the employee ID, the same value as zlib.crc32.
+    """
+    if not shard:
+        return "", {}
+
+    if shard["mode"] == "branch":
+        return f"AND IFNULL({branch_column}, '') = %(shard_branch)s", {"shard_branch": shard["branch"] or ""}
+
+    return (
+        f"AND CRC32({employee_column}) %% %(shard_count)s = %(shard_index)s",
+        {"shard_count": shard["count"], "shard_index": shard["index"]}
+    )
+
+
+def bulk_close_out_attendance(attendance_date: Optional[str] = None, shard: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Bulk version of auto_mark_employee_absent_and_submit_all_todays_attendance:
+    - Absent attendance is built in memory and written with batched INSERTs under a single naming series reservation
+    - Drafts are submitted in chunks with one UPDATE each and periodic commits
+    - Only the needed columns are selected
+    With `shard`, only the employees of that shard are read and processed (see get_shard_condition).
+    Safe to re-run: employees that already have attendance are skipped and only drafts are submitted.
+    Prints and returns the counts and the throughput of every phase.
+    """
+    start_time = time.time()
+    attendance_date = attendance_date or frappe.utils.nowdate()
+    summary = {"date": attendance_date, "shard": shard, "absent_marked": 0, "drafts_submitted": 0, "errors": 0, "phases": {}}
+
+    def record_phase(phase, phase_start, rows):
+        elapsed = time.time() - phase_start
+        summary["phases"][phase] = {
+            "rows": rows,
+            "seconds": round(elapsed, 2),
+            "rows_per_second": round(rows / elapsed, 1) if elapsed else rows
+        }
+        print(f"{phase}: {rows} rows in {elapsed:.2f} seconds")
+
+    try:
+        phase_start = time.time()
+        employee_condition, values = get_shard_condition(shard, "e.name", "e.branch")
+        attendance_condition, _ = get_shard_condition(shard, "a.employee", "e.branch")
+        values.update({"attendance_date": attendance_date, "ignored": tuple(EMPLOYEE_IDS_TO_IGNORE) or ("",)})
+
+        active_employees = frappe.db.sql(f"""
+            SELECT e.name, e.employee_name, e.company, e.department, e.custom_route
+            FROM `tabEmployee` e
+            WHERE e.status = 'Active'
+            AND e.date_of_joining <= %(attendance_date)s
+            AND e.name NOT IN %(ignored)s
+            {employee_condition}
+        """, values, as_dict=1)
+        # The employee is joined for branch shards, it can have left since punching in
+        existing_attendance = frappe.db.sql(f"""
+            SELECT a.name, a.employee, a.docstatus, a.custom_mobile_punch_in_at
+            FROM `tabAttendance` a
+            LEFT JOIN `tabEmployee` e ON e.name = a.employee
+            WHERE a.attendance_date = %(attendance_date)s
+            AND a.docstatus IN (0, 1)
+            {attendance_condition}
+        """, values, as_dict=1)
+
+        record_phase("fetch", phase_start, len(active_employees) + len(existing_attendance))
+
+        employees_with_attendance = {att.employee for att in existing_attendance}
+        absent_employees = [employee for employee in active_employees if employee.name not in employees_with_attendance]
+
+        phase_start = time.time()
+        try:
+            summary["absent_marked"] = bulk_insert_absent_attendance(absent_employees, attendance_date)
+        except Exception as e:
+            frappe.db.rollback()
+            summary["errors"] += 1
+            frappe.log_error(
+                message=f"Error bulk marking absent for {attendance_date}: {str(e)}\n{frappe.get_traceback()}",
+                title="Auto Mark Absent Error"
+            )
+        record_phase("absent_marking", phase_start, summary["absent_marked"])
+
+        phase_start = time.time()
+        drafts = [att for att in existing_attendance if att.docstatus == 0]
+        try:
+            summary["drafts_submitted"] = bulk_submit_draft_attendance(drafts)
+        except Exception as e:
+            frappe.db.rollback()
+            summary["errors"] += 1
+            frappe.log_error(
+                message=f"Error bulk submitting attendance for {attendance_date}: {str(e)}\n{frappe.get_traceback()}",
+                title="Auto Submit Attendance Error"
+            )
+        record_phase("draft_submission", phase_start, summary["drafts_submitted"])
+
+        # Bulk writes skip the Attendance hooks, refresh the daily rollup for the date here
+        mark_attendance_dates_dirty([attendance_date])
+
+        summary["seconds"] = round(time.time() - start_time, 2)
+        print(
+            f"Bulk Auto Mark Absent Summary - Date: {attendance_date}\n"
+            f"Total Active Employees: {len(active_employees)}\n"
+            f"Existing Attendance: {len(existing_attendance)}\n"
+            f"Marked Absent: {summary['absent_marked']}\n"
+            f"Submitted: {summary['drafts_submitted']}\n"
+            f"Errors: {summary['errors']}\n"
+            f"Total execution time: {summary['seconds']:.2f} seconds"
+        )
+
+    except Exception as e:
+        summary["errors"] += 1
+        frappe.log_error(
+            message=f"Error in bulk auto mark absent job: {str(e)}",
+            title="Auto Mark Absent Job Failed"
+        )
+
+    return summary
+
+def close_out_attendance_in_shards(
+    attendance_date: Optional[str] = None,
+    shard_by: Optional[str] = None,
+    shard_count: Optional[int] = None
+) -> List[str]:
+    """
+    Coordinator of the sharded close-out: splits employees by branch or by hash of the employee ID
+    and enqueues one bulk_close_out_attendance job per shard on the long queue.
+    Each shard stores its summary, the last shard to finish logs the combined summary.
+    Calling it again only re-runs shards that are not queued or running, shards are idempotent.
+    Returns the shard IDs.
+    """
+    attendance_date = attendance_date or frappe.utils.nowdate()
+    shard_by = shard_by or frappe.conf.get("attendance_close_out_shard_by") or "hash"
+
+    if shard_by == "branch":
+        # All employees, so drafts of employees who left since punching in are covered too
+        branches = frappe.get_all("Employee", pluck="branch", distinct=True)
+        shards = {
+            f"branch-{branch or 'none'}": {"mode": "branch", "branch": branch}
+            for branch in set(branches)
+        }
+    else:
+        shard_count = frappe.utils.cint(shard_count or frappe.conf.get("attendance_close_out_shards")) or DEFAULT_CLOSE_OUT_SHARDS
+        shards = {
+            f"hash-{index}-of-{shard_count}": {"mode": "hash", "index": index, "count": shard_count}
+            for index in range(shard_count)
+        }
+
+    frappe.cache.set(
+        frappe.cache.make_key(CLOSE_OUT_SHARD_COUNT_KEY.format(attendance_date)),
+        len(shards),
+        ex=CLOSE_OUT_SUMMARY_TTL_SECONDS
+    )
+
+    # A re-run reports again once all of its shards are back
+    frappe.cache.delete_value(CLOSE_OUT_SUMMARY_KEY.format(attendance_date))
+    frappe.cache.delete(frappe.cache.make_key(CLOSE_OUT_REPORTED_KEY.format(attendance_date)))
+
+    for shard_id, shard in shards.items():
+        frappe.enqueue(
+            "custom_app_api.cron_functions.attendance_cron.run_close_out_shard",
+            queue="long",
+            timeout=3600,
+            job_id=f"attendance_close_out::{attendance_date}::{shard_id}",
+            deduplicate=True,
+            attendance_date=attendance_date,
+            shard_id=shard_id,
+            shard=shard
+        )
+
+    print(f"Enqueued {len(shards)} attendance close-out shards for {attendance_date}")
+    return list(shards)
+
+
+def run_close_out_shard(attendance_date: str, shard_id: str, shard: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one shard of the close-out and report its summary to the coordinator"""
+    summary = bulk_close_out_attendance(attendance_date, shard)
+
+    summary_key = CLOSE_OUT_SUMMARY_KEY.format(attendance_date)
+    frappe.cache.hset(summary_key, shard_id, summary)
+    frappe.cache.expire(frappe.cache.make_key(summary_key), CLOSE_OUT_SUMMARY_TTL_SECONDS)
+
+    summaries = frappe.cache.hgetall(summary_key)
+    shard_count = frappe.utils.cint(frappe.cache.get(frappe.cache.make_key(CLOSE_OUT_SHARD_COUNT_KEY.format(attendance_date))))
+
+    # The last shard to finish writes the combined summary, once
+    reported_key = frappe.cache.make_key(CLOSE_OUT_REPORTED_KEY.format(attendance_date))
+    if shard_count and len(summaries) >= shard_count and frappe.cache.set(reported_key, 1, ex=CLOSE_OUT_SUMMARY_TTL_SECONDS, nx=True):
+        combined = combine_close_out_summaries(summaries)
+        print(
+            f"Sharded Auto Mark Absent Summary - Date: {attendance_date}\n"
+            f"Shards: {len(summaries)}\n"
+            f"Marked Absent: {combined['absent_marked']}\n"
+            f"Submitted: {combined['drafts_submitted']}\n"
+            f"Errors: {combined['errors']}\n"
+            f"Slowest shard: {combined['slowest_shard']} ({combined['max_seconds']:.2f} seconds)"
+        )
+        if combined["errors"]:
+            frappe.log_error(
+                message=f"Attendance close-out for {attendance_date} finished with errors:\n{frappe.as_json(summaries)}",
+                title="Auto Mark Absent Shard Errors"
+            )
+
+    return summary
+
+
+def combine_close_out_summaries(summaries: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    combined = {"absent_marked": 0, "drafts_submitted": 0, "errors": 0, "max_seconds": 0.0, "slowest_shard": None}
+    for shard_id, summary in summaries.items():
+        combined["absent_marked"] += summary.get("absent_marked", 0)
+        combined["drafts_submitted"] += summary.get("drafts_submitted", 0)
+        combined["errors"] += summary.get("errors", 0)
+        if summary.get("seconds", 0) >= combined["max_seconds"]:
+            combined["max_seconds"] = summary.get("seconds", 0)
+            combined["slowest_shard"] = shard_id
+    return combined
+
+
+@frappe.whitelist()
+def get_close_out_status(attendance_date: Optional[str] = None) -> Dict[str, Any]:
+    """Per-shard summaries of the sharded close-out for a date"""
+    frappe.only_for("System Manager")
+
+    attendance_date = attendance_date or frappe.utils.nowdate()
+    summaries = frappe.cache.hgetall(CLOSE_OUT_SUMMARY_KEY.format(attendance_date)) or {}
+    shard_count = frappe.utils.cint(frappe.cache.get(frappe.cache.make_key(CLOSE_OUT_SHARD_COUNT_KEY.format(attendance_date))))
+
+    return {
+        "date": attendance_date,
+        "shards": shard_count,
+        "completed": len(summaries),
+        "summary": combine_close_out_summaries(summaries),
+        "shard_summaries": summaries
+    }
+
+
 def auto_mark_employee_absent_and_submit_all_attendance_for_a_specific_date() -> None:
     """
     Scheduled job to mark absent for employees with no attendance record
@@ -283,7 +793,7 @@ def auto_mark_employee_absent_and_submit_all_attendance_for_a_specific_date() ->
                         # Get route tracking records for this attendance
                         route_fetch_start = time.time()
                         route_records = frappe.db.sql("""
-                            SELECT latitude, longitude, recorded_at
+                            SELECT latitude, longitude, accuracy, recorded_at
                             FROM `tabRoute Tracking`
                             WHERE attendance = %s
                             ORDER BY recorded_at ASC
@@ -293,9 +803,7 @@ def auto_mark_employee_absent_and_submit_all_attendance_for_a_specific_date() ->
                         # Calculate total distance if route records exist
                         if route_records:
                             distance_calc_start = time.time()
-                            coordinates = [[record.latitude, record.longitude] 
-                                        for record in route_records]
-                            total_distance = calculate_total_distance(coordinates)
+                            total_distance = calculate_attendance_distance(route_records)
                             
                             # Update the attendance record with total distance
                             attendance_doc.custom_kilometers_travelled = total_distance
@@ -1,19 +1,19 @@
 import frappe
 from frappe import _
 import time
+from custom_app_api.database_indexes import ensure_indexes
 
 def check_attendance_index_for_route_tracking() -> None:
     """
-    This function is designed to run at 9 o clock every day, this will check for attendance index for route tracking and update the attendance index
+    Create any missing index declared in custom_app_api.database_indexes.
+    No longer scheduled, indexes are applied on install / migrate. Kept for running manually with bench execute.
     """
     try:
         attendance_index_check_start = time.time()
 
-        output = frappe.db.sql("""
-                            CREATE INDEX IF NOT EXISTS idx_route_tracking_attendance   ON `tabRoute Tracking` (attendance) ALGORITHM=INPLACE;
-                        """, as_dict=1)
+        created = ensure_indexes()
 
-        print(output)
+        print(f"Created indexes: {created}")
 
         attendance_index_check_end = time.time()
 
@@ -23,4 +23,4 @@ def check_attendance_index_for_route_tracking() -> None:
         frappe.log_error(
             message=f"Error in checking attendance index: {str(e)}",
             title="Check Attendance Index Failed"
-        )
\ No newline at end of file
+        )
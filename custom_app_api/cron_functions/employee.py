@@ -1,6 +1,8 @@
 import frappe
 from frappe.utils import today, date_diff, add_days, getdate, now_datetime
 from custom_app_api.doc_events.employee import create_job_opening_for_route
+from custom_app_api.custom_api.helper_function.token_session_cache import invalidate_employee_status
+from custom_app_api.custom_api.helper_function.attendance_rollup import mark_employee_attendance_dirty
 
 def check_notice_period_completion():
     """
@@ -51,6 +53,8 @@ def check_notice_period_completion():
                         'status': 'Left',
                         'relieving_date': relieving_date
                     }, update_modified=False)
+                    invalidate_employee_status(employee.name)
+                    mark_employee_attendance_dirty(employee.name)
                     
                     # Create job opening for L5 grade employees
                     if employee.grade == "L5" and employee.custom_route:
@@ -1,14 +1,40 @@
+import time
 import frappe
-import requests
 from datetime import datetime
+from custom_app_api.custom_api.helper_function.analytics_feed import fetch_analytics_feed, get_feed_cycle_seconds
+from custom_app_api.custom_api.helper_function.route_sync import (
+    get_route_hierarchy_index,
+    set_route_hierarchy_index,
+    clear_route_hierarchy_index,
+    get_total_delivery_changes,
+    apply_total_delivery_changes,
+    bulk_update_total_delivery
+)
+
+# City code: (state, branch)
+CITY_LOCATIONS = {
+    "BLR": ("Karnataka", "Bengaluru"),
+    "HYD": ("Telangana", "Hyderabad"),
+}
+
+# Hierarchy levels, parents first: (doctype, id field of the API row)
+HIERARCHY_LEVELS = [
+    ("City", "city_id"),
+    ("Zone", "zone_id"),
+    ("Area", "area_id"),
+    ("Point", "pickup_point_id"),
+    ("Route", "route_id"),
+]
 
 def import_routes_v2():
     """
     Daily cron job to import routes from analytics API with complete hierarchy.
     This function imports city, zone, area, point, and route based on the updated schema.
-    Runs at the end of each day.
+    Existing records are loaded once, only new nodes are inserted (level by level) and only
+    changed total_delivery values are written (one bulk UPDATE), so an unchanged run does no writes.
     """
     try:
+        start_time = time.time()
         print(f"Starting route import v2 at {datetime.now()}")
         
         # Fetch data from API
@@ -19,263 +45,70 @@ def import_routes_v2():
             frappe.throw("Analytics API configuration missing in site config")
         
         print("Fetching data from analytics API...")
-        response = requests.get(api_url, params={"api_key": api_key})
-        
-        if response.status_code != 200:
-            frappe.throw(f"API request failed with status code: {response.status_code}")
-        
-        data = response.json()
-        rows = data["query_result"]["data"]["rows"]
+        feed = fetch_analytics_feed(
+            "routes_v2",
+            api_url,
+            api_key,
+            consumer="import_routes_v2",
+            max_age=get_feed_cycle_seconds()
+        )
+        if not feed.changed:
+            print("Route feed unchanged since the last import, nothing to do")
+            return
+
+        rows = list(feed.iter_rows())
         print(f"Retrieved {len(rows)} routes from API")
 
-        # Create maps for existing records
-        city_sf_analytics_id_map = {}
-        zone_sf_analytics_id_map = {}
-        area_sf_analytics_id_map = {}
-        point_sf_analytics_id_map = {}
-        route_sf_analytics_id_map = {}
-        
-        # Get existing records from Frappe
-        cities = frappe.get_all("City", fields=["name", "city_name", "sf_analytics_id"], limit_page_length=None)
-        for city in cities:
-            if city.sf_analytics_id:
-                city_sf_analytics_id_map[int(city.sf_analytics_id)] = {
-                    "name": city.name,
-                    "city_name": city.city_name
-                }
-        
-        zones = frappe.get_all("Zone", fields=["name", "zone_name", "sf_analytics_id"], limit_page_length=None)
-        for zone in zones:
-            if zone.sf_analytics_id:
-                zone_sf_analytics_id_map[int(zone.sf_analytics_id)] = {
-                    "name": zone.name,
-                    "zone_name": zone.zone_name
-                }
-        
-        areas = frappe.get_all("Area", fields=["name", "area_name", "sf_analytics_id"], limit_page_length=None)
-        for area in areas:
-            if area.sf_analytics_id:
-                area_sf_analytics_id_map[int(area.sf_analytics_id)] = {
-                    "name": area.name,
-                    "area_name": area.area_name
-                }
-        
-        points = frappe.get_all("Point", fields=["name", "point_name", "sf_analytics_id"], limit_page_length=None)
-        for point in points:
-            if point.sf_analytics_id:
-                point_sf_analytics_id_map[int(point.sf_analytics_id)] = {
-                    "name": point.name,
-                    "point_name": point.point_name
-                }
-        
-        routes = frappe.get_all("Route", fields=["name", "route_name", "sf_analytics_id"], limit_page_length=None)
-        for route in routes:
-            if route.sf_analytics_id:
-                route_sf_analytics_id_map[int(route.sf_analytics_id)] = {
-                    "name": route.name,
-                    "route_name": route.route_name
-                }
-        
-        print(f"Found {len(city_sf_analytics_id_map)} existing cities in system")
-        print(f"Found {len(zone_sf_analytics_id_map)} existing zones in system")
-        print(f"Found {len(area_sf_analytics_id_map)} existing areas in system")
-        print(f"Found {len(point_sf_analytics_id_map)} existing points in system")
-        print(f"Found {len(route_sf_analytics_id_map)} existing routes in system")
-        
-        # Process each row
-        new_cities_count = 0
-        new_zones_count = 0
-        new_areas_count = 0
-        new_points_count = 0
-        new_routes_count = 0
-        
-        # Start transaction
-        frappe.db.begin()
-        
+        unknown_cities = {row["city"] for row in rows if row["city"] not in CITY_LOCATIONS}
+        for city in unknown_cities:
+            print(f"Unknown city code: {city}, skipping rows")
+        rows = [row for row in rows if row["city"] in CITY_LOCATIONS]
+
+        # Existing records of every level, keyed by sf_analytics_id, shared by the jobs of this cycle
+        existing = get_route_hierarchy_index()
+        for doctype, records in existing.items():
+            print(f"Found {len(records)} existing {doctype} records in system")
+
         try:
-            for row in rows:
-                try:
-                    # Determine state and branch based on city
-                    state_name = None
-                    branch = None
-                    
-                    if row["city"] == "BLR":
-                        state_name = "Karnataka"
-                        branch = "Bengaluru"
-                    elif row["city"] == "HYD":
-                        state_name = "Telangana"
-                        branch = "Hyderabad"
-                    else:
-                        print(f"Unknown city code: {row['city']}, skipping row")
-                        continue
-                    
-                    # # Get or create state
-                    # state_doc = None
-                    # if frappe.db.exists("State", {"state_name": state_name}):
-                    #     state_doc = frappe.get_doc("State", {"state_name": state_name})
-                    # else:
-                    #     state_doc = frappe.get_doc({
-                    #         "doctype": "State",
-                    #         "state_name": state_name
-                    #     })
-                    #     state_doc.insert()
+            # Parents first, so every level can resolve the names of the level above
+            created = {}
+            failed = 0
+            for doctype, id_field in HIERARCHY_LEVELS:
+                created[doctype], level_failed = insert_new_nodes(doctype, id_field, rows, existing)
+                failed += level_failed
+
+            changes = get_total_delivery_changes(rows, existing["Route"])
+            updated_routes_count = bulk_update_total_delivery(changes)
 
-                    state_doc = {
-                        "name": state_name,
-                        "state_name": state_name
-                    }
-                    
-                    # Get or create city
-                    city_doc = None
-                    if row["city_id"] in city_sf_analytics_id_map:
-                        # We already have the city in our map, no need to fetch it again
-                        city_name = city_sf_analytics_id_map[row["city_id"]]["name"]
-                    else:
-                        city_doc = frappe.get_doc({
-                            "doctype": "City",
-                            "city_name": row["city"],
-                            "state_name": state_doc["name"],
-                            "sf_analytics_id": row["city_id"]
-                        })
-                        city_doc.insert()
-                        
-                        # Add to map
-                        city_name = city_doc.name
-                        city_sf_analytics_id_map[row["city_id"]] = {
-                            "name": city_name,
-                            "city_name": city_doc.city_name
-                        }
-                        new_cities_count += 1
-                    
-                    # Get or create zone
-                    zone_doc = None
-                    if row["zone_id"] in zone_sf_analytics_id_map:
-                        # We already have the zone in our map, no need to fetch it again
-                        zone_name = zone_sf_analytics_id_map[row["zone_id"]]["name"]
-                    else:
-                        zone_doc = frappe.get_doc({
-                            "doctype": "Zone",
-                            "zone_name": row["zone"],
-                            "city_name": city_name,
-                            "state_name": state_doc["name"],
-                            "branch": branch,
-                            "sf_analytics_id": row["zone_id"]
-                        })
-                        zone_doc.insert()
-                        
-                        # Add to map
-                        zone_name = zone_doc.name
-                        zone_sf_analytics_id_map[row["zone_id"]] = {
-                            "name": zone_name,
-                            "zone_name": zone_doc.zone_name
-                        }
-                        new_zones_count += 1
-                    
-                    # Get or create area
-                    area_doc = None
-                    if row["area_id"] in area_sf_analytics_id_map:
-                        # We already have the area in our map, no need to fetch it again
-                        area_name = area_sf_analytics_id_map[row["area_id"]]["name"]
-                    else:
-                        area_doc = frappe.get_doc({
-                            "doctype": "Area",
-                            "area_name": row["area"],
-                            "zone_name": zone_name,
-                            "city_name": city_name,
-                            "state_name": state_doc["name"],
-                            "branch": branch,
-                            "sf_analytics_id": row["area_id"]
-                        })
-                        area_doc.insert()
-                        
-                        # Add to map
-                        area_name = area_doc.name
-                        area_sf_analytics_id_map[row["area_id"]] = {
-                            "name": area_name,
-                            "area_name": area_doc.area_name
-                        }
-                        new_areas_count += 1
-                    
-                    # Get or create point
-                    point_doc = None
-                    if row["pickup_point_id"] in point_sf_analytics_id_map:
-                        # We already have the point in our map, no need to fetch it again
-                        point_name = point_sf_analytics_id_map[row["pickup_point_id"]]["name"]
-                    else:
-                        point_doc = frappe.get_doc({
-                            "doctype": "Point",
-                            "point_name": row["pick_up_point"],
-                            "point_code": str(row["pickup_point_id"]),
-                            "area_name": area_name,
-                            "zone_name": zone_name,
-                            "city_name": city_name,
-                            "state_name": state_doc["name"],
-                            "branch": branch,
-                            "sf_analytics_id": row["pickup_point_id"]
-                        })
-                        point_doc.insert()
-                        
-                        # Add to map
-                        point_name = point_doc.name
-                        point_sf_analytics_id_map[row["pickup_point_id"]] = {
-                            "name": point_name,
-                            "point_name": point_doc.point_name
-                        }
-                        new_points_count += 1
-                    
-                    # Get or create route
-                    if row["route_id"] in route_sf_analytics_id_map:
-                        # Update existing route's total_delivery
-                        route_name = route_sf_analytics_id_map[row["route_id"]]["name"]
-                        route_doc = frappe.get_doc("Route", route_name)
-                        route_doc.total_delivery = row["count_of_customers"]
-                        route_doc.save()
-                    else:
-                        route_doc = frappe.get_doc({
-                            "doctype": "Route",
-                            "route_name": row["route"],
-                            "point_name": point_name,
-                            "area_name": area_name,
-                            "zone_name": zone_name,
-                            "city_name": city_name,
-                            "state_name": state_doc["name"],
-                            "branch": branch,
-                            "total_delivery": row["count_of_customers"],
-                            "sf_analytics_id": row["route_id"]
-                        })
-                        route_doc.insert()
-                        
-                        # Add to map
-                        route_name = route_doc.name
-                        route_sf_analytics_id_map[row["route_id"]] = {
-                            "name": route_name,
-                            "route_name": route_doc.route_name
-                        }
-                        new_routes_count += 1
-                
-                except Exception as e:
-                    print(f"Error processing row {row}: {str(e)}")
-                    frappe.db.rollback()
-                    continue
-            
             # Commit transaction once at the end
             frappe.db.commit()
+            apply_total_delivery_changes(existing["Route"], changes)
+            set_route_hierarchy_index(existing)
+
+            # A payload with failed records is imported again on the next run
+            if not failed:
+                feed.mark_processed()
             
             # Log summary
             summary = f"""
 Route import v2 completed:
 - Total rows processed: {len(rows)}
-- New cities created: {new_cities_count}
-- New zones created: {new_zones_count}
-- New areas created: {new_areas_count}
-- New points created: {new_points_count}
-- New routes created: {new_routes_count}
+- New cities created: {created["City"]}
+- New zones created: {created["Zone"]}
+- New areas created: {created["Area"]}
+- New points created: {created["Point"]}
+- New routes created: {created["Route"]}
+- Records failed: {failed}
+- Routes with total delivery updated: {updated_routes_count}
+- Rows touched: {sum(created.values()) + updated_routes_count}
+- Time taken: {time.time() - start_time:.2f} seconds
 - Timestamp: {datetime.now()}
 """
             print(summary)
             
         except Exception as e:
             frappe.db.rollback()
+            clear_route_hierarchy_index()
             error_msg = f"Route import v2 failed during processing: {str(e)}"
             print(error_msg)
             frappe.log_error(title="Route Import v2 Failed", message=error_msg)
@@ -287,6 +120,96 @@ Route import v2 completed:
         frappe.log_error(title="Route Import v2 Failed", message=error_msg)
         raise 
 
+def get_node_values(doctype, row, existing):
+    """Field values of a new node of the given level, None when a parent level is missing"""
+    state_name, branch = CITY_LOCATIONS[row["city"]]
+
+    if doctype == "City":
+        return {
+            "city_name": row["city"],
+            "state_name": state_name,
+            "sf_analytics_id": row["city_id"]
+        }
+
+    parents = {}
+    for parent_doctype, id_field, fieldname in [
+        ("City", "city_id", "city_name"),
+        ("Zone", "zone_id", "zone_name"),
+        ("Area", "area_id", "area_name"),
+        ("Point", "pickup_point_id", "point_name"),
+    ]:
+        if parent_doctype == doctype:
+            break
+        parent = existing[parent_doctype].get(row[id_field])
+        if not parent:
+            return None
+        parents[fieldname] = parent.name
+
+    values = {
+        **parents,
+        "state_name": state_name,
+        "branch": branch
+    }
+
+    if doctype == "Zone":
+        values.update({"zone_name": row["zone"], "sf_analytics_id": row["zone_id"]})
+    elif doctype == "Area":
+        values.update({"area_name": row["area"], "sf_analytics_id": row["area_id"]})
+    elif doctype == "Point":
+        values.update({
+            "point_name": row["pick_up_point"],
+            "point_code": str(row["pickup_point_id"]),
+            "sf_analytics_id": row["pickup_point_id"]
+        })
+    elif doctype == "Route":
+        values.update({
+            "route_name": row["route"],
+            "total_delivery": row["count_of_customers"],
+            "sf_analytics_id": row["route_id"]
+        })
+
+    return values
+
+def insert_new_nodes(doctype, id_field, rows, existing):
+    """Insert the records of one level that are not in the system yet. Returns (inserted, failed)."""
+    inserted = 0
+    failed = 0
+    seen = set()
+
+    for row in rows:
+        sf_analytics_id = row[id_field]
+        if sf_analytics_id in existing[doctype] or sf_analytics_id in seen:
+            continue
+        seen.add(sf_analytics_id)
+
+        values = get_node_values(doctype, row, existing)
+        if not values:
+            print(f"Skipping {doctype} {sf_analytics_id}, parent record is missing")
+            failed += 1
+            continue
+
+        try:
+            doc = frappe.get_doc({"doctype": doctype, **values})
+            doc.insert()
+
+            # Add to map
+            existing[doctype][sf_analytics_id] = frappe._dict(
+                name=doc.name,
+                sf_analytics_id=sf_analytics_id,
+                total_delivery=doc.get("total_delivery")
+            )
+            inserted += 1
+
+        except Exception as e:
+            print(f"Error creating {doctype} for row {row}: {str(e)}")
+            frappe.log_error(
+                title="Route Import v2 - Record Creation Failed",
+                message=f"{doctype} {sf_analytics_id}: {str(e)}\nRow: {row}"
+            )
+            failed += 1
+
+    return inserted, failed
+
 def map_old_entries():
     """
     Function to map old entries with their new sf_analytics_id values.
@@ -304,13 +227,7 @@ def map_old_entries():
             frappe.throw("Analytics API configuration missing in site config")
         
         print("Fetching data from analytics API...")
-        response = requests.get(api_url, params={"api_key": api_key})
-        
-        if response.status_code != 200:
-            frappe.throw(f"API request failed with status code: {response.status_code}")
-        
-        data = response.json()
-        rows = data["query_result"]["data"]["rows"]
+        rows = list(fetch_analytics_feed("routes_v2", api_url, api_key, consumer="map_old_entries").iter_rows())
         print(f"Retrieved {len(rows)} routes from API")
         
         # Create maps for city, zone, area, point, and route
@@ -0,0 +1,181 @@
+# Copyright (c) 2025, Hopnet and Contributors
+# See license.txt
+
+import zlib
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from erpnext.setup.doctype.employee.test_employee import make_employee
+
+from custom_app_api.cron_functions import attendance_cron
+from custom_app_api.custom_api.helper_function import distance_accumulator
+from custom_app_api.custom_api.helper_function.route_tracking_queue import insert_route_tracking_rows
+
+COMPANY = "_Test Company"
+ATTENDANCE_DATE = "2025-06-02"
+ROUTE = "_Test Close Out Route"
+ROUTE_VALUES = {
+	"branch": "_Test Close Out Branch",
+	"zone_name": "_Test Close Out Zone",
+	"area_name": "_Test Close Out Area",
+	"point_name": "_Test Close Out Point",
+}
+
+# Fields the close-out leaves on a submitted attendance
+COMPARED_FIELDS = [
+	"docstatus", "status", "company", "custom_route", "custom_is_mobile_auto_punch_out",
+	"custom_kilometers_travelled", "modified_by"
+]
+
+
+class TestBulkCloseOut(FrappeTestCase):
+	def setUp(self):
+		if not frappe.db.exists("Route", ROUTE):
+			frappe.get_doc({"doctype": "Route", "name": ROUTE, "route_name": ROUTE, **ROUTE_VALUES}).db_insert()
+
+		self.employees = []
+		for idx in range(3):
+			employee = make_employee(f"_test_close_out_{idx}@example.com", company=COMPANY)
+			frappe.db.set_value("Employee", employee, {"status": "Active", "custom_route": ROUTE})
+			frappe.db.delete("Attendance", {"employee": employee, "attendance_date": ATTENDANCE_DATE})
+			self.employees.append(employee)
+
+	def get_employees(self):
+		return frappe.get_all(
+			"Employee",
+			filters={"name": ["in", self.employees]},
+			fields=["name", "employee_name", "company", "department", "custom_route"],
+			order_by="name"
+		)
+
+	def make_draft(self, employee):
+		attendance = frappe.get_doc({
+			"doctype": "Attendance",
+			"employee": employee,
+			"attendance_date": ATTENDANCE_DATE,
+			"status": "Present",
+			"company": COMPANY,
+			"custom_route": ROUTE,
+			"custom_mobile_punch_in_at": f"{ATTENDANCE_DATE} 09:00:00"
+		})
+		attendance.flags.ignore_links = True
+		attendance.insert(ignore_permissions=True)
+		return attendance
+
+	def test_absent_rows_carry_the_route_fields(self):
+		created = attendance_cron.bulk_insert_absent_attendance(self.get_employees(), ATTENDANCE_DATE)
+		self.assertEqual(created, 3)
+
+		rows = frappe.get_all(
+			"Attendance",
+			filters={"employee": ["in", self.employees], "attendance_date": ATTENDANCE_DATE},
+			fields=["docstatus", "status", "custom_branch", "custom_zone", "custom_area", "custom_route_point"]
+		)
+		self.assertEqual(len(rows), 3)
+		for row in rows:
+			self.assertEqual(row.docstatus, 1)
+			self.assertEqual(row.status, "Absent")
+			self.assertEqual(row.custom_branch, ROUTE_VALUES["branch"])
+			self.assertEqual(row.custom_zone, ROUTE_VALUES["zone_name"])
+			self.assertEqual(row.custom_area, ROUTE_VALUES["area_name"])
+			self.assertEqual(row.custom_route_point, ROUTE_VALUES["point_name"])
+
+	def test_employees_with_attendance_or_not_active_are_skipped(self):
+		self.make_draft(self.employees[0])
+		frappe.db.set_value("Employee", self.employees[1], "status", "Inactive")
+
+		created = attendance_cron.bulk_insert_absent_attendance(self.get_employees(), ATTENDANCE_DATE)
+		self.assertEqual(created, 1)
+		self.assertEqual(
+			frappe.get_all("Attendance", filters={"employee": ["in", self.employees], "attendance_date": ATTENDANCE_DATE}, pluck="employee", order_by="employee"),
+			sorted([self.employees[0], self.employees[2]])
+		)
+
+	def test_employees_on_leave_go_through_the_document(self):
+		with patch.object(attendance_cron, "get_employees_on_leave", return_value={self.employees[0]}), \
+			patch.object(attendance_cron, "insert_absent_attendance_documents", return_value=1) as insert_documents:
+			created = attendance_cron.bulk_insert_absent_attendance(self.get_employees(), ATTENDANCE_DATE)
+
+		self.assertEqual([employee.name for employee in insert_documents.call_args.args[0]], [self.employees[0]])
+		self.assertEqual(created, 3)
+		self.assertFalse(frappe.db.exists("Attendance", {"employee": self.employees[0], "attendance_date": ATTENDANCE_DATE}))
+
+	def test_bulk_submitted_draft_matches_submit(self):
+		submitted = self.make_draft(self.employees[0])
+		submitted.custom_kilometers_travelled = 0
+		submitted.custom_mobile_punch_out_at = frappe.utils.now()
+		submitted.custom_is_mobile_auto_punch_out = 1
+		submitted.submit()
+
+		draft = self.make_draft(self.employees[1])
+		drafts = frappe.get_all(
+			"Attendance",
+			filters={"name": draft.name},
+			fields=["name", "employee", "docstatus", "custom_mobile_punch_in_at"]
+		)
+		with patch.object(attendance_cron, "get_draft_distances", return_value={draft.name: 0}):
+			self.assertEqual(attendance_cron.bulk_submit_draft_attendance(drafts), 1)
+			# Already submitted, not counted again
+			self.assertEqual(attendance_cron.bulk_submit_draft_attendance(drafts), 0)
+
+		bulk_submitted = frappe.get_doc("Attendance", draft.name)
+		for field in COMPARED_FIELDS:
+			self.assertEqual(bulk_submitted.get(field), submitted.get(field), field)
+		self.assertTrue(bulk_submitted.custom_mobile_punch_out_at)
+
+		# A bulk submitted attendance can be cancelled like any submitted one
+		bulk_submitted.cancel()
+		self.assertEqual(frappe.db.get_value("Attendance", draft.name, "docstatus"), 2)
+
+	def test_paid_distance_is_measured_on_the_stored_track(self):
+		draft = self.make_draft(self.employees[0])
+		rows = [
+			{
+				"attendance": draft.name,
+				"employee": self.employees[0],
+				"latitude": 17.40 + idx * 1e-3,
+				"longitude": 78.4,
+				"accuracy": 5.0,
+				"recorded_at": frappe.utils.add_to_date(f"{ATTENDANCE_DATE} 09:00:00", seconds=idx * 30)
+			}
+			for idx in range(20)
+		]
+		insert_route_tracking_rows(rows)
+		distance_accumulator.update_distance_accumulator(draft.name, rows)
+
+		# A live total that differs from the stored track is not what gets paid
+		key = frappe.cache.make_key(distance_accumulator.ACCUMULATOR_KEY.format(draft.name))
+		frappe.cache.set(key, frappe.as_json({"km": 99.0, "points": 20, "rejected_streak": 0, "out_of_order": 0}))
+
+		drafts = frappe.get_all("Attendance", filters={"name": draft.name}, fields=["name", "custom_mobile_punch_in_at"])
+		self.assertAlmostEqual(
+			attendance_cron.get_draft_distances(drafts)[draft.name],
+			attendance_cron.calculate_attendance_distance([frappe._dict(row) for row in rows]),
+			places=6
+		)
+
+	def shard_members(self, shard):
+		condition, values = attendance_cron.get_shard_condition(shard, "e.name", "e.branch")
+		values["employees"] = tuple(self.employees)
+		return set(frappe.db.sql_list(f"""
+			SELECT e.name FROM `tabEmployee` e
+			WHERE e.name IN %(employees)s
+			{condition}
+		""", values))
+
+	def test_hash_shards_are_selected_in_sql(self):
+		shards = [{"mode": "hash", "index": index, "count": 3} for index in range(3)]
+		for shard in shards:
+			self.assertEqual(
+				self.shard_members(shard),
+				{employee for employee in self.employees if zlib.crc32(employee.encode()) % 3 == shard["index"]}
+			)
+
+	def test_branch_shards_are_selected_in_sql(self):
+		# Set without link validation, the branch only has to match
+		frappe.db.sql("UPDATE `tabEmployee` SET branch = NULL WHERE name IN %s", (tuple(self.employees),))
+		frappe.db.sql("UPDATE `tabEmployee` SET branch = %s WHERE name = %s", ("_Test Close Out Branch", self.employees[0]))
+
+		self.assertEqual(self.shard_members({"mode": "branch", "branch": "_Test Close Out Branch"}), {self.employees[0]})
+		self.assertEqual(self.shard_members({"mode": "branch", "branch": None}), set(self.employees[1:]))
@@ -1,6 +1,14 @@
+import time
 import frappe
 import requests
 from datetime import datetime
+from custom_app_api.custom_api.helper_function.analytics_feed import fetch_analytics_feed, get_feed_cycle_seconds
+from custom_app_api.custom_api.helper_function.route_sync import (
+    get_route_hierarchy_index,
+    clear_route_hierarchy_index,
+    get_total_delivery_changes,
+    bulk_update_total_delivery
+)
 
 def update_delivery_count_for_routes():
     """
@@ -92,9 +100,12 @@ def update_delivery_count_for_routes_v2():
     """
     Daily cron job to update delivery counts for routes from analytics API using sf_analytics_id.
     This is the updated version that uses the new endpoints and sf_analytics_id for mapping.
+    Current counts are prefetched in one query and only the routes whose count changed are
+    written, with a batched UPDATE in a single transaction.
     Runs at 11 PM each day.
     """
     try:
+        start_time = time.time()
         print(f"Starting delivery count update v2 at {datetime.now()}")
         
         # Fetch data from API using the new endpoints
@@ -105,57 +116,53 @@ def update_delivery_count_for_routes_v2():
             frappe.throw("Analytics API configuration missing in site config")
         
         print("Fetching delivery count data from analytics API v2...")
-        response = requests.get(api_url, params={"api_key": api_key})
-        
-        if response.status_code != 200:
-            frappe.throw(f"API request failed with status code: {response.status_code}")
-        
-        data = response.json()
-        rows = data["query_result"]["data"]["rows"]
+        # Same snapshot as the route import of this cycle, the API is only called when it is stale
+        feed = fetch_analytics_feed(
+            "routes_v2",
+            api_url,
+            api_key,
+            consumer="update_delivery_count_for_routes_v2",
+            max_age=get_feed_cycle_seconds()
+        )
+        if not feed.changed:
+            print("Delivery count feed unchanged since the last update, nothing to do")
+            return
+
+        rows = list(feed.iter_rows())
         print(f"Retrieved {len(rows)} delivery counts from API v2")
 
-        # Get existing routes map using sf_analytics_id
-        existing_routes = {}
-        routes = frappe.get_all("Route", fields=["name", "route_name", "sf_analytics_id"], limit_page_length=None)
-        for route in routes:
-            if route.sf_analytics_id:
-                existing_routes[int(route.sf_analytics_id)] = route.name
-        
+        # Get existing routes and their current counts using sf_analytics_id, the route import owns the cached index
+        existing_routes = get_route_hierarchy_index(store=False)["Route"]
         print(f"Found {len(existing_routes)} existing routes with sf_analytics_id in system")
 
-        # Process each row
-        updated_routes_count = 0
-        skipped_routes_count = 0
-        missing_routes = set()  # To track unique missing routes
-        
-        for row in rows:
-            try:
-                route_id = row["route_id"]
-                
-                if route_id not in existing_routes:
-                    skipped_routes_count += 1
-                    missing_routes.add(f"{row['route']} (ID: {route_id})")
-                    print(f"Route not found with sf_analytics_id: {route_id} ({row['route']})")
-                    continue
-                
-                # Update the route's delivery count
-                route_doc = frappe.get_doc("Route", existing_routes[route_id])
-                route_doc.total_delivery = row["count_of_customers"]
-                route_doc.save()
-                frappe.db.commit()
-                updated_routes_count += 1
+        missing_routes = {
+            f"{row['route']} (ID: {row['route_id']})"
+            for row in rows
+            if row["route_id"] not in existing_routes
+        }
+        skipped_routes_count = len([row for row in rows if row["route_id"] not in existing_routes])
 
-            except Exception as e:
-                print(f"Error processing row {row}: {str(e)}")
-                continue
+        # Only routes whose count changed are written
+        changes = get_total_delivery_changes(rows, existing_routes)
+        try:
+            updated_routes_count = bulk_update_total_delivery(changes)
+            frappe.db.commit()
+            feed.mark_processed()
+            if changes:
+                clear_route_hierarchy_index()
+        except Exception:
+            frappe.db.rollback()
+            raise
 
         # Log summary
         summary = f"""
 Delivery count update v2 completed:
 - Total counts processed: {len(rows)}
 - Routes updated: {updated_routes_count}
+- Routes unchanged: {len(rows) - skipped_routes_count - updated_routes_count}
 - Routes not found (skipped): {skipped_routes_count}
 - Missing Routes: {', '.join(missing_routes)}
+- Time taken: {time.time() - start_time:.2f} seconds
 - Timestamp: {datetime.now()}
 """
         print(summary)
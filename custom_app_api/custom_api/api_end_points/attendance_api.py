@@ -4,6 +4,13 @@ from typing import Dict, Any, Optional, Tuple
 import jwt
 from datetime import datetime
 import math
+from custom_app_api.custom_api.helper_function.token_session_cache import (
+    get_token_session,
+    get_employee_status,
+    get_required_app_version
+)
+from custom_app_api.custom_api.helper_function.distance_accumulator import update_distance_accumulator
+from custom_app_api.custom_api.helper_function.live_attendance_feed import publish_attendance_event
 
 def handle_error_response(error: Exception, error_message: str) -> Dict[str, Any]:
     """Standard error response handler"""
@@ -40,8 +47,8 @@ def verify_dp_token(headers: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
         secret_key = frappe.conf.get('jwt_secret_key')
         decoded_token = jwt.decode(auth_token, secret_key, algorithms=["HS256"])
         
-        # Get token record
-        token_record = frappe.get_doc("DP Mobile Token", decoded_token.get('token_id'))
+        # Get token record (cached, invalidated by DP Mobile Token doc_events)
+        token_record = get_token_session(decoded_token.get('token_id'))
         
         # Check if token exists and is active
         if not token_record or token_record.status != "Active":
@@ -56,8 +63,9 @@ def verify_dp_token(headers: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
         # Check if token has expired
         if datetime.now() > frappe.utils.get_datetime(token_record.expires_at):
             # Update token status to expired
-            token_record.status = "Expired"
-            token_record.save()
+            expired_token = frappe.get_doc("DP Mobile Token", token_record.name)
+            expired_token.status = "Expired"
+            expired_token.save()
             frappe.local.response['http_status_code'] = 401
             return False, {
                 "success": False,
@@ -68,7 +76,7 @@ def verify_dp_token(headers: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
             }
         
         # Check if employee is still active
-        employee_status = frappe.db.get_value("Employee", token_record.employee, "status")
+        employee_status = get_employee_status(token_record.employee)
         if employee_status != "Active":
             frappe.local.response['http_status_code'] = 401
             return False, {
@@ -84,14 +92,13 @@ def verify_dp_token(headers: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
         app_version = token_record.app_version
         
         # Get required app version from Mobile App Config
-        mobile_config = frappe.get_doc("Mobile App Config")
-        required_version_field = f"{app_name}_app_version"
-        required_version = getattr(mobile_config, required_version_field, None)
+        required_version = get_required_app_version(app_name)
         
         if required_version and app_version != required_version:
             # Update token status to expired
-            token_record.status = "Expired"
-            token_record.save()
+            outdated_token = frappe.get_doc("DP Mobile Token", token_record.name)
+            outdated_token.status = "Expired"
+            outdated_token.save()
             frappe.local.response['http_status_code'] = 403
             return False, {
                 "success": False,
@@ -540,6 +547,7 @@ def mobile_punch_in() -> Dict[str, Any]:
         # Update attendance
         attendance_doc = frappe.get_doc("Attendance", attendance.name)
         attendance_doc.db_set('custom_mobile_punch_in_at', punch_in, update_modified=True)
+        publish_attendance_event(attendance_doc.name, "punch_in")
         # # If document is already submitted, cancel it first
         # if attendance_doc.docstatus == 1:
         #     attendance_doc.cancel()
@@ -705,6 +713,7 @@ def mobile_punch_out() -> Dict[str, Any]:
         attendance_doc = frappe.get_doc("Attendance", attendance.name)
 
         attendance_doc.db_set('custom_mobile_punch_out_at', punch_out, update_modified=True)
+        publish_attendance_event(attendance_doc.name, "punch_out")
         
         # # If document is already submitted, cancel it first
         # if attendance_doc.docstatus == 1:
@@ -1021,6 +1030,8 @@ def create_mobile_attendance_dev() -> Dict[str, Any]:
             "recorded_at": frappe.utils.now()
         })
         route_tracking.insert()
+        update_distance_accumulator(attendance.name, [route_tracking.as_dict()])
+        publish_attendance_event(attendance.name, "created")
         
         frappe.db.commit()
         
@@ -9,6 +9,8 @@ from custom_app_api.custom_api.api_end_points.attendance_api import (
     validate_employee_location,
     calculate_distance
 )
+from custom_app_api.custom_api.helper_function.live_attendance_feed import publish_attendance_event
+from custom_app_api.custom_api.helper_function.distance_accumulator import update_distance_accumulator
 
 # Configuration
 BIOMETRIC_SERVER_URL = "http://localhost:8050"
@@ -360,8 +362,14 @@ def verify_face_biometric() -> Dict[str, Any]:
                         "recorded_at": frappe.utils.now()
                     })
                     route_tracking.insert(ignore_permissions=True)
+                    update_distance_accumulator(attendance.name, [route_tracking.as_dict()])
                     logger.info(f"Created route tracking record: {route_tracking.name}")
 
+                publish_attendance_event(
+                    existing_attendance or attendance.name,
+                    "face_verified"
+                )
+
                 # Prepare success response
                 response_data = {
                     "verification_id": log_entry.name,
@@ -1,6 +1,7 @@
 import frappe
 from frappe import _
 from .attendance_api import verify_dp_token, handle_error_response
+from custom_app_api.custom_api.helper_function.token_session_cache import invalidate_token_session
 
 @frappe.whitelist(allow_guest=True)
 def logout():
@@ -24,6 +25,7 @@ def logout():
         frappe.db.delete("DP Mobile Token", {
             "name": name
         })
+        invalidate_token_session(name)
         frappe.db.commit()
 
         return {
@@ -4,6 +4,7 @@ from datetime import datetime, timedelta
 import random
 import requests  # For TextLocal API
 import jwt
+from custom_app_api.custom_api.helper_function.token_session_cache import invalidate_token_session
 import urllib.request
 import urllib.parse
 import json
@@ -244,6 +245,7 @@ def verify_otp(phone_number, otp_code, app_name = 'sf_partner' , app_version = '
                     "status": "Expired",
                     "expires_at": current_ist_time
                 })
+                invalidate_token_session(token.name)
 
             # 2. Create new token record with IST timing
             token_doc = frappe.get_doc({
@@ -373,6 +375,7 @@ def verify_otp(phone_number, otp_code, app_name = 'sf_partner' , app_version = '
                 "status": "Expired",
                 "expires_at": current_ist_time
             })
+            invalidate_token_session(token.name)
 
         # 2. Create new token record with IST timing
         token_doc = frappe.get_doc({
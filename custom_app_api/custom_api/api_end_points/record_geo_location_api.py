@@ -1,7 +1,37 @@
 import frappe
+import hashlib
+import json
+import numpy as np
 from frappe import _
-from typing import Dict, Any
+from typing import Dict, Any, List
+from werkzeug.wrappers import Response
 from .attendance_api import verify_dp_token, handle_error_response
+from custom_app_api.custom_api.helper_function.route_tracking_queue import (
+    insert_route_tracking_rows,
+    is_write_behind_enabled,
+    claim_dedup_window,
+    enqueue_route_tracking_row
+)
+from custom_app_api.custom_api.helper_function.distance_accumulator import (
+    update_distance_accumulator,
+    get_accumulated_distance
+)
+from custom_app_api.custom_api.helper_function.location_dedup import get_batch_time_span, split_duplicate_points
+from custom_app_api.custom_api.helper_function.route_tracking_archive import get_route_tracking_points
+from custom_app_api.custom_api.helper_function.track_codec import encode_polyline
+from custom_app_api.custom_api.helper_function.clean_track import douglas_peucker
+from custom_app_api.custom_api.helper_function.calculate_distance import calculate_total_distance
+
+# Points of the same attendance closer than this are treated as duplicates
+LOCATION_DEDUP_WINDOW_SECONDS = 10
+
+# Upper limit of points accepted in one record_location_batch call
+MAX_POINTS_PER_BATCH = 1000
+
+# Track of a closed attendance never changes, browsers and the server keep it this long
+CLOSED_TRACK_CACHE_SECONDS = 24 * 3600
+TRACK_POLYLINE_CACHE_KEY = "route_tracking_polyline:{}"
+
 
 @frappe.whitelist(allow_guest=True, methods=["POST"])
 def record_location() -> Dict[str, Any]:
@@ -151,6 +181,47 @@ def record_location() -> Dict[str, Any]:
                     "http_status_code": 400
                 }
             
+            if is_write_behind_enabled():
+                # Write-behind: dedup in Redis and queue the row, a background job inserts it
+                name = frappe.generate_hash(length=10)
+                recorded_at = data.get("recorded_at") or frappe.utils.now_datetime()
+                row = {
+                    "name": name,
+                    "attendance": attendance_name,
+                    "employee": employee,
+                    "latitude": float(data["latitude"]),
+                    "longitude": float(data["longitude"]),
+                    "accuracy": float(data["accuracy"]),
+                    "recorded_at": recorded_at
+                }
+
+                # Same 9 second window as the SQL check below
+                last_recording = claim_dedup_window(attendance_name, name, 9)
+                if last_recording:
+                    frappe.local.response['http_status_code'] = 200
+                    return {
+                        "success": True,
+                        "status": "success",
+                        "message": "Location already recorded within last 10 seconds",
+                        "data": {
+                            "name": last_recording
+                        }
+                    }
+
+                enqueue_route_tracking_row(row)
+                update_distance_accumulator(attendance_name, [row])
+
+                frappe.local.response['http_status_code'] = 201
+                return {
+                    "success": True,
+                    "status": "success",
+                    "message": "Location recorded successfully",
+                    "data": {
+                        "name": name,
+                        "recorded_at": recorded_at
+                    }
+                }
+
             # Check for recent recordings
             current_time = frappe.utils.now_datetime()
             check_time = frappe.utils.add_to_date(current_time, seconds=-9)
@@ -192,6 +263,7 @@ def record_location() -> Dict[str, Any]:
             
             route_tracking.insert()
             print(f"Route tracking entry created: {route_tracking.name}")
+            update_distance_accumulator(attendance_name, [route_tracking.as_dict()])
             
             frappe.local.response['http_status_code'] = 201
             return {
@@ -241,6 +313,223 @@ def record_location() -> Dict[str, Any]:
         return handle_error_response(e, "Error recording location")
 
 
+@frappe.whitelist(allow_guest=True, methods=["POST"])
+def record_location_batch() -> Dict[str, Any]:
+    """
+    Record a batch of buffered employee locations in one call
+    Request body:
+    {
+        "points": [
+            {
+                "latitude": float,
+                "longitude": float,
+                "accuracy": float,
+                "recorded_at": "YYYY-MM-DD HH:MM:SS"
+            },
+            ...
+        ]
+    }
+    Points are acknowledged individually, in request order, with status
+    "recorded", "duplicate" (within 10 seconds of an already recorded point),
+    "after_punch_out" or "invalid".
+    """
+    try:
+        is_valid, result = verify_dp_token(frappe.request.headers)
+        if not is_valid:
+            frappe.local.response['http_status_code'] = 401
+            return {
+                "success": False,
+                "status": "error",
+                "message": "Location recording stopped - You have already punched out for today",
+                "code": "STOP_LOCATION_RECORDING",
+                "code_token": "INVALID_TOKEN",
+                "http_status_code": 401
+            }
+
+        employee = result["employee"]
+
+        data = frappe.request.json
+        points = data.get("points") if isinstance(data, dict) else data
+        if not points or not isinstance(points, list):
+            frappe.local.response['http_status_code'] = 400
+            return {
+                "success": False,
+                "status": "error",
+                "message": "Points are required",
+                "code": "REQUEST_BODY_REQUIRED",
+                "http_status_code": 400
+            }
+
+        if len(points) > MAX_POINTS_PER_BATCH:
+            frappe.local.response['http_status_code'] = 400
+            return {
+                "success": False,
+                "status": "error",
+                "message": f"A maximum of {MAX_POINTS_PER_BATCH} points can be recorded per request",
+                "code": "TOO_MANY_POINTS",
+                "http_status_code": 400
+            }
+
+        # Resolve today's attendance once for the whole batch
+        attendance = frappe.get_value("Attendance",
+            {
+                "employee": employee,
+                "attendance_date": frappe.utils.today(),
+                "docstatus": ["in", [0, 1]],
+                "status": "Present"
+            }, ["name", "custom_mobile_punch_out_at"])
+
+        if not attendance:
+            frappe.local.response['http_status_code'] = 400
+            return {
+                "success": False,
+                "status": "error",
+                "message": "No approved attendance found for today",
+                "code": "NO_APPROVED_ATTENDANCE_FOUND_FOR_TODAY",
+                "http_status_code": 400
+            }
+
+        attendance_name, punch_out_time = attendance
+        punch_out_time = frappe.utils.get_datetime(punch_out_time) if punch_out_time else None
+
+        acknowledgements = [None] * len(points)
+        valid_points = []
+
+        for idx, point in enumerate(points):
+            try:
+                if not isinstance(point, dict):
+                    raise ValueError("Point must be an object")
+                missing_fields = [field for field in ["latitude", "longitude", "accuracy", "recorded_at"] if point.get(field) in (None, "")]
+                if missing_fields:
+                    raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
+
+                valid_points.append((idx, {
+                    "attendance": attendance_name,
+                    "employee": employee,
+                    "latitude": float(point["latitude"]),
+                    "longitude": float(point["longitude"]),
+                    "accuracy": float(point["accuracy"]),
+                    "recorded_at": frappe.utils.get_datetime(point["recorded_at"])
+                }))
+            except Exception as e:
+                acknowledgements[idx] = {"index": idx, "status": "invalid", "message": str(e)}
+
+        candidates = []
+        for idx, row in valid_points:
+            if punch_out_time and row["recorded_at"] > punch_out_time:
+                acknowledgements[idx] = {"index": idx, "status": "after_punch_out"}
+            else:
+                candidates.append((idx, row))
+
+        # Stored points around the batch, a retried batch may overlap points stored by the first attempt
+        stored_times = []
+        if candidates:
+            span_start, span_end = get_batch_time_span((row for _, row in candidates), LOCATION_DEDUP_WINDOW_SECONDS)
+            stored_times = frappe.db.sql_list("""
+                SELECT recorded_at
+                FROM `tabRoute Tracking`
+                WHERE attendance = %s
+                AND recorded_at BETWEEN %s AND %s
+            """, (attendance_name, span_start, span_end))
+
+        accepted, duplicates = split_duplicate_points(candidates, stored_times, LOCATION_DEDUP_WINDOW_SECONDS)
+        for idx in duplicates:
+            acknowledgements[idx] = {"index": idx, "status": "duplicate"}
+
+        row_indexes = [idx for idx, _ in accepted]
+        rows_to_insert = [row for _, row in accepted]
+
+        names = insert_route_tracking_rows(rows_to_insert)
+        update_distance_accumulator(attendance_name, rows_to_insert)
+
+        for idx, name, row in zip(row_indexes, names, rows_to_insert):
+            acknowledgements[idx] = {
+                "index": idx,
+                "status": "recorded",
+                "name": name,
+                "recorded_at": row["recorded_at"]
+            }
+
+        response = {
+            "success": True,
+            "status": "success",
+            "message": f"{len(names)} of {len(points)} locations recorded",
+            "data": {
+                "attendance": attendance_name,
+                "recorded": len(names),
+                "points": acknowledgements
+            }
+        }
+
+        # Let the app know it should stop sending points
+        if punch_out_time:
+            response["code"] = "STOP_LOCATION_RECORDING"
+
+        frappe.local.response['http_status_code'] = 201 if names else 200
+        return response
+
+    except Exception as e:
+        frappe.log_error(
+            title="Batch Location Recording Error",
+            message=f"""
+            Unexpected error details:
+            Error: {str(e)}
+            Traceback: {frappe.get_traceback()}
+            """
+        )
+        frappe.local.response['http_status_code'] = 500
+        return handle_error_response(e, "Error recording locations")
+
+
+@frappe.whitelist(allow_guest=True, methods=["GET"])
+def get_live_distance() -> Dict[str, Any]:
+    """
+    Kilometers travelled so far in today's attendance, from the running distance kept on ingestion
+    """
+    try:
+        is_valid, result = verify_dp_token(frappe.request.headers)
+        if not is_valid:
+            frappe.local.response['http_status_code'] = result.get("http_status_code", 401)
+            return result
+
+        employee = result["employee"]
+
+        attendance_name = frappe.get_value("Attendance",
+            {
+                "employee": employee,
+                "attendance_date": frappe.utils.today(),
+                "docstatus": ["in", [0, 1]],
+                "status": "Present"
+            }, "name")
+
+        if not attendance_name:
+            frappe.local.response['http_status_code'] = 404
+            return {
+                "success": False,
+                "status": "error",
+                "message": "No attendance found for today",
+                "code": "NO_ATTENDANCE_FOUND",
+                "http_status_code": 404
+            }
+
+        distance = get_accumulated_distance(attendance_name) or {}
+
+        return {
+            "success": True,
+            "status": "success",
+            "message": "Live distance fetched successfully",
+            "data": {
+                "attendance": attendance_name,
+                "kilometers_travelled": round(distance.get("km", 0.0), 3),
+                "points": distance.get("points", 0)
+            },
+            "http_status_code": 200
+        }
+
+    except Exception as e:
+        return handle_error_response(e, "Error fetching live distance")
+
+
 @frappe.whitelist()
 def get_unique_route_tracking(attendance):
 
@@ -248,11 +537,90 @@ def get_unique_route_tracking(attendance):
     # ROUND(longitude, 4) as longitude,
     # recorded_at
 
-    return frappe.db.sql("""
-        SELECT 
-            latitude,
-            longitude
+    # Archived attendances are read from Route Tracking Archive
+    return [
+        {"latitude": point.latitude, "longitude": point.longitude}
+        for point in get_route_tracking_points(attendance)
+    ]
+
+def get_simplify_tolerance_m(latitudes, tolerance_m=None, zoom=None) -> float:
+    """
+    Douglas-Peucker tolerance in meters: tolerance_m when given, otherwise the size of one
+    pixel at the given web map zoom level, 0 (no simplification) when neither is given.
+    """
+    if tolerance_m is not None and tolerance_m != "":
+        return max(frappe.utils.flt(tolerance_m), 0.0)
+
+    if zoom is None or zoom == "" or not len(latitudes):
+        return 0.0
+
+    meters_per_pixel = 156543.03392 * np.cos(np.radians(np.mean(latitudes))) / 2 ** frappe.utils.cint(zoom)
+    return float(meters_per_pixel)
+
+
+def build_track_polyline(attendance: str, tolerance_m=None, zoom=None) -> Dict[str, Any]:
+    points = get_route_tracking_points(attendance)
+    latitudes = np.array([point.latitude for point in points], dtype=np.float64)
+    longitudes = np.array([point.longitude for point in points], dtype=np.float64)
+
+    tolerance = get_simplify_tolerance_m(latitudes, tolerance_m, zoom)
+    keep = douglas_peucker(latitudes, longitudes, tolerance) if tolerance else np.arange(latitudes.size)
+
+    return {
+        "attendance": attendance,
+        "polyline": encode_polyline(latitudes[keep], longitudes[keep]),
+        "precision": 5,
+        "points": int(latitudes.size),
+        "encoded_points": int(len(keep)),
+        "tolerance_m": round(tolerance, 2),
+        # Measured on the full track, as the map used to
+        "distance_km": round(calculate_total_distance(np.c_[latitudes, longitudes]), 3)
+    }
+
+
+@frappe.whitelist(methods=["GET"])
+def get_route_tracking_polyline(attendance, tolerance_m=None, zoom=None):
+    """
+    Track of an attendance as a Google encoded polyline, optionally simplified server side to
+    tolerance_m meters or to one pixel at the given map zoom.
+
+    Tracks of closed attendances (submitted or cancelled) are served with an ETag: a browser that
+    already has the track gets a 304, and the encoded track is cached in Redis for other users.
+    Points still arrive after the auto submit, so the ETag covers the live Route Tracking rows and
+    the browser only keeps the track without asking again once all of them are archived.
+    """
+    attendance_info = frappe.db.get_value("Attendance", attendance, ["docstatus", "modified"], as_dict=1)
+    if not attendance_info:
+        frappe.throw(_("Attendance {0} not found").format(attendance), frappe.DoesNotExistError)
+
+    frappe.has_permission("Attendance", doc=attendance, throw=True)
+
+    if attendance_info.docstatus == 0:
+        # Still recording, never cached
+        return build_track_polyline(attendance, tolerance_m, zoom)
+
+    archive_modified = frappe.db.get_value("Route Tracking Archive", attendance, "modified")
+    live_points, last_recorded_at = frappe.db.sql("""
+        SELECT COUNT(*), MAX(recorded_at)
         FROM `tabRoute Tracking`
         WHERE attendance = %s
-        ORDER BY recorded_at asc
-    """, attendance, as_dict=1)
\ No newline at end of file
+    """, (attendance,))[0]
+    etag = '"{}"'.format(hashlib.md5(
+        f"{attendance}|{attendance_info.modified}|{archive_modified}|{live_points}|{last_recorded_at}|{tolerance_m}|{zoom}".encode()
+    ).hexdigest())
+    headers = {
+        "ETag": etag,
+        # A track with live rows can still grow, the browser revalidates it with the ETag
+        "Cache-Control": "private, no-cache" if live_points else f"private, max-age={CLOSED_TRACK_CACHE_SECONDS}"
+    }
+
+    if frappe.request and etag in (frappe.request.headers.get("If-None-Match") or ""):
+        return Response(status=304, headers=headers)
+
+    cache_key = frappe.cache.make_key(TRACK_POLYLINE_CACHE_KEY.format(etag.strip('"')))
+    body = frappe.cache.get(cache_key)
+    if not body:
+        body = json.dumps({"message": build_track_polyline(attendance, tolerance_m, zoom)}, separators=(",", ":"))
+        frappe.cache.set(cache_key, body, ex=CLOSED_TRACK_CACHE_SECONDS)
+
+    return Response(body, status=200, mimetype="application/json", headers=headers)
@@ -0,0 +1,111 @@
+# Copyright (c) 2025, Hopnet and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from erpnext.setup.doctype.employee.test_employee import make_employee
+
+from custom_app_api.custom_api.helper_function import attendance_rollup
+from custom_app_api.custom_api.report.route_wise_attendance import route_wise_attendance
+
+COMPANY = "_Test Company"
+OTHER_COMPANY = "_Test Company 1"
+ATTENDANCE_DATE = "2025-01-15"
+
+
+class TestAttendanceDailyRollup(FrappeTestCase):
+	def setUp(self):
+		frappe.cache.delete_value(attendance_rollup.DIRTY_DATES_KEY)
+
+		# (current route and zone, route the attendance was marked on, status)
+		self.employees = {}
+		for idx, (route, zone, marked_route, status) in enumerate([
+			("_Test Rollup Route 1", "_Test Rollup Zone 1", "_Test Rollup Old Route", "Present"),
+			("_Test Rollup Route 1", "_Test Rollup Zone 1", "_Test Rollup Route 1", "Absent"),
+			("_Test Rollup Route 2", "_Test Rollup Zone 1", "_Test Rollup Route 2", "Work From Home"),
+			("_Test Rollup Route 2", "_Test Rollup Zone 2", "_Test Rollup Route 1", "Present"),
+		]):
+			employee = make_employee(f"_test_rollup_{idx}@example.com", company=COMPANY)
+			frappe.db.set_value("Employee", employee, {"custom_route": route, "custom_zone": zone, "status": "Active"})
+			self.make_attendance(employee, status, custom_route=marked_route)
+			self.employees[idx] = employee
+
+		# Attendance of an employee who left is not counted by the report
+		frappe.db.set_value("Employee", self.employees[3], "status", "Left")
+
+	def make_attendance(self, employee, status, **values):
+		frappe.db.delete("Attendance", {"employee": employee, "attendance_date": ATTENDANCE_DATE})
+		attendance = frappe.get_doc({
+			"doctype": "Attendance",
+			"employee": employee,
+			"attendance_date": ATTENDANCE_DATE,
+			"status": status,
+			"company": COMPANY,
+			**values
+		})
+		attendance.insert(ignore_permissions=True)
+		attendance.submit()
+		return attendance
+
+	def get_report_data(self, group_by, use_rollup):
+		filters = frappe._dict(group_by=group_by, date_range="Daily", specific_date=ATTENDANCE_DATE, companies=[COMPANY])
+		with patch.object(route_wise_attendance, "is_rollup_read_enabled", return_value=use_rollup):
+			return route_wise_attendance.get_location_wise_attendance(filters)
+
+	def test_rollup_matches_the_live_report(self):
+		attendance_rollup.refresh_attendance_rollup(ATTENDANCE_DATE)
+
+		for group_by in ("Route", "Zone"):
+			live = self.get_report_data(group_by, use_rollup=False)
+			self.assertTrue(live)
+			self.assertEqual(self.get_report_data(group_by, use_rollup=True), live)
+
+		counts = attendance_rollup.get_rollup_counts("route", ATTENDANCE_DATE, ATTENDANCE_DATE, [COMPANY])
+		self.assertEqual(counts["_Test Rollup Route 1"], {"Present": 1, "Absent": 1})
+		self.assertEqual(counts["_Test Rollup Route 2"], {"Work From Home": 1})
+		self.assertNotIn("_Test Rollup Old Route", counts)
+
+	def dirty_dates(self):
+		dirty = frappe.cache.smembers(attendance_rollup.DIRTY_DATES_KEY)
+		return {date.decode() if isinstance(date, bytes) else date for date in dirty}
+
+	def test_cross_company_attendance_matches_the_live_report(self):
+		# Attendance marked in another company is not counted by the live report of COMPANY
+		frappe.db.set_value("Attendance", {"employee": self.employees[0], "attendance_date": ATTENDANCE_DATE}, "company", OTHER_COMPANY)
+		attendance_rollup.refresh_attendance_rollup(ATTENDANCE_DATE)
+
+		live = self.get_report_data("Route", use_rollup=False)
+		self.assertEqual(self.get_report_data("Route", use_rollup=True), live)
+
+		counts = attendance_rollup.get_rollup_counts(
+			"route", ATTENDANCE_DATE, ATTENDANCE_DATE, [COMPANY], attendance_companies=[COMPANY]
+		)
+		self.assertEqual(counts["_Test Rollup Route 1"], {"Absent": 1})
+
+	def test_employee_change_marks_their_recent_dates_dirty(self):
+		recent_date = frappe.utils.add_days(frappe.utils.nowdate(), -1)
+		frappe.db.delete("Attendance", {"employee": self.employees[0], "attendance_date": recent_date})
+		attendance = frappe.get_doc({
+			"doctype": "Attendance",
+			"employee": self.employees[0],
+			"attendance_date": recent_date,
+			"status": "Present",
+			"company": COMPANY
+		})
+		attendance.insert(ignore_permissions=True)
+		attendance.submit()
+		frappe.cache.delete_value(attendance_rollup.DIRTY_DATES_KEY)
+
+		attendance_rollup.mark_employee_attendance_dirty(self.employees[0])
+		self.assertIn(str(frappe.utils.getdate(recent_date)), self.dirty_dates())
+		# Older than the window, left to rebuild_attendance_rollup
+		self.assertNotIn(ATTENDANCE_DATE, self.dirty_dates())
+
+	def test_failed_refresh_keeps_the_date_dirty(self):
+		attendance_rollup.mark_attendance_dates_dirty([ATTENDANCE_DATE])
+		with patch.object(attendance_rollup, "refresh_attendance_rollup", side_effect=Exception("refresh failed")):
+			self.assertEqual(attendance_rollup.refresh_dirty_attendance_rollups(), 0)
+
+		self.assertIn(ATTENDANCE_DATE, self.dirty_dates())
@@ -0,0 +1,14 @@
+# Copyright (c) 2025, Hopnet and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class EmployeeHierarchy(Document):
+	pass
+
+
+def on_doctype_update():
+	# Permission conditions probe (ancestor, descendant), one index lookup per row
+	frappe.db.add_unique("Employee Hierarchy", ["ancestor", "descendant"], constraint_name="ancestor_descendant")
@@ -0,0 +1,92 @@
+# Copyright (c) 2025, Hopnet and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from erpnext.setup.doctype.employee.test_employee import make_employee
+
+from custom_app_api.custom_api.helper_function.employee_hierarchy import (
+	HIERARCHY_DOCTYPE,
+	move_employee,
+	rebuild_employee_hierarchy,
+	remove_employee,
+)
+
+
+class TestEmployeeHierarchy(FrappeTestCase):
+	def setUp(self):
+		# ceo -> manager -> lead -> (agent_1, agent_2), ceo -> other_manager
+		self.employees = {
+			key: make_employee(f"_test_hierarchy_{key}@example.com", company="_Test Company")
+			for key in ("ceo", "manager", "lead", "agent_1", "agent_2", "other_manager")
+		}
+		for key in self.employees:
+			self.set_reports_to(key, None)
+
+		self.set_reports_to("manager", "ceo")
+		self.set_reports_to("lead", "manager")
+		self.set_reports_to("agent_1", "lead")
+		self.set_reports_to("agent_2", "lead")
+		self.set_reports_to("other_manager", "ceo")
+
+	def set_reports_to(self, key, manager_key):
+		"""Change reports_to and maintain the closure table as the Employee hook does"""
+		manager = self.employees[manager_key] if manager_key else None
+		frappe.db.set_value("Employee", self.employees[key], "reports_to", manager)
+		move_employee(self.employees[key], manager)
+
+	def closure(self):
+		"""{(ancestor key, descendant key): depth} of the test employees"""
+		keys = {name: key for key, name in self.employees.items()}
+		rows = frappe.get_all(
+			HIERARCHY_DOCTYPE,
+			filters={"descendant": ["in", list(keys)]},
+			fields=["ancestor", "descendant", "depth"]
+		)
+		return {(keys[row.ancestor], keys[row.descendant]): row.depth for row in rows if row.ancestor in keys}
+
+	def subordinates(self, key):
+		return {descendant for (ancestor, descendant) in self.closure() if ancestor == key and descendant != key}
+
+	def test_initial_tree(self):
+		closure = self.closure()
+		self.assertEqual(self.subordinates("ceo"), {"manager", "lead", "agent_1", "agent_2", "other_manager"})
+		self.assertEqual(self.subordinates("lead"), {"agent_1", "agent_2"})
+		self.assertEqual(closure[("ceo", "agent_1")], 3)
+		self.assertEqual(closure[("agent_1", "agent_1")], 0)
+
+	def test_move_subtree(self):
+		self.set_reports_to("lead", "other_manager")
+
+		closure = self.closure()
+		self.assertEqual(self.subordinates("manager"), set())
+		self.assertEqual(self.subordinates("other_manager"), {"lead", "agent_1", "agent_2"})
+		self.assertEqual(self.subordinates("lead"), {"agent_1", "agent_2"})
+		self.assertEqual(closure[("ceo", "agent_2")], 3)
+		self.assertEqual(closure[("other_manager", "agent_2")], 2)
+
+	def test_make_root(self):
+		self.set_reports_to("lead", None)
+
+		self.assertEqual(self.subordinates("ceo"), {"manager", "other_manager"})
+		self.assertEqual(self.subordinates("manager"), set())
+		self.assertEqual(self.subordinates("lead"), {"agent_1", "agent_2"})
+		self.assertNotIn(("ceo", "lead"), self.closure())
+
+	def test_remove_employee(self):
+		remove_employee(self.employees["lead"])
+
+		closure = self.closure()
+		self.assertFalse([pair for pair in closure if "lead" in pair])
+		self.assertEqual(self.subordinates("manager"), set())
+		self.assertEqual(self.subordinates("agent_1"), set())
+		self.assertIn(("agent_1", "agent_1"), closure)
+
+	def test_rebuild_matches_incremental_moves(self):
+		self.set_reports_to("lead", "other_manager")
+		self.set_reports_to("agent_2", "manager")
+		self.set_reports_to("other_manager", None)
+		incremental = self.closure()
+
+		rebuild_employee_hierarchy()
+		self.assertEqual(self.closure(), incremental)
@@ -0,0 +1,103 @@
+"""
+Bulk creation of system generated Additional Salary entries (route payout, extra km, packet bonus).
+
+The payout crons used to insert every Additional Salary as a document with validation and workflow
+bypassed, then force docstatus and workflow_state with frappe.db.set_value and reload it. The
+entries created here end up in the same state with a few statements: rows are built from
+frappe.new_doc (so docfield defaults apply), the names are reserved from the naming series in one
+statement (see naming_series) and everything is written with frappe.db.bulk_insert, already submitted.
+
+Idempotency stays with the callers: get_existing_additional_salaries returns the (employee,
+payroll_date) pairs already paid for a component, in one query.
+"""
+
+import frappe
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from custom_app_api.custom_api.helper_function.naming_series import reserve_series_names
+
+DOCTYPE = "Additional Salary"
+CHUNK_SIZE = 1000
+
+
+def get_existing_additional_salaries(
+    salary_component: str,
+    from_date: Any,
+    to_date: Optional[Any] = None,
+    employees: Optional[Iterable[str]] = None
+) -> Set[Tuple[str, str]]:
+    """(employee, payroll_date as YYYY-MM-DD) of the submitted entries of a component in a date range"""
+    filters = {
+        "salary_component": salary_component,
+        "payroll_date": ["between", [from_date, to_date or from_date]],
+        "docstatus": 1
+    }
+    if employees is not None:
+        employees = list(employees)
+        if not employees:
+            return set()
+        filters["employee"] = ["in", employees]
+
+    existing = frappe.get_all(DOCTYPE, filters=filters, fields=["employee", "payroll_date"], limit_page_length=None)
+    return {(row.employee, str(row.payroll_date)) for row in existing}
+
+
+def bulk_insert_additional_salaries(entries: List[Dict[str, Any]], workflow_state: str = "Submitted") -> List[str]:
+    """
+    Insert submitted Additional Salary entries in bulk. Validation, hooks and the workflow are not run,
+    as for the entries previously created with the ignore_* flags. The caller commits.
+
+    Args:
+        entries: Field values of every entry (employee, salary_component, amount, payroll_date, company, ...).
+        workflow_state: Workflow state the entries are created in.
+
+    Returns:
+        Names of the inserted entries.
+    """
+    if not entries:
+        return []
+
+    now = frappe.utils.now()
+    user = frappe.session.user
+    component_types = {}
+    company_currencies = {}
+    docs = []
+
+    for entry in entries:
+        component = entry["salary_component"]
+        if component not in component_types:
+            component_types[component] = frappe.db.get_value("Salary Component", component, "type")
+        company = entry.get("company")
+        if company not in company_currencies:
+            company_currencies[company] = frappe.db.get_value("Company", company, "default_currency") if company else None
+
+        doc = frappe.new_doc(DOCTYPE)
+        doc.update({
+            "type": component_types[component],
+            "currency": company_currencies[company],
+            **entry,
+            "docstatus": 1,
+            "workflow_state": workflow_state,
+            "owner": user,
+            "modified_by": user,
+            "creation": now,
+            "modified": now
+        })
+        docs.append(doc)
+
+    naming_series = docs[0].naming_series or frappe.get_meta(DOCTYPE).get_field("naming_series").options.split("\n")[0]
+    names = reserve_series_names(naming_series, len(docs))
+
+    rows = []
+    for doc, name in zip(docs, names):
+        doc.name = name
+        doc.naming_series = naming_series
+        rows.append(doc.get_valid_dict(convert_dates_to_str=True, ignore_nulls=True))
+
+    fields = sorted({field for row in rows for field in row})
+    frappe.db.bulk_insert(
+        DOCTYPE,
+        fields,
+        [[row.get(field) for field in fields] for row in rows],
+        chunk_size=CHUNK_SIZE
+    )
+    return names
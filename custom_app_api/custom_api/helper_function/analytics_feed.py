@@ -0,0 +1,227 @@
+"""
+Shared client for the analytics API feeds (routes, delivery counts, packet bonus).
+
+- One pooled requests.Session per worker process, with connect / read timeouts and retries with
+  backoff on connection errors and 429 / 5xx responses.
+- The payload is streamed to an on-disk snapshot (sites/<site>/private/analytics_feeds/<feed>.json)
+  and rows are read back from it incrementally with ijson when it is installed.
+- One snapshot per cycle: jobs reading the same feed pass max_age and reuse a snapshot fetched less
+  than that many seconds ago instead of calling the API again (`analytics_feed_cycle_seconds`).
+  Fetches of a feed hold a file lock, so jobs starting together (the route import and the delivery
+  count sync at 01:00) fetch once: the second one waits and reuses the snapshot the first wrote.
+- Conditional fetch: the ETag of the snapshot is sent as If-None-Match. Every consumer keeps the
+  sha256 of the last payload it processed, an identical payload is reported as unchanged so the
+  consumer can skip the run. The state is only recorded by mark_processed(), a failed run is retried.
+- Replay: with `analytics_feed_replay` set in site_config.json no request is made and the last
+  snapshot is used, so jobs can be replayed and tested offline against a local file.
+
+Timeouts can be tuned with `analytics_api_connect_timeout` and `analytics_api_read_timeout`.
+"""
+
+import os
+import json
+import hashlib
+import frappe
+import requests
+from frappe.utils.synchronization import filelock
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Any, Dict, Iterator, Optional
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 120
+DEFAULT_CYCLE_SECONDS = 1800
+RETRIES = 3
+BACKOFF_FACTOR = 2
+CHUNK_SIZE = 64 * 1024
+
+# Longest wait for another job fetching the same feed, retries included
+FETCH_LOCK_TIMEOUT = 900
+
+ROWS_PREFIX = "query_result.data.rows.item"
+
+_session: Optional[requests.Session] = None
+
+
+def get_session() -> requests.Session:
+    global _session
+    if _session is None:
+        retry = Retry(
+            total=RETRIES,
+            backoff_factor=BACKOFF_FACTOR,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET"]
+        )
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(max_retries=retry, pool_maxsize=4))
+        session.mount("http://", HTTPAdapter(max_retries=retry, pool_maxsize=4))
+        _session = session
+    return _session
+
+
+def _timeout() -> tuple:
+    return (
+        frappe.utils.cint(frappe.conf.get("analytics_api_connect_timeout")) or DEFAULT_CONNECT_TIMEOUT,
+        frappe.utils.cint(frappe.conf.get("analytics_api_read_timeout")) or DEFAULT_READ_TIMEOUT
+    )
+
+
+def get_feed_cycle_seconds() -> int:
+    """Jobs of one cycle share the snapshot of a feed, defaults to the 30 minute route import interval"""
+    return frappe.utils.cint(frappe.conf.get("analytics_feed_cycle_seconds")) or DEFAULT_CYCLE_SECONDS
+
+
+def _read_json(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+
+def get_snapshot_path(feed: str) -> str:
+    directory = frappe.get_site_path("private", "analytics_feeds")
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"{feed}.json")
+
+
+class AnalyticsFeedSnapshot:
+    """Payload of one fetch of a feed, stored on disk, as seen by one consumer"""
+
+    def __init__(self, feed: str, path: Optional[str] = None, consumer: Optional[str] = None):
+        self.feed = feed
+        self.path = path or get_snapshot_path(feed)
+        self.fetch_path = f"{self.path}.fetch"
+        self.meta_path = f"{self.path}.{consumer}.meta" if consumer else f"{self.path}.meta"
+        self.etag = None
+        self.content_hash = None
+        self.changed = True
+
+    def read_meta(self) -> Dict[str, Any]:
+        """Processed state of the consumer"""
+        return _read_json(self.meta_path)
+
+    def read_fetch_state(self) -> Dict[str, Any]:
+        """ETag, hash and time of the fetch that produced the snapshot"""
+        return _read_json(self.fetch_path)
+
+    def iter_rows(self) -> Iterator[Dict[str, Any]]:
+        """Rows of query_result.data.rows, streamed from the snapshot"""
+        with open(self.path, "rb") as f:
+            if ijson:
+                yield from ijson.items(f, ROWS_PREFIX, use_float=True)
+            else:
+                yield from json.load(f)["query_result"]["data"]["rows"]
+
+    def mark_processed(self) -> None:
+        """Record the payload as processed by the consumer, the same payload is then reported unchanged"""
+        _write_json(self.meta_path, {
+            "etag": self.etag,
+            "content_hash": self.content_hash,
+            "processed_at": frappe.utils.now()
+        })
+
+
+def fetch_analytics_feed(
+    feed: str,
+    api_url: str,
+    api_key: str,
+    params: Optional[Dict[str, Any]] = None,
+    consumer: Optional[str] = None,
+    max_age: Optional[int] = None
+) -> AnalyticsFeedSnapshot:
+    """
+    Fetch a feed into its snapshot.
+
+    Args:
+        feed: Name of the snapshot, jobs reading the same endpoint share it.
+        api_url, api_key: Analytics API endpoint.
+        params: Extra query parameters.
+        consumer: Name of the job, each consumer keeps its own processed state.
+        max_age: Reuse a snapshot fetched less than max_age seconds ago without calling the API.
+
+    Returns:
+        AnalyticsFeedSnapshot, with changed=False when the payload equals the last one processed by the consumer.
+    """
+    snapshot = AnalyticsFeedSnapshot(feed, consumer=consumer)
+
+    if frappe.utils.cint(frappe.conf.get("analytics_feed_replay")):
+        if not os.path.exists(snapshot.path):
+            frappe.throw(f"No snapshot to replay for analytics feed {feed}")
+        print(f"Replaying analytics feed {feed} from {snapshot.path}")
+        return snapshot
+
+    with filelock(f"analytics_feed_{feed}", timeout=FETCH_LOCK_TIMEOUT):
+        return _fetch(snapshot, api_url, api_key, params, max_age)
+
+
+def _fetch(
+    snapshot: AnalyticsFeedSnapshot,
+    api_url: str,
+    api_key: str,
+    params: Optional[Dict[str, Any]],
+    max_age: Optional[int]
+) -> AnalyticsFeedSnapshot:
+    """Fetch under the feed lock, the state is read after the lock so a fetch by the previous holder is seen"""
+    feed = snapshot.feed
+    meta = snapshot.read_meta()
+    fetch_state = snapshot.read_fetch_state() if os.path.exists(snapshot.path) else {}
+
+    fetched_at = fetch_state.get("fetched_at")
+    if max_age and fetched_at and frappe.utils.time_diff_in_seconds(frappe.utils.now(), fetched_at) < max_age:
+        print(f"Using analytics feed {feed} fetched at {fetched_at}")
+        return _set_payload(snapshot, fetch_state, meta)
+
+    headers = {}
+    if fetch_state.get("etag"):
+        headers["If-None-Match"] = fetch_state["etag"]
+
+    temp_path = f"{snapshot.path}.{os.getpid()}.tmp"
+    digest = hashlib.sha256()
+
+    with get_session().get(
+        api_url,
+        params={"api_key": api_key, **(params or {})},
+        headers=headers,
+        timeout=_timeout(),
+        stream=True
+    ) as response:
+        if response.status_code == 304:
+            fetch_state["fetched_at"] = frappe.utils.now()
+            _write_json(snapshot.fetch_path, fetch_state)
+            return _set_payload(snapshot, fetch_state, meta)
+
+        if response.status_code != 200:
+            frappe.throw(f"API request failed with status code: {response.status_code}")
+
+        with open(temp_path, "wb") as f:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                digest.update(chunk)
+                f.write(chunk)
+
+        etag = response.headers.get("ETag")
+
+    os.replace(temp_path, snapshot.path)
+    fetch_state = {
+        "etag": etag,
+        "content_hash": digest.hexdigest(),
+        "fetched_at": frappe.utils.now()
+    }
+    _write_json(snapshot.fetch_path, fetch_state)
+    return _set_payload(snapshot, fetch_state, meta)
+
+
+def _set_payload(snapshot: AnalyticsFeedSnapshot, fetch_state: Dict[str, Any], meta: Dict[str, Any]) -> AnalyticsFeedSnapshot:
+    snapshot.etag = fetch_state.get("etag")
+    snapshot.content_hash = fetch_state.get("content_hash")
+    snapshot.changed = snapshot.content_hash != meta.get("content_hash")
+    return snapshot
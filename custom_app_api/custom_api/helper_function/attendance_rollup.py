@@ -0,0 +1,230 @@
+"""
+Materialized daily attendance rollup.
+
+`tabAttendance Daily Rollup` holds one row per (date, company, attendance company, branch, zone,
+area, point, route, designation, status) with the number of submitted attendances, so the attendance
+reports can read counts for a month or a quarter without recounting Attendance against Employee.
+
+The rollup counts what the live report queries count: attendance of Active employees, grouped by
+the current company, location and designation of the employee, not by the values stored on the
+attendance when it was marked. The company of the attendance is kept as well, for the reports that
+also filter on it (get_rollup_counts attendance_companies).
+
+Maintenance is per date: Attendance submit / cancel / update after submit hooks and the bulk
+close-out add the date to a Redis set, and so does a change of status, company, location or
+designation of an employee, for the dates of the employee in the last `attendance_rollup_employee_days`
+days (default EMPLOYEE_DIRTY_DAYS). Older dates keep the employee values of their last refresh
+until rebuild_attendance_rollup runs over them.
+refresh_dirty_attendance_rollups recomputes every dirty date with one INSERT ... SELECT ... GROUP BY.
+A refresh always rebuilds the whole date, so it is idempotent and does not drift. A date whose
+refresh fails goes back to the set. A scheduler job runs every minute as a backstop, and
+rebuild_attendance_rollup (also `bench rebuild-attendance-rollup`) backfills a date range.
+"""
+
+import time
+import frappe
+from typing import Any, Dict, Iterable, List, Optional
+
+ROLLUP_DOCTYPE = "Attendance Daily Rollup"
+DIRTY_DATES_KEY = "attendance_rollup_dirty_dates"
+REFRESH_JOB_ID = "attendance_rollup_refresh"
+REFRESH_METHOD = "custom_app_api.custom_api.helper_function.attendance_rollup.refresh_dirty_attendance_rollups"
+
+# Dates popped from the dirty set per round trip
+DIRTY_DATES_BATCH = 50
+
+# Rollup dimension: column of the Employee (e), as grouped by the live report queries
+DIMENSIONS = {
+    "branch": "e.branch",
+    "zone": "e.custom_zone",
+    "area": "e.custom_area",
+    "point": "e.custom_point",
+    "route": "e.custom_route",
+    "designation": "e.designation",
+}
+
+# Days back an employee change re-queues the employee's attendance dates, a quarter by default
+EMPLOYEE_DIRTY_DAYS = 92
+
+# Employee fields the rollup rows of the employee's dates depend on
+EMPLOYEE_ROLLUP_FIELDS = ["status", "company", "branch", "custom_zone", "custom_area", "custom_point", "custom_route", "designation"]
+
+
+def is_rollup_read_enabled() -> bool:
+    """Reports read counts from the rollup when `attendance_reports_use_rollup` is set in site_config.json"""
+    return bool(frappe.utils.cint(frappe.conf.get("attendance_reports_use_rollup")))
+
+
+def mark_attendance_dates_dirty(dates: Iterable[Any]) -> None:
+    """Queue the rollup refresh of the given attendance dates, after the current transaction commits"""
+    dates = {str(frappe.utils.getdate(date)) for date in dates if date}
+    if not dates:
+        return
+
+    pipe = frappe.cache.pipeline()
+    pipe.sadd(frappe.cache.make_key(DIRTY_DATES_KEY), *dates)
+    pipe.execute()
+
+    frappe.enqueue(
+        REFRESH_METHOD,
+        queue="short",
+        job_id=REFRESH_JOB_ID,
+        deduplicate=True,
+        enqueue_after_commit=True
+    )
+
+
+def mark_employee_attendance_dirty(employee: str) -> None:
+    """Queue the rollup refresh of the recent dates the employee has submitted attendance on"""
+    days = frappe.utils.cint(frappe.conf.get("attendance_rollup_employee_days")) or EMPLOYEE_DIRTY_DAYS
+    mark_attendance_dates_dirty(frappe.db.sql_list("""
+        SELECT DISTINCT attendance_date
+        FROM `tabAttendance`
+        WHERE employee = %(employee)s
+        AND attendance_date >= %(from_date)s
+        AND docstatus = 1
+    """, {"employee": employee, "from_date": frappe.utils.add_days(frappe.utils.nowdate(), -days)}))
+
+
+def refresh_attendance_rollup(attendance_date: Any) -> int:
+    """Recompute the rollup rows of one date. Returns the number of rows written. The caller commits."""
+    attendance_date = frappe.utils.getdate(attendance_date)
+    dimensions = ",\n                ".join(f"{expression} AS `{name}`" for name, expression in DIMENSIONS.items())
+    key = ", ".join(f"IFNULL({name}, '')" for name in DIMENSIONS)
+
+    frappe.db.sql(f"DELETE FROM `tab{ROLLUP_DOCTYPE}` WHERE attendance_date = %s", attendance_date)
+    frappe.db.sql(f"""
+        INSERT INTO `tab{ROLLUP_DOCTYPE}` (
+            name, creation, modified, modified_by, owner, docstatus, idx,
+            attendance_date, company, attendance_company, {", ".join(DIMENSIONS)}, status, attendance_count
+        )
+        SELECT
+            MD5(CONCAT_WS('|', attendance_date, IFNULL(company, ''), IFNULL(attendance_company, ''), {key}, status)),
+            NOW(6), NOW(6), %(user)s, %(user)s, 0, 0,
+            attendance_date, company, attendance_company, {", ".join(DIMENSIONS)}, status, COUNT(*)
+        FROM (
+            SELECT
+                a.attendance_date,
+                e.company,
+                a.company AS attendance_company,
+                {dimensions},
+                a.status
+            FROM `tabAttendance` a
+            INNER JOIN `tabEmployee` e ON e.name = a.employee
+            WHERE a.attendance_date = %(attendance_date)s
+            AND a.docstatus = 1
+            AND e.status = 'Active'
+        ) marked
+        GROUP BY attendance_date, company, attendance_company, {", ".join(DIMENSIONS)}, status
+    """, {"attendance_date": attendance_date, "user": frappe.session.user})
+
+    return frappe.db.count(ROLLUP_DOCTYPE, {"attendance_date": attendance_date})
+
+
+def refresh_dirty_attendance_rollups() -> int:
+    """
+    Drain the dirty dates set, committing after every date. Dates that fail are added back once the
+    set is drained, for the next run. Returns the number of dates refreshed.
+    """
+    key = frappe.cache.make_key(DIRTY_DATES_KEY)
+    refreshed = 0
+    failed = []
+
+    while True:
+        pipe = frappe.cache.pipeline()
+        pipe.spop(key, DIRTY_DATES_BATCH)
+        dates = pipe.execute()[0]
+        if not dates:
+            break
+
+        for date in dates:
+            date = date.decode() if isinstance(date, bytes) else date
+            try:
+                refresh_attendance_rollup(date)
+                frappe.db.commit()
+                refreshed += 1
+            except Exception as e:
+                frappe.db.rollback()
+                failed.append(date)
+                frappe.log_error(
+                    message=f"Error refreshing attendance rollup for {date}: {str(e)}\n{frappe.get_traceback()}",
+                    title="Attendance Rollup Refresh Error"
+                )
+
+    if failed:
+        pipe = frappe.cache.pipeline()
+        pipe.sadd(key, *failed)
+        pipe.execute()
+
+    return refreshed
+
+
+def rebuild_attendance_rollup(from_date: Optional[str] = None, to_date: Optional[str] = None) -> int:
+    """
+    Backfill the rollup for every date from from_date to to_date (defaults: first attendance, today).
+    Returns the number of dates rebuilt.
+    """
+    start_time = time.time()
+    if not from_date:
+        from_date = frappe.db.sql("SELECT MIN(attendance_date) FROM `tabAttendance` WHERE docstatus = 1")[0][0]
+        if not from_date:
+            return 0
+
+    from_date = frappe.utils.getdate(from_date)
+    to_date = frappe.utils.getdate(to_date or frappe.utils.nowdate())
+    days = frappe.utils.date_diff(to_date, from_date) + 1
+
+    for offset in range(days):
+        refresh_attendance_rollup(frappe.utils.add_days(from_date, offset))
+        frappe.db.commit()
+
+    print(f"Rebuilt attendance rollup for {max(days, 0)} days ({from_date} to {to_date}) in {time.time() - start_time:.2f} seconds")
+    return max(days, 0)
+
+
+def get_rollup_counts(
+    group_by: str,
+    from_date: Any,
+    to_date: Any,
+    companies: Optional[List[str]] = None,
+    values: Optional[List[str]] = None,
+    attendance_companies: Optional[List[str]] = None
+) -> Dict[str, Dict[str, int]]:
+    """
+    Attendance counts from the rollup per value of a dimension and status, {value: {status: count}}.
+
+    Args:
+        group_by: One of DIMENSIONS.
+        from_date, to_date: Inclusive date range.
+        companies: Restrict to employees of these companies.
+        values: Restrict to these values of the dimension.
+        attendance_companies: Restrict to attendance marked in these companies.
+    """
+    if group_by not in DIMENSIONS:
+        frappe.throw(frappe._("Attendance rollup cannot be grouped by {0}").format(group_by))
+
+    conditions = ["attendance_date BETWEEN %(from_date)s AND %(to_date)s"]
+    if companies:
+        conditions.append("company IN %(companies)s")
+    if values:
+        conditions.append(f"`{group_by}` IN %(values)s")
+    if attendance_companies:
+        conditions.append("attendance_company IN %(attendance_companies)s")
+
+    rows = frappe.db.sql(f"""
+        SELECT `{group_by}` AS value, status, SUM(attendance_count) AS count
+        FROM `tab{ROLLUP_DOCTYPE}`
+        WHERE {" AND ".join(conditions)}
+        GROUP BY `{group_by}`, status
+    """, {
+        "from_date": from_date,
+        "to_date": to_date,
+        "companies": tuple(companies or []),
+        "values": tuple(values or []),
+        "attendance_companies": tuple(attendance_companies or [])
+    }, as_dict=1)
+
+    counts = {}
+    for row in rows:
+        counts.setdefault(row.value, {})[row.status] = frappe.utils.cint(row.count)
+    return counts
@@ -0,0 +1,197 @@
+import numpy as np
+
+from custom_app_api.custom_api.helper_function.calculate_distance import (
+    EARTH_RADIUS_KM,
+    haversine_segment_distances,
+)
+
+# Defaults, overridable per call (attendance_cron reads them from site_config.json)
+DEFAULT_MAX_ACCURACY_M = 50.0
+DEFAULT_STATIONARY_RADIUS_M = 20.0
+DEFAULT_STATIONARY_WINDOW = 3
+DEFAULT_MAX_SPEED_KMPH = 120.0
+DEFAULT_SIMPLIFY_TOLERANCE_M = 0.0
+
+# Spikes are removed in a few vectorized passes, a teleport hidden behind another one shows up on the next pass
+TELEPORT_PASSES = 3
+
+
+def clean_track(
+    latitudes,
+    longitudes,
+    accuracies=None,
+    recorded_at=None,
+    max_accuracy_m=DEFAULT_MAX_ACCURACY_M,
+    stationary_radius_m=DEFAULT_STATIONARY_RADIUS_M,
+    stationary_window=DEFAULT_STATIONARY_WINDOW,
+    max_speed_kmph=DEFAULT_MAX_SPEED_KMPH,
+    simplify_tolerance_m=DEFAULT_SIMPLIFY_TOLERANCE_M,
+):
+    """
+    Clean a GPS track before measuring it.
+
+    Steps, each vectorized over the whole track:
+        1. drop fixes whose accuracy is worse than max_accuracy_m
+        2. drop teleports, points reached and left at more than max_speed_kmph
+        3. collapse stationary clusters (jitter) to their first point
+        4. optionally simplify the remaining track with Douglas-Peucker
+
+    Args:
+        latitudes, longitudes (array-like): Track points in degrees, ordered by recorded_at.
+        accuracies (array-like): Reported accuracy of each fix in meters, skipped if None.
+        recorded_at (array-like): Datetimes (or epoch seconds) of each fix, teleport check is skipped if None.
+        max_accuracy_m (float): Accuracy threshold, falsy to disable.
+        stationary_radius_m (float): Net movement below which a point is stationary, falsy to disable.
+        stationary_window (int): Number of fixes the net movement is measured over.
+        max_speed_kmph (float): Speed above which a spike is a teleport, falsy to disable.
+        simplify_tolerance_m (float): Douglas-Peucker tolerance, falsy to disable.
+
+    Returns:
+        numpy.ndarray: Indexes of the points kept, in track order.
+    """
+    lat = np.asarray(latitudes, dtype=np.float64)
+    lon = np.asarray(longitudes, dtype=np.float64)
+    keep = np.arange(lat.size)
+
+    if keep.size and accuracies is not None and max_accuracy_m:
+        accuracy = np.asarray(accuracies, dtype=np.float64)
+        keep = keep[~(accuracy[keep] > max_accuracy_m)]
+
+    if keep.size > 2 and recorded_at is not None and max_speed_kmph:
+        keep = _drop_teleports(lat, lon, _to_epoch_seconds(recorded_at), keep, max_speed_kmph)
+
+    if keep.size > 2 and stationary_radius_m:
+        keep = _collapse_stationary(lat, lon, keep, stationary_radius_m, stationary_window)
+
+    if keep.size > 2 and simplify_tolerance_m:
+        keep = keep[douglas_peucker(lat[keep], lon[keep], simplify_tolerance_m)]
+
+    return keep
+
+
+def clean_track_distance(latitudes, longitudes, accuracies=None, recorded_at=None, **settings):
+    """
+    Distance in kilometers of a track after clean_track.
+
+    Returns:
+        float: The total distance in kilometers.
+    """
+    lat = np.asarray(latitudes, dtype=np.float64)
+    lon = np.asarray(longitudes, dtype=np.float64)
+    keep = clean_track(lat, lon, accuracies, recorded_at, **settings)
+    return float(haversine_segment_distances(lat[keep], lon[keep]).sum())
+
+
+def _to_epoch_seconds(recorded_at):
+    values = np.asarray(recorded_at)
+    if np.issubdtype(values.dtype, np.number):
+        return values.astype(np.float64)
+    return values.astype("datetime64[ms]").astype(np.int64) / 1000.0
+
+
+def _drop_teleports(lat, lon, seconds, keep, max_speed_kmph):
+    for _ in range(TELEPORT_PASSES):
+        if keep.size < 3:
+            break
+
+        distance_km = haversine_segment_distances(lat[keep], lon[keep])
+        # Fixes with the same timestamp are given one second so the speed stays finite
+        hours = np.maximum(np.diff(seconds[keep]), 1.0) / 3600.0
+        too_fast = distance_km / hours > max_speed_kmph
+
+        # A point is a teleport when it is reached too fast and left too fast
+        spike = np.zeros(keep.size, dtype=bool)
+        spike[1:-1] = too_fast[:-1] & too_fast[1:]
+        # The first and last fixes have a single segment. The first fix (a cold start) is dropped when
+        # it is left too fast but the next segment is fine, otherwise the second fix is the spike
+        spike[0] = too_fast[0] & ~too_fast[1]
+        spike[-1] = too_fast[-1]
+
+        if not spike.any():
+            break
+        keep = keep[~spike]
+
+    return keep
+
+
+def _collapse_stationary(lat, lon, keep, radius_m, window):
+    window = max(int(window or 1), 1)
+    if keep.size <= window:
+        return keep
+
+    k_lat = lat[keep]
+    k_lon = lon[keep]
+
+    # Net displacement between each point and the point `window` fixes later
+    net_m = _pairwise_distance_m(k_lat[:-window], k_lon[:-window], k_lat[window:], k_lon[window:])
+
+    stationary = np.zeros(keep.size, dtype=bool)
+    small = net_m < radius_m
+    # Every point inside a window with a small net displacement belongs to the cluster
+    for offset in range(window + 1):
+        stationary[offset:offset + small.size] |= small
+
+    # Keep the first point of each stationary run, and every moving point
+    run_start = stationary & ~np.concatenate(([False], stationary[:-1]))
+    kept = ~stationary | run_start
+    kept[0] = kept[-1] = True
+
+    return keep[kept]
+
+
+def _pairwise_distance_m(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    a = np.clip(a, 0.0, 1.0)
+    return 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a)) * EARTH_RADIUS_KM * 1000
+
+
+def douglas_peucker(latitudes, longitudes, tolerance_m):
+    """
+    Douglas-Peucker simplification on a local equirectangular projection.
+
+    The recursion is replaced by an explicit stack and each split scans its segment
+    with one vectorized distance computation.
+
+    Returns:
+        numpy.ndarray: Indexes of the points kept.
+    """
+    lat = np.asarray(latitudes, dtype=np.float64)
+    lon = np.asarray(longitudes, dtype=np.float64)
+    n = lat.size
+    if n < 3:
+        return np.arange(n)
+
+    # Project to meters around the track's mean latitude
+    meters_per_degree = np.pi / 180.0 * EARTH_RADIUS_KM * 1000
+    x = lon * meters_per_degree * np.cos(np.radians(lat.mean()))
+    y = lat * meters_per_degree
+
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+
+        dx = x[end] - x[start]
+        dy = y[end] - y[start]
+        px = x[start + 1:end] - x[start]
+        py = y[start + 1:end] - y[start]
+        length = np.hypot(dx, dy)
+
+        if length == 0:
+            distances = np.hypot(px, py)
+        else:
+            distances = np.abs(dx * py - dy * px) / length
+
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance_m:
+            index = start + 1 + farthest
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+
+    return np.flatnonzero(keep)
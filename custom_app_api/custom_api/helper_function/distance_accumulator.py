@@ -0,0 +1,178 @@
+"""
+Running distance per attendance, updated as Route Tracking points are ingested.
+
+The state (last kept fix, cumulative km, point count) lives in Redis as one small JSON value per
+attendance, so the mobile app can show live kilometers during the shift without re-reading the track.
+
+Points go through a streaming filter in the spirit of clean_track: low accuracy fixes are ignored,
+a fix reached faster than the speed limit is treated as a teleport, and movement inside the
+stationary radius does not move the anchor, so jitter adds nothing. It cannot look ahead like
+clean_track does, so the total is an estimate that can differ from clean_track_distance by a few
+percent. The paid kilometers are always measured on the stored track by the close-out.
+
+If a point arrives older than the last kept fix (offline phones flushing late), the running total
+is flagged as out of order and readers fall back to measuring the stored track. Updates of one
+attendance are serialized with a Redis lock; an update that fails (lock not acquired, Redis or
+payload error) flags the total as failed, which readers treat the same way. Readers that know the
+number of stored points also ignore a total that did not see all of them.
+"""
+
+import json
+import frappe
+from typing import Any, Dict, Iterable, Optional
+
+from custom_app_api.custom_api.helper_function.calculate_distance import haversine_distance
+from custom_app_api.custom_api.helper_function.clean_track import (
+    DEFAULT_MAX_ACCURACY_M,
+    DEFAULT_STATIONARY_RADIUS_M,
+    DEFAULT_MAX_SPEED_KMPH,
+    DEFAULT_SIMPLIFY_TOLERANCE_M,
+)
+
+ACCUMULATOR_KEY = "route_tracking_distance:{}"
+ACCUMULATOR_LOCK_KEY = "route_tracking_distance_lock:{}"
+ACCUMULATOR_TTL_SECONDS = 3 * 24 * 3600
+
+# Lock held while a batch of fixes is applied, and how long an update waits for it
+LOCK_TIMEOUT_SECONDS = 10
+LOCK_WAIT_SECONDS = 5
+
+# After this many teleports in a row the anchor itself is assumed to be the bad fix
+MAX_CONSECUTIVE_REJECTS = 5
+
+
+def get_track_cleaning_settings() -> Dict[str, float]:
+    """Track cleaning thresholds, overridable from site_config.json"""
+    return {
+        "max_accuracy_m": frappe.utils.flt(frappe.conf.get("track_max_accuracy_m", DEFAULT_MAX_ACCURACY_M)),
+        "stationary_radius_m": frappe.utils.flt(frappe.conf.get("track_stationary_radius_m", DEFAULT_STATIONARY_RADIUS_M)),
+        "max_speed_kmph": frappe.utils.flt(frappe.conf.get("track_max_speed_kmph", DEFAULT_MAX_SPEED_KMPH)),
+        "simplify_tolerance_m": frappe.utils.flt(frappe.conf.get("track_simplify_tolerance_m", DEFAULT_SIMPLIFY_TOLERANCE_M))
+    }
+
+
+def accumulate_fix(
+    state: Optional[Dict[str, Any]],
+    latitude: float,
+    longitude: float,
+    accuracy: Optional[float],
+    recorded_at: float,
+    max_accuracy_m: float = DEFAULT_MAX_ACCURACY_M,
+    stationary_radius_m: float = DEFAULT_STATIONARY_RADIUS_M,
+    max_speed_kmph: float = DEFAULT_MAX_SPEED_KMPH,
+    **kwargs
+) -> Dict[str, Any]:
+    """
+    Apply one fix (recorded_at in epoch seconds) to the running state and return it.
+    """
+    state = state or {"km": 0.0, "points": 0, "rejected_streak": 0, "out_of_order": 0}
+    state["points"] += 1
+
+    if max_accuracy_m and accuracy is not None and accuracy > max_accuracy_m:
+        return state
+
+    if state.get("latitude") is None:
+        state.update({"latitude": latitude, "longitude": longitude, "recorded_at": recorded_at})
+        return state
+
+    if recorded_at < state["recorded_at"]:
+        state["out_of_order"] = 1
+        return state
+
+    distance_km = haversine_distance(state["latitude"], state["longitude"], latitude, longitude)
+    hours = max(recorded_at - state["recorded_at"], 1.0) / 3600.0
+
+    if max_speed_kmph and distance_km / hours > max_speed_kmph:
+        state["rejected_streak"] += 1
+        if state["rejected_streak"] >= MAX_CONSECUTIVE_REJECTS:
+            # Re-anchor on the new position without counting the jump
+            state.update({
+                "latitude": latitude,
+                "longitude": longitude,
+                "recorded_at": recorded_at,
+                "rejected_streak": 0
+            })
+        return state
+
+    state["rejected_streak"] = 0
+
+    if stationary_radius_m and distance_km * 1000 < stationary_radius_m:
+        # The anchor stays put, but speed is measured from the latest accepted fix
+        state["recorded_at"] = recorded_at
+        return state
+
+    state["km"] += distance_km
+    state.update({"latitude": latitude, "longitude": longitude, "recorded_at": recorded_at})
+    return state
+
+
+def update_distance_accumulator(attendance: str, fixes: Iterable[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Apply Route Tracking fixes (latitude, longitude, accuracy, recorded_at), in recorded_at order,
+    to the running distance of an attendance. Errors are logged and never raised to the caller:
+    the total is flagged as failed and readers fall back to the stored track.
+    """
+    key = frappe.cache.make_key(ACCUMULATOR_KEY.format(attendance))
+    try:
+        settings = get_track_cleaning_settings()
+
+        with frappe.cache.lock(
+            frappe.cache.make_key(ACCUMULATOR_LOCK_KEY.format(attendance)),
+            timeout=LOCK_TIMEOUT_SECONDS,
+            blocking_timeout=LOCK_WAIT_SECONDS
+        ):
+            cached = frappe.cache.get(key)
+            state = json.loads(cached) if cached else None
+            if state and state.get("failed"):
+                return state
+
+            for fix in fixes:
+                state = accumulate_fix(
+                    state,
+                    float(fix["latitude"]),
+                    float(fix["longitude"]),
+                    frappe.utils.flt(fix.get("accuracy")) if fix.get("accuracy") is not None else None,
+                    frappe.utils.get_datetime(fix["recorded_at"]).timestamp(),
+                    **settings
+                )
+
+            if state:
+                frappe.cache.set(key, json.dumps(state), ex=ACCUMULATOR_TTL_SECONDS)
+            return state
+
+    except Exception as e:
+        _flag_failed(key)
+        frappe.log_error(
+            title="Distance Accumulator Error",
+            message=f"Attendance: {attendance}\nError: {str(e)}\nTraceback: {frappe.get_traceback()}"
+        )
+        return None
+
+
+def _flag_failed(key: str) -> None:
+    """Mark the running total as unreliable, it then stays failed until it expires"""
+    try:
+        frappe.cache.set(key, json.dumps({"failed": 1}), ex=ACCUMULATOR_TTL_SECONDS)
+    except Exception:
+        pass
+
+
+def get_accumulated_distance(attendance: str, stored_points: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Return {"km", "points"} for an attendance, or None when there is no reliable running total
+    (never tracked, expired, points arrived out of order, an update failed, or the total did not
+    see all of the stored_points Route Tracking rows when their number is given).
+    """
+    cached = frappe.cache.get(frappe.cache.make_key(ACCUMULATOR_KEY.format(attendance)))
+    if not cached:
+        return None
+
+    state = json.loads(cached)
+    if state.get("out_of_order") or state.get("failed"):
+        return None
+
+    if stored_points is not None and state["points"] != stored_points:
+        return None
+
+    return {"km": state["km"], "points": state["points"]}
+
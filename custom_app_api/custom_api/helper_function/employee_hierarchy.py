@@ -0,0 +1,115 @@
+"""
+Reporting hierarchy closure table.
+
+`tabEmployee Hierarchy` holds one row per (ancestor, descendant) pair of the reports_to tree with the
+distance between them, including a depth 0 row for every employee. "Is X under Y" becomes a lookup
+on the unique (ancestor, descendant) index, so the Employee and Attendance permission conditions are
+a constant-size EXISTS instead of a recursive CTE and an IN list of every subordinate.
+
+The table is maintained from the Employee on_update / on_trash hooks: when reports_to changes, the
+employee's subtree is detached from its old ancestors and attached below the new manager with two
+statements. Renames are followed by Frappe since both columns are Links to Employee.
+rebuild_employee_hierarchy (also `bench rebuild-employee-hierarchy` and a post model sync patch)
+rebuilds the whole table from reports_to.
+"""
+
+import time
+import frappe
+from typing import Optional
+
+HIERARCHY_DOCTYPE = "Employee Hierarchy"
+
+# Guard against reports_to loops in the rebuild
+MAX_DEPTH = 50
+
+INSERT_COLUMNS = "name, creation, modified, modified_by, owner, docstatus, idx, ancestor, descendant, depth"
+
+
+def _ensure_self_row(employee: str) -> None:
+    frappe.db.sql(f"""
+        INSERT IGNORE INTO `tab{HIERARCHY_DOCTYPE}` ({INSERT_COLUMNS})
+        VALUES (MD5(CONCAT_WS('|', %(employee)s, %(employee)s)), NOW(6), NOW(6), %(user)s, %(user)s, 0, 0,
+            %(employee)s, %(employee)s, 0)
+    """, {"employee": employee, "user": frappe.session.user})
+
+
+def move_employee(employee: str, reports_to: Optional[str]) -> None:
+    """Place the subtree of an employee below reports_to (None: make it a root). The caller commits."""
+    _ensure_self_row(employee)
+
+    # Detach the subtree from every ancestor outside of it
+    frappe.db.sql(f"""
+        DELETE link
+        FROM `tab{HIERARCHY_DOCTYPE}` link
+        JOIN `tab{HIERARCHY_DOCTYPE}` subtree
+            ON subtree.descendant = link.descendant AND subtree.ancestor = %(employee)s
+        LEFT JOIN `tab{HIERARCHY_DOCTYPE}` inside
+            ON inside.descendant = link.ancestor AND inside.ancestor = %(employee)s
+        WHERE inside.name IS NULL
+    """, {"employee": employee})
+
+    if not reports_to:
+        return
+
+    _ensure_self_row(reports_to)
+
+    # Every ancestor of the new manager (the manager included) x every node of the subtree
+    frappe.db.sql(f"""
+        INSERT IGNORE INTO `tab{HIERARCHY_DOCTYPE}` ({INSERT_COLUMNS})
+        SELECT
+            MD5(CONCAT_WS('|', up.ancestor, down.descendant)), NOW(6), NOW(6), %(user)s, %(user)s, 0, 0,
+            up.ancestor, down.descendant, up.depth + down.depth + 1
+        FROM `tab{HIERARCHY_DOCTYPE}` up
+        JOIN `tab{HIERARCHY_DOCTYPE}` down ON down.ancestor = %(employee)s
+        WHERE up.descendant = %(reports_to)s
+    """, {"employee": employee, "reports_to": reports_to, "user": frappe.session.user})
+
+
+def remove_employee(employee: str) -> None:
+    """Drop every pair of a deleted employee, its reports become roots of their own subtrees"""
+    move_employee(employee, None)
+    frappe.db.sql(f"""
+        DELETE FROM `tab{HIERARCHY_DOCTYPE}` WHERE ancestor = %(employee)s OR descendant = %(employee)s
+    """, {"employee": employee})
+
+
+def rebuild_employee_hierarchy() -> int:
+    """Rebuild the closure table from reports_to. Returns the number of pairs."""
+    start_time = time.time()
+
+    frappe.db.sql(f"DELETE FROM `tab{HIERARCHY_DOCTYPE}`")
+    frappe.db.sql(f"""
+        INSERT INTO `tab{HIERARCHY_DOCTYPE}` ({INSERT_COLUMNS})
+        SELECT
+            MD5(CONCAT_WS('|', tree.ancestor, tree.descendant)), NOW(6), NOW(6), %(user)s, %(user)s, 0, 0,
+            tree.ancestor, tree.descendant, MIN(tree.depth)
+        FROM (
+            WITH RECURSIVE closure AS (
+                SELECT name AS ancestor, name AS descendant, 0 AS depth
+                FROM `tabEmployee`
+
+                UNION ALL
+
+                SELECT closure.ancestor, e.name, closure.depth + 1
+                FROM `tabEmployee` e
+                INNER JOIN closure ON e.reports_to = closure.descendant
+                WHERE closure.depth < %(max_depth)s
+            )
+            SELECT ancestor, descendant, depth FROM closure
+        ) tree
+        GROUP BY tree.ancestor, tree.descendant
+    """, {"user": frappe.session.user, "max_depth": MAX_DEPTH})
+    frappe.db.commit()
+
+    pairs = frappe.db.count(HIERARCHY_DOCTYPE)
+    print(f"Rebuilt employee hierarchy with {pairs} pairs in {time.time() - start_time:.2f} seconds")
+    return pairs
+
+
+def get_subordinate_condition(employee: str, column: str) -> str:
+    """SQL condition: column is the employee or one of their direct or indirect reports"""
+    return f"""exists (
+        select 1 from `tab{HIERARCHY_DOCTYPE}` hierarchy
+        where hierarchy.ancestor = {frappe.db.escape(employee)}
+        and hierarchy.descendant = {column}
+    )"""
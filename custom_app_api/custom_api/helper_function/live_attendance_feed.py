@@ -0,0 +1,142 @@
+"""
+Push-based live attendance feed.
+
+Attendance changes from the mobile app (attendance created, face verified, punch in, punch out)
+are published with frappe.publish_realtime as `live_attendance_update` events, so the live board
+can apply them as deltas instead of re-running the report.
+
+Events are scoped to document rooms of the employee's Point, Zone and Branch. A client joins a
+room with frappe.realtime.doc_subscribe(doctype, name), which socketio only allows when the user
+can read that document, so managers only receive the points, zones and branches they can see.
+
+Events are coalesced: publish_attendance_event stores the latest event of each employee in a Redis
+hash and enqueues one deduplicated flush job, which publishes every pending event as one batch per
+room. A burst of punch-ins therefore becomes a few messages, and an employee who changes twice
+before the flush is sent once.
+
+Set `live_attendance_feed` to 0 in site_config.json to disable the feed.
+"""
+
+import json
+import frappe
+from typing import Any, Dict, List, Optional
+
+FEED_EVENT = "live_attendance_update"
+PENDING_EVENTS_KEY = "live_attendance_feed_pending"
+FLUSH_JOB_ID = "live_attendance_feed_flush"
+FLUSH_METHOD = "custom_app_api.custom_api.helper_function.live_attendance_feed.flush_attendance_events"
+
+# Room doctype: field of the event holding the document name
+SCOPES = {
+    "Point": "point",
+    "Zone": "zone",
+    "Branch": "branch",
+}
+
+DOC_STATUS = {0: "Draft", 1: "Submitted", 2: "Cancelled"}
+
+
+def is_feed_enabled() -> bool:
+    return bool(frappe.utils.cint(frappe.conf.get("live_attendance_feed", 1)))
+
+
+def build_attendance_event(attendance: str, event: str) -> Optional[Dict[str, Any]]:
+    """Live board row of an attendance, in the shape of the Point Wise Attendance Live rows"""
+    row = frappe.db.sql("""
+        SELECT
+            a.name AS attendance,
+            a.employee,
+            a.attendance_date,
+            a.status,
+            a.docstatus,
+            a.custom_mobile_punch_in_at,
+            a.custom_mobile_punch_out_at,
+            e.employee_name,
+            e.designation,
+            e.branch,
+            e.custom_point AS point,
+            e.custom_route AS route,
+            p.zone_name AS zone
+        FROM `tabAttendance` a
+        JOIN `tabEmployee` e ON e.name = a.employee
+        LEFT JOIN `tabPoint` p ON p.name = e.custom_point
+        WHERE a.name = %s
+    """, attendance, as_dict=1)
+
+    if not row:
+        return None
+
+    row = row[0]
+    row.update({
+        "event": event,
+        "doc_status": DOC_STATUS.get(row.docstatus, "Not Available"),
+        "published_at": frappe.utils.now()
+    })
+    return row
+
+
+def publish_attendance_event(attendance: str, event: str) -> None:
+    """
+    Queue a live board event for an attendance. Never raises, the feed must not break attendance marking.
+
+    Args:
+        attendance: Attendance name.
+        event: created, face_verified, punch_in or punch_out.
+    """
+    if not attendance or not is_feed_enabled():
+        return
+
+    try:
+        payload = build_attendance_event(attendance, event)
+        if not payload:
+            return
+
+        pipe = frappe.cache.pipeline()
+        pipe.hset(frappe.cache.make_key(PENDING_EVENTS_KEY), payload["employee"], frappe.as_json(payload, indent=None))
+        pipe.execute()
+
+        frappe.enqueue(
+            FLUSH_METHOD,
+            queue="short",
+            job_id=FLUSH_JOB_ID,
+            deduplicate=True,
+            enqueue_after_commit=True
+        )
+
+    except Exception as e:
+        frappe.log_error(
+            title="Live Attendance Feed Error",
+            message=f"Attendance: {attendance}\nEvent: {event}\nError: {str(e)}\nTraceback: {frappe.get_traceback()}"
+        )
+
+
+def _pop_pending_events() -> List[Dict[str, Any]]:
+    key = frappe.cache.make_key(PENDING_EVENTS_KEY)
+    pipe = frappe.cache.pipeline()
+    pipe.hgetall(key)
+    pipe.delete(key)
+    pending, _ = pipe.execute()
+    return [json.loads(value) for value in (pending or {}).values()]
+
+
+def flush_attendance_events() -> int:
+    """Publish the pending events as one batch per Point, Zone and Branch room. Returns the number of events."""
+    events = _pop_pending_events()
+    if not events:
+        return 0
+
+    rooms = {}
+    for event in events:
+        for doctype, field in SCOPES.items():
+            if event.get(field):
+                rooms.setdefault((doctype, event[field]), []).append(event)
+
+    for (doctype, name), room_events in rooms.items():
+        frappe.publish_realtime(
+            FEED_EVENT,
+            {"scope": doctype, "name": name, "events": room_events},
+            doctype=doctype,
+            docname=name
+        )
+
+    return len(events)
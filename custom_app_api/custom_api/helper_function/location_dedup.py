@@ -0,0 +1,63 @@
+"""
+Duplicate detection for buffered GPS points.
+
+record_location_batch receives points an app buffered while offline and retries whole batches when
+it did not see the acknowledgements, so a batch may overlap points that are already stored. A point
+is a duplicate when it is closer than the dedup window to a stored point of the attendance or to a
+point accepted earlier in the same batch.
+"""
+
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+
+def get_batch_time_span(rows: Iterable[Dict[str, Any]], window_seconds: int) -> Tuple[datetime, datetime]:
+    """Range of recorded_at a stored point must fall in to collide with any point of the batch"""
+    times = [row["recorded_at"] for row in rows]
+    window = timedelta(seconds=window_seconds)
+    return min(times) - window, max(times) + window
+
+
+def _near(sorted_times: Sequence[datetime], value: datetime, window_seconds: int) -> bool:
+    """Whether a time of sorted_times is closer than window_seconds to value"""
+    position = bisect_left(sorted_times, value)
+    for neighbour in sorted_times[max(position - 1, 0):position + 1]:
+        if abs((value - neighbour).total_seconds()) < window_seconds:
+            return True
+    return False
+
+
+def split_duplicate_points(
+    points: Iterable[Tuple[int, Dict[str, Any]]],
+    stored_times: Iterable[datetime],
+    window_seconds: int
+) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[int]]:
+    """
+    Separate new points from duplicates.
+
+    Args:
+        points: (request index, row) pairs, rows with a datetime recorded_at, in any order.
+        stored_times: recorded_at of the stored points of the attendance around the batch.
+        window_seconds: Points closer than this are duplicates.
+
+    Returns:
+        (accepted (index, row) pairs in recorded_at order, indexes of the duplicates)
+    """
+    stored_times = sorted(stored_times)
+    accepted = []
+    duplicates = []
+    last_accepted = None
+
+    for idx, row in sorted(points, key=lambda item: item[1]["recorded_at"]):
+        recorded_at = row["recorded_at"]
+        if _near(stored_times, recorded_at, window_seconds) or (
+            last_accepted and (recorded_at - last_accepted).total_seconds() < window_seconds
+        ):
+            duplicates.append(idx)
+            continue
+
+        accepted.append((idx, row))
+        last_accepted = recorded_at
+
+    return accepted, duplicates
@@ -0,0 +1,50 @@
+"""
+Bulk name reservation from a naming series.
+
+The bulk writers (absent attendance of the close-out, system generated Additional Salary) insert
+rows without going through insert(), so they reserve the names insert() would have generated one
+by one with a single statement on `tabSeries`.
+"""
+
+import frappe
+from frappe.model.naming import parse_naming_series
+from typing import List, Tuple
+
+# Digits of a series without hashes, as appended by make_autoname
+DEFAULT_SERIES_DIGITS = 5
+
+
+def split_naming_series(naming_series: str) -> Tuple[str, int]:
+    """
+    Series key and number of digits of a naming series, e.g. "HR-ATT-.YYYY.-" gives
+    ("HR-ATT-2025-", 5) and "ADS-.YYYY.-.####" gives ("ADS-2025-", 4).
+    """
+    if "#" not in naming_series:
+        return parse_naming_series(naming_series), DEFAULT_SERIES_DIGITS
+
+    prefix, _, hashes = naming_series.rpartition(".")
+    if not hashes or hashes.strip("#"):
+        frappe.throw(frappe._("Naming series {0} must end with its digits to reserve names in bulk").format(naming_series))
+
+    return parse_naming_series(prefix), len(hashes)
+
+
+def reserve_series_names(naming_series: str, count: int) -> List[str]:
+    """
+    Reserve `count` consecutive names of a naming series with a single upsert of `tabSeries`.
+    The upsert creates the series row (first use, new year) and takes its lock in one statement,
+    so concurrent callers queue on the row instead of racing to create it. The caller commits.
+    """
+    if count <= 0:
+        return []
+
+    prefix, digits = split_naming_series(naming_series)
+
+    frappe.db.sql("""
+        INSERT INTO `tabSeries` (`name`, `current`) VALUES (%(prefix)s, %(count)s)
+        ON DUPLICATE KEY UPDATE `current` = `current` + %(count)s
+    """, {"prefix": prefix, "count": count})
+    current = frappe.db.sql("SELECT `current` FROM `tabSeries` WHERE `name` = %s", (prefix,))[0][0]
+    start = frappe.utils.cint(current) - count
+
+    return [f"{prefix}{str(start + offset).zfill(digits)}" for offset in range(1, count + 1)]
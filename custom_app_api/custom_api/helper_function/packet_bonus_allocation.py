@@ -0,0 +1,58 @@
+import numpy as np
+
+
+def allocate_packet_bonus(route_index, day_index, employee_index, eligible, route_bonus):
+    """
+    Split the monthly bonus of every route across the days its delivery partners worked.
+
+    Rows are the month's present attendances on the bonus routes, in priority order: when several
+    eligible attendances share a route and a day (multiple punches), the first one is kept and the
+    others are flagged as conflicts. Each employee gets days / total days of the route's bonus.
+
+    Args:
+        route_index (array-like): Route of each attendance, index into route_bonus.
+        day_index (array-like): Day of each attendance (day of month or ordinal).
+        employee_index (array-like): Employee of each attendance, as an integer code.
+        eligible (array-like): Whether the designation of the employee is eligible.
+        route_bonus (array-like): Bonus amount of every route.
+
+    Returns:
+        dict of numpy.ndarray:
+            route, employee, days, amount: one entry per (route, employee) allocation.
+            conflicts: indexes of the rows dropped as multi-punch conflicts.
+    """
+    route_index = np.asarray(route_index, dtype=np.int64)
+    day_index = np.asarray(day_index, dtype=np.int64)
+    employee_index = np.asarray(employee_index, dtype=np.int64)
+    eligible = np.asarray(eligible, dtype=bool)
+    route_bonus = np.asarray(route_bonus, dtype=np.float64)
+
+    rows = np.flatnonzero(eligible)
+
+    # First eligible attendance of every (route, day) wins, np.unique returns first occurrences
+    route_day = route_index[rows] * (int(day_index.max(initial=0)) + 1) + day_index[rows]
+    _, first = np.unique(route_day, return_index=True)
+    kept = np.zeros(rows.size, dtype=bool)
+    kept[first] = True
+    conflicts = rows[~kept]
+    rows = rows[kept]
+
+    # Days per (route, employee)
+    pairs, days = np.unique(
+        np.stack([route_index[rows], employee_index[rows]], axis=1),
+        axis=0,
+        return_counts=True
+    )
+    pair_route = pairs[:, 0]
+    pair_employee = pairs[:, 1]
+
+    total_days = np.bincount(pair_route, weights=days, minlength=route_bonus.size)
+    amount = days / np.where(total_days[pair_route] > 0, total_days[pair_route], 1) * route_bonus[pair_route]
+
+    return {
+        "route": pair_route,
+        "employee": pair_employee,
+        "days": days,
+        "amount": amount,
+        "conflicts": conflicts,
+    }
@@ -0,0 +1,154 @@
+"""
+Cached geographic permission scope of a user.
+
+The permission_query_conditions of Route, Point, Area and Zone (and Job Opening through Route) run
+on every list and report query. The scope they depend on - the user's unrestricted roles, the
+designation and branch of their Employee, and the zones and areas of their Delivery Mapping - is
+resolved once per user by get_user_scope and cached in Redis, and the conditions are emitted from
+the cached sets by get_scope_condition.
+
+Invalidation is wired through doc_events: Delivery Mapping and Employee saves clear the scope of the
+employee's user, User saves (role changes) clear that user, and Area saves clear every user since a
+Lead's zones come from their areas. Entries also expire after `geo_permission_cache_ttl` seconds
+(site_config.json) as a backstop for changes made with frappe.db.set_value.
+"""
+
+import frappe
+from typing import Any, Dict, Optional
+
+DEFAULT_TTL_SECONDS = 3600
+SCOPE_KEY = "geo_permission_scope:{}"
+
+# Roles that see every branch, zone and area
+UNRESTRICTED_ROLES = {"System Manager", "PAN India Access - Data", "Read Only"}
+
+BRANCH_DESIGNATIONS = {"Last Mile Manager", "Last Mile Head"}
+ZONE_DESIGNATION = "Last Mile Zonal Head"
+AREA_DESIGNATION = "Last Mile Lead"
+
+# DocType: (zone field, area field). Zone has no area field, a Lead sees the zones of their areas
+SCOPE_FIELDS = {
+    "Route": ("zone_name", "area_name"),
+    "Point": ("zone_name", "area_name"),
+    "Area": ("zone_name", "name"),
+    "Zone": ("name", None),
+}
+
+
+def _ttl() -> int:
+    return frappe.utils.cint(frappe.conf.get("geo_permission_cache_ttl")) or DEFAULT_TTL_SECONDS
+
+
+def is_unrestricted_user(user: str) -> bool:
+    return user == "Administrator" or bool(UNRESTRICTED_ROLES.intersection(frappe.get_roles(user)))
+
+
+def build_user_scope(user: str) -> Dict[str, Any]:
+    """
+    Resolve the scope of a user:
+    {"unrestricted": bool, "designation": str, "branch": str, "zones": [...], "areas": [...], "area_zones": [...]}
+    zones / areas are None when the designation is not mapped through Delivery Mapping.
+    """
+    scope = {
+        "unrestricted": is_unrestricted_user(user),
+        "designation": None,
+        "branch": None,
+        "zones": None,
+        "areas": None,
+        "area_zones": None,
+    }
+    if scope["unrestricted"]:
+        return scope
+
+    employee = frappe.db.get_value("Employee", {"user_id": user}, ["name", "designation", "branch"], as_dict=1)
+    if not employee:
+        # No employee record, default permissions
+        scope["unrestricted"] = True
+        return scope
+
+    scope["designation"] = employee.designation
+    scope["branch"] = employee.branch
+
+    if employee.designation not in (ZONE_DESIGNATION, AREA_DESIGNATION):
+        return scope
+
+    mapping = frappe.get_all("Delivery Mapping", filters={"employee": employee.name}, pluck="name", limit=1)
+    mapping = mapping[0] if mapping else None
+
+    if employee.designation == ZONE_DESIGNATION:
+        scope["zones"] = frappe.get_all(
+            "Delivery Zone Mapping", filters={"parent": mapping}, pluck="zone_name"
+        ) if mapping else []
+    else:
+        scope["areas"] = frappe.get_all(
+            "Delivery Area Mapping", filters={"parent": mapping}, pluck="area_name"
+        ) if mapping else []
+        scope["area_zones"] = frappe.get_all(
+            "Area", filters={"name": ["in", scope["areas"]]}, pluck="zone_name", distinct=True
+        ) if scope["areas"] else []
+
+    return scope
+
+
+def get_user_scope(user: Optional[str] = None) -> Dict[str, Any]:
+    user = user or frappe.session.user
+    key = SCOPE_KEY.format(user)
+
+    scope = frappe.cache.get_value(key)
+    if scope is None:
+        scope = build_user_scope(user)
+        frappe.cache.set_value(key, scope, expires_in_sec=_ttl())
+    return scope
+
+
+def _in_condition(column: str, values) -> str:
+    values = [value for value in values or [] if value]
+    if not values:
+        return "1=0"
+    return f"{column} in ({', '.join(frappe.db.escape(value) for value in values)})"
+
+
+def get_scope_condition(user: str, doctype: str) -> str:
+    """
+    Permission query condition of Route, Point, Area or Zone for a user:
+    - Unrestricted roles / no employee record: no restrictions
+    - Last Mile Manager / Head: their branch
+    - Last Mile Zonal Head: zones of their Delivery Mapping
+    - Last Mile Lead: areas of their Delivery Mapping (Zone: the zones of these areas)
+    """
+    scope = get_user_scope(user)
+    if scope["unrestricted"]:
+        return ""
+
+    zone_field, area_field = SCOPE_FIELDS[doctype]
+    table = f"`tab{doctype}`"
+
+    if scope["designation"] in BRANCH_DESIGNATIONS:
+        if scope["branch"]:
+            return f"{table}.branch = {frappe.db.escape(scope['branch'])}"
+
+    elif scope["designation"] == ZONE_DESIGNATION:
+        return _in_condition(f"{table}.{zone_field}", scope["zones"])
+
+    elif scope["designation"] == AREA_DESIGNATION:
+        if not scope["areas"]:
+            return "1=0"
+        if area_field:
+            return _in_condition(f"{table}.{area_field}", scope["areas"])
+        return _in_condition(f"{table}.{zone_field}", scope["area_zones"])
+
+    return "1=1"
+
+
+def clear_user_scope(user: Optional[str] = None) -> None:
+    """Drop the cached scope of a user, or of every user when no user is given"""
+    if user:
+        frappe.cache.delete_value(SCOPE_KEY.format(user))
+    else:
+        frappe.cache.delete_keys(SCOPE_KEY.format(""))
+
+
+def clear_employee_scope(employee: Optional[str]) -> None:
+    user = frappe.db.get_value("Employee", employee, "user_id") if employee else None
+    if user:
+        clear_user_scope(user)
@@ -0,0 +1,132 @@
+"""
+Diff-and-upsert helpers for the analytics route feed.
+
+import_routes_v2 and update_delivery_count_for_routes_v2 receive the full route list on every run,
+while almost nothing changes between two runs. These helpers load the current hierarchy once, keyed
+by sf_analytics_id, diff the feed against it and only write what changed:
+
+- new City / Zone / Area / Point / Route nodes are inserted level by level, as documents so naming,
+  defaults and the Route after_insert hook (job opening) still apply,
+- total_delivery changes are applied with one UPDATE ... CASE per batch of routes.
+
+Both jobs read the feed through one shared snapshot per cycle (see analytics_feed) and the
+existing hierarchy through get_route_hierarchy_index: the five sf_analytics_id maps are loaded once
+per cycle and kept in Redis. Only the import writes the index back, with the nodes and counts it
+changed. The delivery count job only clears it after writing, so it never replaces the index with
+one read before a concurrent import committed its new nodes. Saves of City / Zone / Area / Point /
+Route clear it too. An unchanged run costs no query and no writes.
+"""
+
+import frappe
+from typing import Any, Dict, Iterable, List, Optional
+from custom_app_api.custom_api.helper_function.analytics_feed import get_feed_cycle_seconds
+
+# Routes per UPDATE ... CASE statement
+UPDATE_BATCH_SIZE = 500
+
+HIERARCHY_INDEX_KEY = "route_hierarchy_index"
+
+# Hierarchy levels, parents first: extra fields kept in the index
+HIERARCHY_INDEX_FIELDS = {
+    "City": None,
+    "Zone": None,
+    "Area": None,
+    "Point": None,
+    "Route": ["total_delivery"],
+}
+
+
+def load_sf_analytics_map(doctype: str, fields: Optional[List[str]] = None) -> Dict[int, Any]:
+    """Existing records of a doctype keyed by int(sf_analytics_id), records without an id are ignored"""
+    records = frappe.get_all(
+        doctype,
+        fields=["name", "sf_analytics_id"] + (fields or []),
+        filters={"sf_analytics_id": ["is", "set"]},
+        limit_page_length=None
+    )
+
+    existing = {}
+    for record in records:
+        try:
+            existing[int(record.sf_analytics_id)] = record
+        except (TypeError, ValueError):
+            continue
+    return existing
+
+
+def get_route_hierarchy_index(store: bool = True) -> Dict[str, Dict[int, Any]]:
+    """
+    {doctype: {sf_analytics_id: record}} of City, Zone, Area, Point and Route, shared by the jobs of a cycle.
+    With store=False an index loaded from the database is not cached, for jobs that do not own it.
+    """
+    index = frappe.cache.get_value(HIERARCHY_INDEX_KEY)
+    if index is None:
+        index = {
+            doctype: load_sf_analytics_map(doctype, fields)
+            for doctype, fields in HIERARCHY_INDEX_FIELDS.items()
+        }
+        if store:
+            set_route_hierarchy_index(index)
+    return index
+
+
+def set_route_hierarchy_index(index: Dict[str, Dict[int, Any]]) -> None:
+    """Store the index after the route import committed its changes to the hierarchy"""
+    frappe.cache.set_value(HIERARCHY_INDEX_KEY, index, expires_in_sec=get_feed_cycle_seconds())
+
+
+def clear_route_hierarchy_index() -> None:
+    frappe.cache.delete_value(HIERARCHY_INDEX_KEY)
+
+
+def get_total_delivery_changes(rows: Iterable[Dict[str, Any]], routes: Dict[int, Any]) -> Dict[str, int]:
+    """
+    {route name: new total_delivery} for the feed rows whose count differs from the stored one.
+
+    Args:
+        rows: Feed rows with route_id and count_of_customers.
+        routes: Route map of get_route_hierarchy_index().
+    """
+    changes = {}
+    for row in rows:
+        route = routes.get(row.get("route_id"))
+        if not route:
+            continue
+
+        count = frappe.utils.cint(row.get("count_of_customers"))
+        if frappe.utils.cint(route.total_delivery) != count:
+            changes[route.name] = count
+    return changes
+
+
+def apply_total_delivery_changes(routes: Dict[int, Any], changes: Dict[str, int]) -> None:
+    """Reflect written total_delivery changes in the index records"""
+    for route in routes.values():
+        if route.name in changes:
+            route.total_delivery = changes[route.name]
+
+
+def bulk_update_total_delivery(changes: Dict[str, int]) -> int:
+    """Apply {route name: total_delivery} with one UPDATE ... CASE per batch. Returns the number of routes updated. The caller commits."""
+    names = list(changes)
+
+    for start in range(0, len(names), UPDATE_BATCH_SIZE):
+        batch = names[start:start + UPDATE_BATCH_SIZE]
+        values = {"modified_by": frappe.session.user}
+        cases = []
+
+        for index, name in enumerate(batch):
+            values[f"name_{index}"] = name
+            values[f"count_{index}"] = changes[name]
+            cases.append(f"WHEN %(name_{index})s THEN %(count_{index})s")
+
+        placeholders = ", ".join(f"%(name_{index})s" for index in range(len(batch)))
+        frappe.db.sql(f"""
+            UPDATE `tabRoute`
+            SET total_delivery = CASE name {" ".join(cases)} END,
+                modified = NOW(6),
+                modified_by = %(modified_by)s
+            WHERE name IN ({placeholders})
+        """, values)
+
+    return len(names)
@@ -0,0 +1,210 @@
+"""
+Archival and retention of Route Tracking.
+
+Once an attendance is closed (submitted or cancelled) and older than route_tracking_archive_after_days
+(default 7), its points are moved out of `tabRoute Tracking` into one Route Tracking Archive row per
+attendance, holding the whole track encoded with track_codec. The live table then only holds the last
+few days, which keeps the dedup queries and map views working on a small table.
+
+Archives older than route_tracking_retention_days are deleted (0, the default, keeps them forever).
+
+Readers go through get_route_tracking_points, which reads the live rows and falls back to the archive.
+"""
+
+import time
+import frappe
+from typing import Any, Dict, List, Optional
+
+from custom_app_api.custom_api.helper_function.track_codec import (
+    ENCODING_VERSION,
+    decode_track,
+    encode_track,
+)
+
+DEFAULT_ARCHIVE_AFTER_DAYS = 7
+DEFAULT_ARCHIVE_BATCH_SIZE = 200
+
+ARCHIVE_FIELDS = [
+    "name", "attendance", "employee", "attendance_date", "point_count", "first_recorded_at",
+    "last_recorded_at", "encoding_version", "track_data", "owner", "modified_by", "creation", "modified"
+]
+
+
+def archive_route_tracking():
+    """Scheduled entry point, runs the archival on the long queue"""
+    frappe.enqueue(
+        "custom_app_api.custom_api.helper_function.route_tracking_archive.run_route_tracking_archive",
+        queue="long",
+        timeout=3600,
+        job_id="route_tracking_archive",
+        deduplicate=True
+    )
+
+
+def get_attendances_to_archive(cutoff_date: str, limit: int) -> List[Dict[str, Any]]:
+    return frappe.db.sql("""
+        SELECT a.name, a.employee, a.attendance_date
+        FROM `tabAttendance` a
+        WHERE a.attendance_date < %(cutoff_date)s
+        AND a.docstatus != 0
+        AND EXISTS (
+            SELECT 1 FROM `tabRoute Tracking` rt WHERE rt.attendance = a.name
+        )
+        ORDER BY a.attendance_date
+        LIMIT %(limit)s
+    """, {"cutoff_date": cutoff_date, "limit": limit}, as_dict=1)
+
+
+def archive_attendance_batch(attendances: List[Dict[str, Any]]) -> int:
+    """
+    Move the Route Tracking rows of the given attendances into Route Tracking Archive.
+    An attendance that was archived before (late points inserted afterwards) gets its archive merged.
+    Returns the number of points archived. The caller commits.
+    """
+    names = tuple(attendance.name for attendance in attendances)
+
+    route_records = frappe.db.sql("""
+        SELECT attendance, latitude, longitude, accuracy, recorded_at
+        FROM `tabRoute Tracking`
+        WHERE attendance IN %(names)s
+        ORDER BY attendance, recorded_at, name
+    """, {"names": names}, as_dict=1)
+
+    tracks = {}
+    for record in route_records:
+        tracks.setdefault(record.attendance, []).append(record)
+
+    existing = frappe.get_all(
+        "Route Tracking Archive",
+        filters={"name": ["in", names]},
+        fields=["name", "track_data"]
+    )
+    for archive in existing:
+        archived_points = [frappe._dict(point) for point in decode_track(archive.track_data)]
+        tracks[archive.name] = sorted(
+            archived_points + tracks.get(archive.name, []),
+            key=lambda point: point.recorded_at
+        )
+
+    now = frappe.utils.now()
+    user = frappe.session.user
+    values = []
+    for attendance in attendances:
+        points = tracks.get(attendance.name)
+        if not points:
+            continue
+
+        values.append((
+            attendance.name,
+            attendance.name,
+            attendance.employee,
+            attendance.attendance_date,
+            len(points),
+            points[0].recorded_at,
+            points[-1].recorded_at,
+            ENCODING_VERSION,
+            encode_track(
+                [point.latitude for point in points],
+                [point.longitude for point in points],
+                [point.accuracy for point in points],
+                [frappe.utils.get_datetime(point.recorded_at) for point in points]
+            ),
+            user,
+            user,
+            now,
+            now
+        ))
+
+    if existing:
+        frappe.db.delete("Route Tracking Archive", {"name": ["in", [archive.name for archive in existing]]})
+
+    frappe.db.bulk_insert("Route Tracking Archive", ARCHIVE_FIELDS, values, chunk_size=100)
+    frappe.db.sql("""
+        DELETE FROM `tabRoute Tracking`
+        WHERE attendance IN %(names)s
+    """, {"names": names})
+
+    return len(route_records)
+
+
+def purge_route_tracking_archive(retention_days: int) -> int:
+    """Delete archives of attendances older than retention_days. Returns the number deleted."""
+    cutoff_date = frappe.utils.add_days(frappe.utils.nowdate(), -retention_days)
+    count = frappe.db.count("Route Tracking Archive", {"attendance_date": ["<", cutoff_date]})
+    if count:
+        frappe.db.delete("Route Tracking Archive", {"attendance_date": ["<", cutoff_date]})
+        frappe.db.commit()
+    return count
+
+
+def run_route_tracking_archive(archive_after_days: Optional[int] = None, batch_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Archive the Route Tracking rows of closed attendances and apply the retention policy.
+    Commits after every batch, so an interrupted run resumes where it stopped.
+    """
+    start_time = time.time()
+    archive_after_days = frappe.utils.cint(
+        archive_after_days or frappe.conf.get("route_tracking_archive_after_days") or DEFAULT_ARCHIVE_AFTER_DAYS
+    )
+    batch_size = frappe.utils.cint(
+        batch_size or frappe.conf.get("route_tracking_archive_batch_size") or DEFAULT_ARCHIVE_BATCH_SIZE
+    )
+    cutoff_date = frappe.utils.add_days(frappe.utils.nowdate(), -archive_after_days)
+
+    summary = {"attendances": 0, "points": 0, "failed_batches": 0, "purged": 0}
+    failed = set()
+
+    while True:
+        attendances = [
+            attendance for attendance in get_attendances_to_archive(cutoff_date, batch_size + len(failed))
+            if attendance.name not in failed
+        ]
+        if not attendances:
+            break
+
+        try:
+            summary["points"] += archive_attendance_batch(attendances)
+            summary["attendances"] += len(attendances)
+            frappe.db.commit()
+        except Exception as e:
+            frappe.db.rollback()
+            summary["failed_batches"] += 1
+            failed.update(attendance.name for attendance in attendances)
+            frappe.log_error(
+                message=f"Error archiving route tracking of {len(attendances)} attendances: {str(e)}\n{frappe.get_traceback()}",
+                title="Route Tracking Archive Error"
+            )
+
+    retention_days = frappe.utils.cint(frappe.conf.get("route_tracking_retention_days"))
+    if retention_days > 0:
+        summary["purged"] = purge_route_tracking_archive(retention_days)
+
+    print(
+        f"Archived {summary['points']} route tracking points of {summary['attendances']} attendances, "
+        f"purged {summary['purged']} archives in {time.time() - start_time:.2f} seconds"
+    )
+    return summary
+
+
+def get_route_tracking_points(attendance: str) -> List[Dict[str, Any]]:
+    """
+    Points of an attendance ordered by recorded_at, {latitude, longitude, accuracy, recorded_at},
+    from `tabRoute Tracking` and, once archived, Route Tracking Archive. Late points of an archived
+    attendance that are not archived yet are merged with the archived track.
+    """
+    points = frappe.db.sql("""
+        SELECT latitude, longitude, accuracy, recorded_at
+        FROM `tabRoute Tracking`
+        WHERE attendance = %s
+        ORDER BY recorded_at ASC
+    """, attendance, as_dict=1)
+
+    track_data = frappe.db.get_value("Route Tracking Archive", attendance, "track_data")
+    if not track_data:
+        return points
+
+    archived_points = [frappe._dict(point) for point in decode_track(track_data)]
+    if not points:
+        return archived_points
+
+    return sorted(archived_points + list(points), key=lambda point: point.recorded_at)
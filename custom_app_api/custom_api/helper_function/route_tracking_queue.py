@@ -0,0 +1,292 @@
+"""
+Write-behind queue for Route Tracking.
+
+When `route_tracking_write_behind` is set in site_config.json, record_location validates the
+payload, reserves the document name and pushes the row onto a Redis list instead of inserting
+the document. flush_route_tracking_queue (RQ, short queue) drains the list in bulk and writes
+the rows with multi-row INSERTs.
+
+A flush is enqueued as soon as the list holds `route_tracking_flush_size` rows (default 500) or
+the oldest queued row is older than `route_tracking_flush_max_latency` seconds (default 30).
+A scheduler job runs every minute as a backstop for quiet periods.
+
+A flush moves each batch from the queue to a processing list in one step and removes it from there
+only once its rows are committed. A batch left in the processing list by a worker that died is
+flushed again by the next run, rows already written are skipped as their names were reserved.
+
+Counters (enqueued, flushed, dropped, sync_fallback, flushes) are kept in a Redis hash and are
+returned with the current lag by get_route_tracking_queue_stats.
+
+Every Redis call goes to the raw client with keys built by frappe.cache.make_key: the RedisWrapper
+list helpers add the prefix again and its hget unpickles, which the raw counters are not.
+"""
+
+import json
+import time
+import frappe
+from typing import Any, Dict, List, Optional
+
+QUEUE_KEY = "route_tracking_write_behind_queue"
+PROCESSING_KEY = "route_tracking_write_behind_processing"
+FIRST_QUEUED_AT_KEY = "route_tracking_write_behind_first_queued_at"
+METRICS_KEY = "route_tracking_write_behind_metrics"
+DEDUP_KEY = "route_tracking_last_recording:{}"
+FLUSH_JOB_ID = "route_tracking_write_behind_flush"
+FLUSH_METHOD = "custom_app_api.custom_api.helper_function.route_tracking_queue.flush_route_tracking_queue"
+
+DEFAULT_FLUSH_SIZE = 500
+DEFAULT_FLUSH_MAX_LATENCY_SECONDS = 30
+DEFAULT_MAX_QUEUE_LENGTH = 200000
+
+ROUTE_TRACKING_INSERT_FIELDS = [
+    "name", "creation", "modified", "modified_by", "owner", "docstatus", "idx",
+    "attendance", "employee", "latitude", "longitude", "accuracy", "recorded_at"
+]
+
+# Move up to ARGV[1] entries from the head of KEYS[1] to the processing list KEYS[2]
+MOVE_BATCH_SCRIPT = """
+local items = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+if #items > 0 then
+    redis.call('LTRIM', KEYS[1], #items, -1)
+    redis.call('RPUSH', KEYS[2], unpack(items))
+end
+return items
+"""
+
+
+def insert_route_tracking_rows(rows: List[Dict[str, Any]], ignore_duplicates: bool = False) -> List[str]:
+    """
+    Insert Route Tracking rows with multi-row INSERTs, skipping document validation and hooks.
+    Each row needs attendance, employee, latitude, longitude, accuracy and recorded_at,
+    and may carry a pre-reserved name. With ignore_duplicates, rows whose name exists are skipped.
+    Returns the names in the same order as rows.
+    """
+    if not rows:
+        return []
+
+    now = frappe.utils.now_datetime()
+    user = frappe.session.user
+    names = []
+    values = []
+
+    for row in rows:
+        name = row.get("name") or frappe.generate_hash(length=10)
+        names.append(name)
+        values.append((
+            name, now, now, row.get("owner") or user, row.get("owner") or user, 0, 0,
+            row["attendance"],
+            row["employee"],
+            float(row["latitude"]),
+            float(row["longitude"]),
+            float(row["accuracy"]),
+            row["recorded_at"]
+        ))
+
+    frappe.db.bulk_insert(
+        "Route Tracking",
+        ROUTE_TRACKING_INSERT_FIELDS,
+        values,
+        ignore_duplicates=ignore_duplicates,
+        chunk_size=500
+    )
+    return names
+
+
+def is_write_behind_enabled() -> bool:
+    return bool(frappe.utils.cint(frappe.conf.get("route_tracking_write_behind")))
+
+
+def _flush_size() -> int:
+    return frappe.utils.cint(frappe.conf.get("route_tracking_flush_size")) or DEFAULT_FLUSH_SIZE
+
+
+def _flush_max_latency() -> int:
+    return frappe.utils.cint(frappe.conf.get("route_tracking_flush_max_latency")) or DEFAULT_FLUSH_MAX_LATENCY_SECONDS
+
+
+def _max_queue_length() -> int:
+    return frappe.utils.cint(frappe.conf.get("route_tracking_max_queue_length")) or DEFAULT_MAX_QUEUE_LENGTH
+
+
+def _llen(key: str) -> int:
+    pipe = frappe.cache.pipeline()
+    pipe.llen(frappe.cache.make_key(key))
+    return pipe.execute()[0]
+
+
+def _get_metrics() -> Dict[str, int]:
+    pipe = frappe.cache.pipeline()
+    pipe.hgetall(frappe.cache.make_key(METRICS_KEY))
+    metrics = pipe.execute()[0]
+    return {
+        (key.decode() if isinstance(key, bytes) else key): frappe.utils.cint(value)
+        for key, value in (metrics or {}).items()
+    }
+
+
+def _incr_metric(field: str, amount: int = 1) -> None:
+    if amount:
+        frappe.cache.hincrby(frappe.cache.make_key(METRICS_KEY), field, amount)
+
+
+def claim_dedup_window(attendance: str, name: str, seconds: int) -> Optional[str]:
+    """
+    Reserve the dedup window of an attendance for `name`.
+    Returns None if the window was free, otherwise the name already recorded in it.
+    """
+    key = frappe.cache.make_key(DEDUP_KEY.format(attendance))
+    if frappe.cache.set(key, name, ex=seconds, nx=True):
+        return None
+
+    existing = frappe.cache.get(key)
+    return existing.decode() if isinstance(existing, bytes) else existing
+
+
+def enqueue_route_tracking_row(row: Dict[str, Any]) -> str:
+    """
+    Push one Route Tracking row onto the write-behind queue and return its reserved name.
+    Falls back to a synchronous insert if the queue is over its maximum length.
+    """
+    row = dict(row)
+    row["name"] = row.get("name") or frappe.generate_hash(length=10)
+    row["owner"] = frappe.session.user
+    row["recorded_at"] = str(row["recorded_at"])
+
+    if _llen(QUEUE_KEY) >= _max_queue_length():
+        # The worker is not keeping up, do not let Redis grow without bound
+        insert_route_tracking_rows([row])
+        _incr_metric("sync_fallback")
+        return row["name"]
+
+    now = time.time()
+    first_queued_at_key = frappe.cache.make_key(FIRST_QUEUED_AT_KEY)
+
+    # One round trip: push, count, and remember when the oldest pending row was queued
+    pipe = frappe.cache.pipeline()
+    pipe.rpush(frappe.cache.make_key(QUEUE_KEY), json.dumps({"queued_at": now, "row": row}))
+    pipe.hincrby(frappe.cache.make_key(METRICS_KEY), "enqueued", 1)
+    pipe.set(first_queued_at_key, now, nx=True)
+    pipe.get(first_queued_at_key)
+    queue_length, _, _, first_queued_at = pipe.execute()
+
+    first_queued_at = frappe.utils.flt(first_queued_at) or now
+
+    if queue_length >= _flush_size() or now - first_queued_at >= _flush_max_latency():
+        enqueue_flush()
+
+    return row["name"]
+
+
+def enqueue_flush() -> None:
+    frappe.enqueue(
+        FLUSH_METHOD,
+        queue="short",
+        job_id=FLUSH_JOB_ID,
+        deduplicate=True,
+        enqueue_after_commit=False
+    )
+
+
+def _take_batch(size: int) -> List[Dict[str, Any]]:
+    """
+    Entries to flush: the batch left in the processing list by an interrupted flush, otherwise up
+    to `size` entries atomically moved from the head of the queue to the processing list
+    """
+    pipe = frappe.cache.pipeline()
+    pipe.lrange(frappe.cache.make_key(PROCESSING_KEY), 0, -1)
+    items = pipe.execute()[0]
+    if not items:
+        items = frappe.cache.eval(
+            MOVE_BATCH_SCRIPT, 2,
+            frappe.cache.make_key(QUEUE_KEY), frappe.cache.make_key(PROCESSING_KEY),
+            size
+        )
+
+    return [json.loads(item) for item in items]
+
+
+def _complete_batch() -> None:
+    """Drop the processing list once its rows are committed or dropped"""
+    frappe.cache.delete(frappe.cache.make_key(PROCESSING_KEY))
+
+
+def flush_route_tracking_queue() -> Dict[str, int]:
+    """
+    Drain the write-behind queue into `tabRoute Tracking`.
+    Each batch is inserted with multi-row INSERTs and committed. If a batch fails, its rows are
+    retried one by one and rows that still fail are counted as dropped. A batch stays in the
+    processing list until then, so a worker killed mid-flush loses nothing.
+    """
+    start_time = time.time()
+    flush_size = _flush_size()
+    flushed = 0
+    dropped = 0
+
+    frappe.cache.delete(frappe.cache.make_key(FIRST_QUEUED_AT_KEY))
+
+    while True:
+        entries = _take_batch(flush_size)
+        if not entries:
+            break
+
+        rows = [entry["row"] for entry in entries]
+        try:
+            insert_route_tracking_rows(rows, ignore_duplicates=True)
+            frappe.db.commit()
+            flushed += len(rows)
+        except Exception:
+            frappe.db.rollback()
+            for row in rows:
+                try:
+                    insert_route_tracking_rows([row], ignore_duplicates=True)
+                    frappe.db.commit()
+                    flushed += 1
+                except Exception as e:
+                    frappe.db.rollback()
+                    dropped += 1
+                    frappe.log_error(
+                        title="Route Tracking Write-Behind Drop",
+                        message=f"Row: {row}\nError: {str(e)}\nTraceback: {frappe.get_traceback()}"
+                    )
+
+        _complete_batch()
+
+    _incr_metric("flushed", flushed)
+    _incr_metric("dropped", dropped)
+    _incr_metric("flushes")
+
+    if flushed or dropped:
+        print(f"Route tracking write-behind flush: {flushed} inserted, {dropped} dropped in {time.time() - start_time:.2f} seconds")
+
+    return {"flushed": flushed, "dropped": dropped}
+
+
+def flush_route_tracking_queue_if_pending() -> None:
+    """Scheduler backstop, enqueues a flush of whatever is left in the queue or the processing list"""
+    if _llen(QUEUE_KEY) or _llen(PROCESSING_KEY):
+        enqueue_flush()
+
+
+@frappe.whitelist()
+def get_route_tracking_queue_stats() -> Dict[str, Any]:
+    """Queue and processing list lengths, lag of the oldest queued row and counters of the write-behind queue"""
+    frappe.only_for("System Manager")
+
+    pipe = frappe.cache.pipeline()
+    pipe.lindex(frappe.cache.make_key(QUEUE_KEY), 0)
+    pipe.llen(frappe.cache.make_key(QUEUE_KEY))
+    pipe.llen(frappe.cache.make_key(PROCESSING_KEY))
+    oldest, queue_length, processing_length = pipe.execute()
+
+    lag_seconds = round(time.time() - json.loads(oldest)["queued_at"], 2) if oldest else 0
+    metrics = _get_metrics()
+
+    return {
+        "enabled": is_write_behind_enabled(),
+        "queue_length": queue_length,
+        "processing_length": processing_length,
+        "lag_seconds": lag_seconds,
+        "flush_size": _flush_size(),
+        "flush_max_latency": _flush_max_latency(),
+        "metrics": metrics
+    }
@@ -0,0 +1,103 @@
+# Copyright (c) 2025, Hopnet and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from erpnext.setup.doctype.employee.test_employee import make_employee
+from hrms.payroll.doctype.salary_component.test_salary_component import create_salary_component
+
+from custom_app_api.custom_api.helper_function.additional_salary_bulk import (
+	DOCTYPE,
+	bulk_insert_additional_salaries,
+	get_existing_additional_salaries,
+)
+
+COMPANY = "_Test Company"
+COMPONENT = "_Test Bulk Route Payout"
+OTHER_COMPONENT = "_Test Bulk Extra KM"
+
+
+class TestAdditionalSalaryBulk(FrappeTestCase):
+	def setUp(self):
+		for component in (COMPONENT, OTHER_COMPONENT):
+			create_salary_component(component, type="Earning")
+		frappe.db.delete(DOCTYPE, {"salary_component": ["in", [COMPONENT, OTHER_COMPONENT]]})
+
+		self.employees = [
+			make_employee(f"_test_bulk_salary_{idx}@example.com", company=COMPANY) for idx in range(2)
+		]
+
+	def make_entries(self, component=COMPONENT, payroll_date="2025-06-01"):
+		return [
+			{
+				"employee": employee,
+				"salary_component": component,
+				"amount": 100 * (idx + 1),
+				"payroll_date": payroll_date,
+				"company": COMPANY,
+			}
+			for idx, employee in enumerate(self.employees)
+		]
+
+	def test_entries_are_inserted_submitted(self):
+		names = bulk_insert_additional_salaries(self.make_entries(), workflow_state="Approved")
+		self.assertEqual(len(names), 2)
+		self.assertEqual(len(set(names)), 2)
+
+		for idx, name in enumerate(names):
+			doc = frappe.get_doc(DOCTYPE, name)
+			self.assertEqual(doc.employee, self.employees[idx])
+			self.assertEqual(doc.amount, 100 * (idx + 1))
+			self.assertEqual(str(doc.payroll_date), "2025-06-01")
+			self.assertEqual(doc.docstatus, 1)
+			self.assertEqual(doc.type, "Earning")
+			self.assertEqual(doc.currency, frappe.get_cached_value("Company", COMPANY, "default_currency"))
+			self.assertEqual(doc.owner, frappe.session.user)
+			self.assertTrue(doc.naming_series)
+			if doc.meta.has_field("workflow_state"):
+				self.assertEqual(doc.workflow_state, "Approved")
+			# docfield defaults from new_doc are kept
+			default = doc.meta.get_field("overwrite_salary_structure_amount").default
+			self.assertEqual(doc.overwrite_salary_structure_amount, frappe.utils.cint(default))
+
+	def test_names_follow_the_series_of_insert(self):
+		names = bulk_insert_additional_salaries(self.make_entries())
+		doc = frappe.get_doc({**self.make_entries(payroll_date="2025-06-02")[0], "doctype": DOCTYPE})
+		doc.insert(ignore_permissions=True)
+
+		prefix = names[-1].rstrip("0123456789")
+		self.assertTrue(doc.name.startswith(prefix))
+		self.assertEqual(int(doc.name[len(prefix):]), int(names[-1][len(prefix):]) + 1)
+
+	def test_no_entries(self):
+		self.assertEqual(bulk_insert_additional_salaries([]), [])
+
+	def test_existing_entries_of_a_component(self):
+		bulk_insert_additional_salaries(self.make_entries(payroll_date="2025-06-01"))
+		bulk_insert_additional_salaries(self.make_entries(payroll_date="2025-06-03")[:1])
+		bulk_insert_additional_salaries(self.make_entries(component=OTHER_COMPONENT, payroll_date="2025-06-02"))
+
+		existing = get_existing_additional_salaries(COMPONENT, "2025-06-01", "2025-06-02")
+		self.assertEqual(existing, {(employee, "2025-06-01") for employee in self.employees})
+
+		self.assertEqual(
+			get_existing_additional_salaries(COMPONENT, "2025-06-03"),
+			{(self.employees[0], "2025-06-03")}
+		)
+		self.assertEqual(
+			get_existing_additional_salaries(COMPONENT, "2025-06-01", "2025-06-03", employees=[self.employees[1]]),
+			{(self.employees[1], "2025-06-01")}
+		)
+
+	def test_existing_entries_of_no_employees(self):
+		bulk_insert_additional_salaries(self.make_entries())
+		self.assertEqual(get_existing_additional_salaries(COMPONENT, "2025-06-01", employees=[]), set())
+
+	def test_cancelled_entries_are_not_existing(self):
+		names = bulk_insert_additional_salaries(self.make_entries())
+		frappe.db.set_value(DOCTYPE, names[0], "docstatus", 2)
+
+		self.assertEqual(
+			get_existing_additional_salaries(COMPONENT, "2025-06-01"),
+			{(self.employees[1], "2025-06-01")}
+		)
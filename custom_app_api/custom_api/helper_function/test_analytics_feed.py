@@ -0,0 +1,157 @@
+# Copyright (c) 2025, Hopnet and Contributors
+# See license.txt
+
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from custom_app_api.custom_api.helper_function import analytics_feed
+from custom_app_api.custom_api.helper_function.analytics_feed import AnalyticsFeedSnapshot, fetch_analytics_feed
+
+
+class TestAnalyticsFeed(FrappeTestCase):
+	def setUp(self):
+		self.directory = tempfile.TemporaryDirectory()
+		self.path = os.path.join(self.directory.name, "routes.json")
+		self.rows = [
+			{"route_id": 1, "route": "R1", "count_of_customers": 40},
+			{"route_id": 2, "route": "R2", "count_of_customers": 12.5},
+		]
+		with open(self.path, "w") as f:
+			json.dump({"query_result": {"id": 7, "data": {"columns": [], "rows": self.rows}}}, f)
+
+	def tearDown(self):
+		self.directory.cleanup()
+
+	def test_rows_are_read_from_the_snapshot(self):
+		snapshot = AnalyticsFeedSnapshot("routes", path=self.path)
+		self.assertEqual(list(snapshot.iter_rows()), self.rows)
+
+	def test_processed_state_round_trip(self):
+		snapshot = AnalyticsFeedSnapshot("routes", path=self.path)
+		self.assertEqual(snapshot.read_meta(), {})
+
+		snapshot.etag = '"abc"'
+		snapshot.content_hash = "0" * 64
+		snapshot.mark_processed()
+
+		meta = AnalyticsFeedSnapshot("routes", path=self.path).read_meta()
+		self.assertEqual(meta["etag"], '"abc"')
+		self.assertEqual(meta["content_hash"], "0" * 64)
+
+	def test_consumers_keep_their_own_state(self):
+		importer = AnalyticsFeedSnapshot("routes", path=self.path, consumer="import_routes_v2")
+		importer.content_hash = "1" * 64
+		importer.mark_processed()
+
+		counts = AnalyticsFeedSnapshot("routes", path=self.path, consumer="update_delivery_count_for_routes_v2")
+		self.assertEqual(counts.read_meta(), {})
+		self.assertEqual(list(counts.iter_rows()), self.rows)
+
+
+def make_response(status_code, body=b"", etag=None):
+	response = MagicMock()
+	response.status_code = status_code
+	response.headers = {"ETag": etag} if etag else {}
+	response.iter_content.return_value = [body[i:i + 7] for i in range(0, len(body), 7)]
+	response.__enter__.return_value = response
+	return response
+
+
+class TestFetchAnalyticsFeed(FrappeTestCase):
+	def setUp(self):
+		self.directory = tempfile.TemporaryDirectory()
+		self.path = os.path.join(self.directory.name, "routes.json")
+		self.payload = json.dumps({"query_result": {"data": {"rows": [{"route_id": 1, "count_of_customers": 40}]}}}).encode()
+
+		self.session = MagicMock()
+		for patcher in (
+			patch.object(analytics_feed, "get_session", return_value=self.session),
+			patch.object(analytics_feed, "get_snapshot_path", return_value=self.path),
+			patch.object(frappe, "conf", frappe._dict(), create=True),
+		):
+			patcher.start()
+			self.addCleanup(patcher.stop)
+
+	def tearDown(self):
+		self.directory.cleanup()
+
+	def fetch(self, *responses, **kwargs):
+		self.session.get.side_effect = list(responses)
+		return fetch_analytics_feed("routes", "https://analytics.example.com/api", "key", consumer="import_routes_v2", **kwargs)
+
+	def test_first_fetch_writes_the_snapshot(self):
+		snapshot = self.fetch(make_response(200, self.payload, etag='"v1"'))
+
+		self.assertTrue(snapshot.changed)
+		self.assertEqual(snapshot.etag, '"v1"')
+		self.assertEqual(list(snapshot.iter_rows()), [{"route_id": 1, "count_of_customers": 40}])
+		self.assertEqual(self.session.get.call_args.kwargs["headers"], {})
+
+	def test_processed_payload_is_unchanged(self):
+		self.fetch(make_response(200, self.payload, etag='"v1"')).mark_processed()
+
+		snapshot = self.fetch(make_response(200, self.payload, etag='"v2"'))
+		self.assertFalse(snapshot.changed)
+
+		snapshot = self.fetch(make_response(200, self.payload.replace(b"40", b"41"), etag='"v3"'))
+		self.assertTrue(snapshot.changed)
+
+	def test_not_modified_reuses_the_snapshot(self):
+		self.fetch(make_response(200, self.payload, etag='"v1"')).mark_processed()
+
+		snapshot = self.fetch(make_response(304))
+		self.assertEqual(self.session.get.call_args.kwargs["headers"], {"If-None-Match": '"v1"'})
+		self.assertFalse(snapshot.changed)
+		self.assertEqual(list(snapshot.iter_rows()), [{"route_id": 1, "count_of_customers": 40}])
+
+	def test_recent_snapshot_is_reused_within_max_age(self):
+		self.fetch(make_response(200, self.payload, etag='"v1"'))
+
+		snapshot = self.fetch(max_age=600)
+		self.assertEqual(self.session.get.call_count, 1)
+		self.assertTrue(snapshot.changed)
+
+	def test_replay_reads_the_snapshot_without_a_request(self):
+		frappe.conf.analytics_feed_replay = 1
+		self.assertRaises(frappe.ValidationError, self.fetch)
+
+		with open(self.path, "wb") as f:
+			f.write(self.payload)
+		snapshot = self.fetch()
+		self.session.get.assert_not_called()
+		self.assertEqual(list(snapshot.iter_rows()), [{"route_id": 1, "count_of_customers": 40}])
+
+	def test_failed_request_keeps_the_previous_snapshot(self):
+		self.fetch(make_response(200, self.payload, etag='"v1"'))
+
+		self.assertRaises(frappe.ValidationError, self.fetch, make_response(500))
+		with open(self.path, "rb") as f:
+			self.assertEqual(f.read(), self.payload)
+
+	def test_waiting_job_reuses_the_snapshot_fetched_by_the_lock_holder(self):
+		@contextmanager
+		def lock_released_after_another_fetch(name, timeout=None):
+			self.assertEqual(name, "analytics_feed_routes")
+			# The job holding the lock fetched the feed while this one waited
+			self.session.get.side_effect = [make_response(200, self.payload, etag='"v1"')]
+			analytics_feed._fetch(
+				AnalyticsFeedSnapshot("routes", consumer="import_routes_v2"),
+				"https://analytics.example.com/api", "key", None, None
+			)
+			yield
+
+		with patch.object(analytics_feed, "filelock", lock_released_after_another_fetch):
+			snapshot = fetch_analytics_feed(
+				"routes", "https://analytics.example.com/api", "key",
+				consumer="update_delivery_count_for_routes_v2", max_age=600
+			)
+
+		self.assertEqual(self.session.get.call_count, 1)
+		self.assertEqual(snapshot.etag, '"v1"')
+		self.assertFalse([name for name in os.listdir(self.directory.name) if name.endswith(".tmp")])
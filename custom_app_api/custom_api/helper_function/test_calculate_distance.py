@@ -0,0 +1,64 @@
+# Copyright (c) 2025, Hopnet and Contributors
+# See license.txt
+
+from math import sin, cos, sqrt, atan2, radians
+
+from frappe.tests.utils import FrappeTestCase
+
+from custom_app_api.custom_api.helper_function.calculate_distance import (
+	calculate_total_distance,
+	calculate_total_distances,
+	haversine_segment_distances,
+)
+
+TRACK = [
+	[17.4097146, 78.4207672], [17.4097139, 78.4207661], [17.4096921, 78.4204013],
+	[17.4097387, 78.4204186], [17.4097278, 78.420414], [17.4087164, 78.4193608],
+	[17.4091418, 78.418738], [17.4111981, 78.4174884], [17.4118324, 78.4161638],
+	[17.411961, 78.4137828], [17.4124338, 78.4121375], [17.4133419, 78.4116704],
+	[17.4145473, 78.4117425], [17.4159193, 78.4113788], [17.4163351, 78.4105468],
+	[17.4156663, 78.4100797], [17.4174255, 78.4109844], [17.419261, 78.4122962],
+	[17.420721, 78.4114246], [17.421854, 78.4109443], [17.4239498, 78.4105],
+	[17.4255944, 78.4083834], [17.4273585, 78.4060595], [17.4288543, 78.4043466],
+	[17.4302156, 78.4029541], [17.4319902, 78.4001826], [17.4332531, 78.3982951],
+	[17.4347715, 78.3959793], [17.436238, 78.395048], [17.4371354, 78.3930001],
+	[17.4382384, 78.3921385], [17.4374217, 78.390424], [17.4370547, 78.3887623],
+	[17.433615, 78.3880944], [17.4318356, 78.3884087], [17.4341376, 78.3881918]
+]
+
+
+def reference_total_distance(coordinates):
+	"""Pairwise pure Python implementation the vectorized engine replaced"""
+	R = 6373.0
+	total_distance = 0.0
+	for i in range(len(coordinates) - 1):
+		lat1, lon1 = radians(coordinates[i][0]), radians(coordinates[i][1])
+		lat2, lon2 = radians(coordinates[i + 1][0]), radians(coordinates[i + 1][1])
+		dlon = lon2 - lon1
+		dlat = lat2 - lat1
+		a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
+		c = 2 * atan2(sqrt(a), sqrt(1 - a))
+		total_distance += R * c
+	return total_distance
+
+
+class TestCalculateDistance(FrappeTestCase):
+	def test_total_distance_matches_reference(self):
+		self.assertAlmostEqual(calculate_total_distance(TRACK), reference_total_distance(TRACK), places=9)
+
+	def test_short_tracks(self):
+		self.assertEqual(calculate_total_distance([]), 0.0)
+		self.assertEqual(calculate_total_distance([[17.4097146, 78.4207672]]), 0.0)
+		self.assertEqual(len(haversine_segment_distances([17.4], [78.4])), 0)
+
+	def test_batched_tracks_match_reference(self):
+		tracks = [TRACK, [], TRACK[:1], TRACK[5:20], list(reversed(TRACK))]
+		totals = calculate_total_distances(tracks)
+
+		self.assertEqual(len(totals), len(tracks))
+		for track, total in zip(tracks, totals):
+			self.assertAlmostEqual(total, reference_total_distance(track), places=9)
+
+	def test_batched_empty_input(self):
+		self.assertEqual(calculate_total_distances([]), [])
+		self.assertEqual(calculate_total_distances([[], []]), [0.0, 0.0])
@@ -0,0 +1,93 @@
+# Copyright (c) 2025, Hopnet and Contributors
+# See license.txt
+
+import numpy as np
+
+from frappe.tests.utils import FrappeTestCase
+
+from custom_app_api.custom_api.helper_function.calculate_distance import calculate_total_distance
+from custom_app_api.custom_api.helper_function.clean_track import (
+	clean_track,
+	clean_track_distance,
+	douglas_peucker,
+)
+
+
+def straight_track(points=200, start=17.40, end=17.418, longitude=78.4):
+	return np.linspace(start, end, points), np.full(points, longitude)
+
+
+def timestamps(points, step_seconds=10):
+	return np.datetime64("2025-01-01T08:00:00") + np.arange(points) * np.timedelta64(step_seconds, "s")
+
+
+class TestCleanTrack(FrappeTestCase):
+	def test_clean_track_keeps_a_clean_track(self):
+		lat, lon = straight_track()
+		distance = clean_track_distance(lat, lon, np.full(lat.size, 5.0), timestamps(lat.size))
+		self.assertAlmostEqual(distance, calculate_total_distance(np.c_[lat, lon]), places=6)
+
+	def test_low_accuracy_fix_is_dropped(self):
+		lat, lon = straight_track(points=20)
+		lat[5] += 0.01
+		accuracy = np.full(lat.size, 5.0)
+		accuracy[5] = 500.0
+
+		keep = clean_track(lat, lon, accuracy, None, stationary_radius_m=0)
+		self.assertNotIn(5, keep)
+		self.assertEqual(len(keep), lat.size - 1)
+
+	def test_teleport_is_dropped(self):
+		lat, lon = straight_track(points=50)
+		lat[25] += 0.05
+
+		keep = clean_track(lat, lon, None, timestamps(lat.size), stationary_radius_m=0)
+		self.assertNotIn(25, keep)
+		self.assertEqual(len(keep), lat.size - 1)
+
+	def test_cold_start_first_fix_is_dropped(self):
+		lat, lon = straight_track(points=50)
+		# First fix about 5.5 km off the track
+		lat[0] -= 0.05
+
+		keep = clean_track(lat, lon, None, timestamps(lat.size), stationary_radius_m=0)
+		self.assertNotIn(0, keep)
+		self.assertEqual(len(keep), lat.size - 1)
+		self.assertAlmostEqual(
+			clean_track_distance(lat, lon, None, timestamps(lat.size), stationary_radius_m=0),
+			calculate_total_distance(np.c_[lat[1:], lon[1:]]),
+			places=6
+		)
+
+	def test_last_fix_teleport_is_dropped(self):
+		lat, lon = straight_track(points=50)
+		lat[-1] += 0.05
+
+		keep = clean_track(lat, lon, None, timestamps(lat.size), stationary_radius_m=0)
+		self.assertNotIn(lat.size - 1, keep)
+
+	def test_stationary_jitter_is_collapsed(self):
+		rng = np.random.default_rng(0)
+		lat, lon = straight_track()
+		jitter_lat = lat[100] + rng.normal(0, 5e-5, 100)
+		jitter_lon = lon[100] + rng.normal(0, 5e-5, 100)
+		track_lat = np.concatenate([lat[:100], jitter_lat, lat[100:]])
+		track_lon = np.concatenate([lon[:100], jitter_lon, lon[100:]])
+
+		raw = calculate_total_distance(np.c_[track_lat, track_lon])
+		cleaned = clean_track_distance(track_lat, track_lon, None, timestamps(track_lat.size))
+		expected = calculate_total_distance(np.c_[lat, lon])
+
+		self.assertGreater(raw, expected + 0.5)
+		self.assertAlmostEqual(cleaned, expected, delta=0.05)
+
+	def test_douglas_peucker(self):
+		lat, lon = straight_track(points=100)
+		np.testing.assert_array_equal(douglas_peucker(lat, lon, 1.0), [0, 99])
+
+		lon[50] += 0.001
+		self.assertIn(50, douglas_peucker(lat, lon, 1.0))
+
+	def test_short_tracks(self):
+		self.assertEqual(len(clean_track([], [])), 0)
+		self.assertEqual(clean_track_distance([17.4], [78.4]), 0.0)
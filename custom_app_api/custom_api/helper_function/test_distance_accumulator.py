@@ -0,0 +1,133 @@
+# Copyright (c) 2025, Hopnet and Contributors
+# See license.txt
+
+import threading
+from unittest.mock import patch
+
+import numpy as np
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from custom_app_api.custom_api.helper_function.clean_track import DEFAULT_STATIONARY_RADIUS_M, clean_track_distance
+from custom_app_api.custom_api.helper_function.distance_accumulator import (
+	accumulate_fix,
+	get_accumulated_distance,
+	update_distance_accumulator,
+)
+
+
+def accumulate(latitudes, longitudes, accuracies=None, step_seconds=10, **settings):
+	state = None
+	for idx, (lat, lon) in enumerate(zip(latitudes, longitudes)):
+		accuracy = accuracies[idx] if accuracies is not None else 5.0
+		state = accumulate_fix(state, lat, lon, accuracy, 1_700_000_000 + idx * step_seconds, **settings)
+	return state
+
+
+class LockingCache:
+	"""Cache with the get / set / lock calls of the accumulator, a missed lock raises like redis-py"""
+
+	def __init__(self, lock_fails=False):
+		self.values = {}
+		self.locks = {}
+		self.lock_fails = lock_fails
+
+	def make_key(self, key):
+		return key
+
+	def get(self, key):
+		return self.values.get(key)
+
+	def set(self, key, value, ex=None):
+		self.values[key] = value
+
+	def lock(self, name, timeout=None, blocking_timeout=None):
+		if self.lock_fails:
+			raise TimeoutError("Unable to acquire lock")
+		return self.locks.setdefault(name, threading.Lock())
+
+
+def fixes(start, count):
+	return [
+		{"latitude": 17.40 + idx * 1e-3, "longitude": 78.4, "accuracy": 5.0, "recorded_at": f"2025-06-01 09:{idx // 60:02d}:{idx % 60:02d}"}
+		for idx in range(start, start + count)
+	]
+
+
+class TestDistanceAccumulator(FrappeTestCase):
+	def test_matches_full_track_for_clean_movement(self):
+		lat = np.linspace(17.40, 17.418, 200)
+		lon = np.full(200, 78.4)
+
+		state = accumulate(lat, lon)
+		self.assertEqual(state["points"], 200)
+		recorded_at = 1_700_000_000 + np.arange(200) * 10
+		# The last stretch inside the stationary radius is not counted yet, and never more than that
+		self.assertAlmostEqual(
+			state["km"],
+			clean_track_distance(lat, lon, np.full(200, 5.0), recorded_at),
+			delta=DEFAULT_STATIONARY_RADIUS_M / 1000
+		)
+
+	def test_jitter_low_accuracy_and_teleport_add_nothing(self):
+		rng = np.random.default_rng(0)
+		lat = 17.40 + rng.normal(0, 3e-5, 50)
+		lon = 78.4 + rng.normal(0, 3e-5, 50)
+		accuracies = np.full(50, 5.0)
+
+		lat[10] += 0.01
+		accuracies[10] = 500.0
+		lat[30] += 0.05
+
+		state = accumulate(lat, lon, accuracies)
+		self.assertAlmostEqual(state["km"], 0.0, places=6)
+		self.assertEqual(state["points"], 50)
+
+	def test_re_anchors_after_repeated_teleports(self):
+		lat = [17.40] * 3 + [17.50] * 10
+		lon = [78.4] * 13
+
+		state = accumulate(lat, lon)
+		self.assertEqual(state["km"], 0.0)
+		self.assertEqual(state["latitude"], 17.50)
+
+	def test_out_of_order_fix_is_flagged(self):
+		state = accumulate_fix(None, 17.40, 78.4, 5.0, 1_700_000_100)
+		state = accumulate_fix(state, 17.41, 78.4, 5.0, 1_700_000_000)
+		self.assertEqual(state["out_of_order"], 1)
+
+	def test_concurrent_updates_keep_every_fix(self):
+		cache = LockingCache()
+		track = fixes(0, 200)
+		with patch.object(frappe, "cache", cache, create=True):
+			update_distance_accumulator("ATT-1", track[:1])
+			threads = [
+				threading.Thread(target=update_distance_accumulator, args=("ATT-1", [fix]))
+				for fix in track[1:]
+			]
+			for thread in threads:
+				thread.start()
+			for thread in threads:
+				thread.join()
+
+			self.assertEqual(get_accumulated_distance("ATT-1")["points"], 200)
+
+	def test_failed_update_poisons_the_total(self):
+		cache = LockingCache()
+		with patch.object(frappe, "cache", cache, create=True), patch.object(frappe, "log_error", create=True):
+			update_distance_accumulator("ATT-1", fixes(0, 5))
+			self.assertEqual(get_accumulated_distance("ATT-1")["points"], 5)
+
+			cache.lock_fails = True
+			update_distance_accumulator("ATT-1", fixes(5, 1))
+			cache.lock_fails = False
+			update_distance_accumulator("ATT-1", fixes(6, 5))
+
+			self.assertIsNone(get_accumulated_distance("ATT-1"))
+
+	def test_total_missing_stored_points_is_ignored(self):
+		with patch.object(frappe, "cache", LockingCache(), create=True):
+			update_distance_accumulator("ATT-1", fixes(0, 5))
+			self.assertEqual(get_accumulated_distance("ATT-1", stored_points=5)["points"], 5)
+			self.assertIsNone(get_accumulated_distance("ATT-1", stored_points=6))
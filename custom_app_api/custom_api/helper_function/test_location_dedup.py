@@ -0,0 +1,58 @@
+# Copyright (c) 2025, Hopnet and Contributors
+# See license.txt
+
+from datetime import datetime, timedelta
+
+from frappe.tests.utils import FrappeTestCase
+
+from custom_app_api.custom_api.helper_function.location_dedup import get_batch_time_span, split_duplicate_points
+
+START = datetime(2025, 6, 1, 9, 0, 0)
+WINDOW = 10
+
+
+def point(seconds):
+	return {"recorded_at": START + timedelta(seconds=seconds), "latitude": 17.4, "longitude": 78.4, "accuracy": 5.0}
+
+
+def batch(*seconds):
+	return [(idx, point(offset)) for idx, offset in enumerate(seconds)]
+
+
+class TestLocationDedup(FrappeTestCase):
+	def test_new_batch_is_accepted_in_time_order(self):
+		accepted, duplicates = split_duplicate_points(batch(60, 0, 30), [], WINDOW)
+		self.assertEqual([idx for idx, _ in accepted], [1, 2, 0])
+		self.assertEqual(duplicates, [])
+
+	def test_retried_batch_is_fully_deduplicated(self):
+		points = batch(0, 30, 60, 90)
+		first_attempt, _ = split_duplicate_points(points, [], WINDOW)
+		stored = [row["recorded_at"] for _, row in first_attempt]
+
+		accepted, duplicates = split_duplicate_points(points, stored, WINDOW)
+		self.assertEqual(accepted, [])
+		self.assertEqual(sorted(duplicates), [0, 1, 2, 3])
+
+	def test_partly_stored_batch_only_adds_the_missing_points(self):
+		# The first attempt stored 0 and 30 then timed out, the newest stored point is later than the rest
+		stored = [START, START + timedelta(seconds=30), START + timedelta(seconds=120)]
+		accepted, duplicates = split_duplicate_points(batch(0, 30, 60, 90), stored, WINDOW)
+		self.assertEqual([idx for idx, _ in accepted], [2, 3])
+		self.assertEqual(sorted(duplicates), [0, 1])
+
+	def test_out_of_order_points_between_stored_points(self):
+		stored = [START, START + timedelta(seconds=100)]
+		accepted, duplicates = split_duplicate_points(batch(95, 50, 5, 55), stored, WINDOW)
+		self.assertEqual([idx for idx, _ in accepted], [1])
+		self.assertEqual(sorted(duplicates), [0, 2, 3])
+
+	def test_points_inside_the_window_of_each_other(self):
+		accepted, duplicates = split_duplicate_points(batch(0, 4, 9, 10), [], WINDOW)
+		self.assertEqual([idx for idx, _ in accepted], [0, 3])
+		self.assertEqual(sorted(duplicates), [1, 2])
+
+	def test_time_span_covers_the_window_around_the_batch(self):
+		start, end = get_batch_time_span([point(50), point(0), point(30)], WINDOW)
+		self.assertEqual(start, START - timedelta(seconds=WINDOW))
+		self.assertEqual(end, START + timedelta(seconds=50 + WINDOW))
@@ -0,0 +1,43 @@
+# Copyright (c) 2025, Hopnet and Contributors
+# See license.txt
+
+import frappe
+from frappe.model.naming import make_autoname
+from frappe.tests.utils import FrappeTestCase
+
+from custom_app_api.custom_api.helper_function.naming_series import reserve_series_names, split_naming_series
+
+PREFIX = "_TEST-BULK-SERIES-"
+
+
+class TestNamingSeries(FrappeTestCase):
+	def setUp(self):
+		frappe.db.delete("Series", {"name": PREFIX})
+
+	def current(self):
+		return frappe.db.sql("SELECT `current` FROM `tabSeries` WHERE `name` = %s", (PREFIX,))[0][0]
+
+	def test_digits_come_from_the_hashes(self):
+		self.assertEqual(split_naming_series(f"{PREFIX}.###"), (PREFIX, 3))
+		self.assertEqual(split_naming_series(PREFIX), (PREFIX, 5))
+
+	def test_missing_series_row_is_created(self):
+		self.assertEqual(reserve_series_names(f"{PREFIX}.####", 2), [f"{PREFIX}0001", f"{PREFIX}0002"])
+		self.assertEqual(self.current(), 2)
+
+	def test_names_continue_after_the_current_value(self):
+		frappe.db.sql("INSERT INTO `tabSeries` (`name`, `current`) VALUES (%s, 41)", (PREFIX,))
+
+		self.assertEqual(reserve_series_names(PREFIX, 3), [f"{PREFIX}{n:05d}" for n in (42, 43, 44)])
+		self.assertEqual(reserve_series_names(PREFIX, 1), [f"{PREFIX}00045"])
+		self.assertEqual(self.current(), 45)
+
+	def test_names_match_insert(self):
+		# A document inserted after a bulk reservation gets the next name of the series
+		names = reserve_series_names(f"{PREFIX}.#####", 2)
+		self.assertEqual(make_autoname(f"{PREFIX}.#####"), f"{PREFIX}00003")
+		self.assertEqual(names[-1], f"{PREFIX}00002")
+
+	def test_nothing_is_reserved_for_no_rows(self):
+		self.assertEqual(reserve_series_names(PREFIX, 0), [])
+		self.assertFalse(frappe.db.exists("Series", PREFIX))
@@ -0,0 +1,57 @@
+# Copyright (c) 2025, Hopnet and Contributors
+# See license.txt
+
+import numpy as np
+
+from frappe.tests.utils import FrappeTestCase
+
+from custom_app_api.custom_api.helper_function.packet_bonus_allocation import allocate_packet_bonus
+
+
+class TestPacketBonusAllocation(FrappeTestCase):
+	def test_bonus_is_split_by_days(self):
+		# Route 0: employee 0 works days 1-3, employee 1 day 4. Route 1: employee 2 day 1.
+		result = allocate_packet_bonus(
+			route_index=[0, 0, 0, 0, 1],
+			day_index=[1, 2, 3, 4, 1],
+			employee_index=[0, 0, 0, 1, 2],
+			eligible=[True] * 5,
+			route_bonus=[1000.0, 300.0],
+		)
+
+		allocation = {
+			(int(route), int(employee)): (int(days), float(amount))
+			for route, employee, days, amount in zip(result["route"], result["employee"], result["days"], result["amount"])
+		}
+		self.assertEqual(allocation, {(0, 0): (3, 750.0), (0, 1): (1, 250.0), (1, 2): (1, 300.0)})
+		self.assertEqual(result["conflicts"].size, 0)
+
+	def test_multi_punch_keeps_first_row(self):
+		result = allocate_packet_bonus(
+			route_index=[0, 0, 0],
+			day_index=[5, 5, 6],
+			employee_index=[0, 1, 1],
+			eligible=[True, True, True],
+			route_bonus=[200.0],
+		)
+
+		np.testing.assert_array_equal(result["conflicts"], [1])
+		np.testing.assert_array_equal(result["days"], [1, 1])
+		np.testing.assert_allclose(result["amount"], [100.0, 100.0])
+
+	def test_ineligible_rows_do_not_take_days(self):
+		result = allocate_packet_bonus(
+			route_index=[0, 0],
+			day_index=[5, 5],
+			employee_index=[0, 1],
+			eligible=[False, True],
+			route_bonus=[200.0],
+		)
+
+		np.testing.assert_array_equal(result["employee"], [1])
+		np.testing.assert_allclose(result["amount"], [200.0])
+		self.assertEqual(result["conflicts"].size, 0)
+
+	def test_no_rows(self):
+		result = allocate_packet_bonus([], [], [], [], [100.0])
+		self.assertEqual(result["amount"].size, 0)
@@ -0,0 +1,52 @@
+# Copyright (c) 2025, Hopnet and Contributors
+# See license.txt
+
+from unittest.mock import MagicMock, patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from custom_app_api.custom_api.helper_function import route_sync
+from custom_app_api.custom_api.helper_function.route_sync import get_total_delivery_changes
+
+
+class TestRouteSync(FrappeTestCase):
+	def setUp(self):
+		self.routes = {
+			101: frappe._dict(name="R-101", sf_analytics_id="101", total_delivery=40),
+			102: frappe._dict(name="R-102", sf_analytics_id="102", total_delivery=None),
+		}
+
+	def test_unchanged_rows_are_skipped(self):
+		rows = [{"route_id": 101, "count_of_customers": 40}]
+		self.assertEqual(get_total_delivery_changes(rows, self.routes), {})
+
+	def test_changed_and_empty_counts(self):
+		rows = [
+			{"route_id": 101, "count_of_customers": "45"},
+			{"route_id": 102, "count_of_customers": 12},
+		]
+		self.assertEqual(get_total_delivery_changes(rows, self.routes), {"R-101": 45, "R-102": 12})
+
+	def test_unknown_routes_are_ignored(self):
+		rows = [{"route_id": 999, "count_of_customers": 5}]
+		self.assertEqual(get_total_delivery_changes(rows, self.routes), {})
+
+	def test_last_row_of_a_route_wins(self):
+		rows = [
+			{"route_id": 101, "count_of_customers": 50},
+			{"route_id": 101, "count_of_customers": 55},
+		]
+		self.assertEqual(get_total_delivery_changes(rows, self.routes), {"R-101": 55})
+
+	def test_index_is_only_stored_by_its_owner(self):
+		cache = MagicMock()
+		cache.get_value.return_value = None
+		with patch.object(frappe, "cache", cache, create=True), \
+			patch.object(route_sync, "load_sf_analytics_map", return_value={}), \
+			patch.object(route_sync, "get_feed_cycle_seconds", return_value=1800):
+			route_sync.get_route_hierarchy_index(store=False)
+			cache.set_value.assert_not_called()
+
+			route_sync.get_route_hierarchy_index()
+			cache.set_value.assert_called_once()
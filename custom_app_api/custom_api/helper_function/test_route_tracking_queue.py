@@ -0,0 +1,100 @@
+# Copyright (c) 2025, Hopnet and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from custom_app_api.custom_api.helper_function import route_tracking_queue as queue
+
+ATTENDANCE = "_Test Write Behind Attendance"
+
+
+def make_row(offset, **values):
+	return {
+		"attendance": ATTENDANCE,
+		"employee": "_Test Write Behind Employee",
+		"latitude": 17.4 + offset * 1e-4,
+		"longitude": 78.4,
+		"accuracy": 5.0,
+		"recorded_at": frappe.utils.add_to_date("2025-06-01 09:00:00", seconds=offset * 30),
+		**values
+	}
+
+
+class TestRouteTrackingQueue(FrappeTestCase):
+	def setUp(self):
+		self.clear()
+
+	def tearDown(self):
+		self.clear()
+
+	def clear(self):
+		frappe.db.delete("Route Tracking", {"attendance": ATTENDANCE})
+		frappe.db.commit()
+		for key in (queue.QUEUE_KEY, queue.PROCESSING_KEY, queue.FIRST_QUEUED_AT_KEY, queue.METRICS_KEY, queue.DEDUP_KEY.format(ATTENDANCE)):
+			frappe.cache.delete(frappe.cache.make_key(key))
+
+	def stored_names(self):
+		return set(frappe.get_all("Route Tracking", filters={"attendance": ATTENDANCE}, pluck="name"))
+
+	def metric(self, field):
+		return queue._get_metrics().get(field, 0)
+
+	@patch.object(queue, "enqueue_flush")
+	def test_queued_rows_are_flushed(self, enqueue_flush):
+		names = [queue.enqueue_route_tracking_row(make_row(offset)) for offset in range(3)]
+
+		self.assertEqual(queue._llen(queue.QUEUE_KEY), 3)
+		self.assertEqual(queue.flush_route_tracking_queue(), {"flushed": 3, "dropped": 0})
+		self.assertEqual(self.stored_names(), set(names))
+		self.assertEqual(queue._llen(queue.QUEUE_KEY), 0)
+		self.assertEqual(queue._llen(queue.PROCESSING_KEY), 0)
+
+	@patch.object(queue, "enqueue_flush")
+	def test_interrupted_flush_is_recovered(self, enqueue_flush):
+		names = [queue.enqueue_route_tracking_row(make_row(offset)) for offset in range(4)]
+
+		# A worker took the batch, committed part of it and was killed before completing it
+		entries = queue._take_batch(10)
+		self.assertEqual(len(entries), 4)
+		self.assertEqual(queue._llen(queue.QUEUE_KEY), 0)
+		queue.insert_route_tracking_rows([entries[0]["row"]])
+		frappe.db.commit()
+
+		self.assertEqual(queue._llen(queue.PROCESSING_KEY), 4)
+		result = queue.flush_route_tracking_queue()
+		self.assertEqual(result["dropped"], 0)
+		self.assertEqual(self.stored_names(), set(names))
+		self.assertEqual(queue._llen(queue.PROCESSING_KEY), 0)
+
+	@patch.object(queue, "enqueue_flush")
+	def test_failing_row_is_dropped_and_counted(self, enqueue_flush):
+		good = queue.enqueue_route_tracking_row(make_row(0))
+		queue.enqueue_route_tracking_row(make_row(1, latitude="not a number"))
+
+		self.assertEqual(queue.flush_route_tracking_queue(), {"flushed": 1, "dropped": 1})
+		self.assertEqual(self.stored_names(), {good})
+		self.assertEqual(self.metric("dropped"), 1)
+		self.assertEqual(queue._llen(queue.PROCESSING_KEY), 0)
+
+	@patch.object(queue, "enqueue_flush")
+	def test_full_queue_falls_back_to_a_synchronous_insert(self, enqueue_flush):
+		with patch.object(queue, "_max_queue_length", return_value=0):
+			name = queue.enqueue_route_tracking_row(make_row(0))
+
+		self.assertEqual(queue._llen(queue.QUEUE_KEY), 0)
+		self.assertEqual(self.stored_names(), {name})
+		self.assertEqual(self.metric("sync_fallback"), 1)
+
+	def test_flush_is_enqueued_at_flush_size(self):
+		with patch.object(queue, "_flush_size", return_value=2), patch.object(queue, "enqueue_flush") as enqueue_flush:
+			queue.enqueue_route_tracking_row(make_row(0))
+			enqueue_flush.assert_not_called()
+			queue.enqueue_route_tracking_row(make_row(1))
+			enqueue_flush.assert_called_once()
+
+	def test_dedup_window_is_claimed_once(self):
+		self.assertIsNone(queue.claim_dedup_window(ATTENDANCE, "first", 9))
+		self.assertEqual(queue.claim_dedup_window(ATTENDANCE, "second", 9), "first")
@@ -0,0 +1,47 @@
+# Copyright (c) 2025, Hopnet and Contributors
+# See license.txt
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from frappe.tests.utils import FrappeTestCase
+
+from custom_app_api.custom_api.helper_function.track_codec import (
+	decode_polyline,
+	decode_track,
+	encode_polyline,
+	encode_track,
+)
+
+
+class TestTrackCodec(FrappeTestCase):
+	def test_round_trip(self):
+		rng = np.random.default_rng(0)
+		lat = 17.40 + np.cumsum(rng.normal(0, 1e-4, 500))
+		lon = 78.40 + np.cumsum(rng.normal(0, 1e-4, 500))
+		accuracy = rng.uniform(3, 60, 500)
+		start = datetime(2025, 1, 1, 8, 0, 0)
+		recorded_at = [start + timedelta(seconds=int(second)) for second in np.cumsum(rng.integers(5, 40, 500))]
+
+		points = decode_track(encode_track(lat, lon, accuracy, recorded_at))
+
+		self.assertEqual(len(points), 500)
+		np.testing.assert_allclose([point["latitude"] for point in points], lat, atol=1e-7)
+		np.testing.assert_allclose([point["longitude"] for point in points], lon, atol=1e-7)
+		np.testing.assert_allclose([point["accuracy"] for point in points], accuracy, rtol=1e-6)
+		self.assertEqual([point["recorded_at"] for point in points], recorded_at)
+
+	def test_empty_track_and_missing_accuracy(self):
+		self.assertEqual(decode_track(encode_track([], [], [], [])), [])
+
+		points = decode_track(encode_track([17.4], [78.4], [None], [datetime(2025, 1, 1, 8, 0, 0)]))
+		self.assertEqual(points[0]["accuracy"], 0.0)
+
+	def test_polyline(self):
+		# Reference example of the Google encoded polyline documentation
+		lat = [38.5, 40.7, 43.252]
+		lon = [-120.2, -120.95, -126.453]
+		self.assertEqual(encode_polyline(lat, lon), "_p~iF~ps|U_ulLnnqC_mqNvxq`@")
+		np.testing.assert_allclose(decode_polyline("_p~iF~ps|U_ulLnnqC_mqNvxq`@"), np.c_[lat, lon])
+		self.assertEqual(encode_polyline([], []), "")
@@ -0,0 +1,117 @@
+"""
+Two tier cache for the lookups done by verify_dp_token on every mobile request.
+
+- Per worker tier: a plain dict living in the gunicorn / RQ worker process.
+  Entries are kept only for a few seconds, since an invalidation fired on another
+  worker cannot reach this dict.
+- Shared tier: frappe.cache (Redis), shared by all workers of the site.
+
+Invalidation is wired through doc_events (DP Mobile Token, Employee, Mobile App Config)
+and called explicitly from the places that change these records with frappe.db.set_value /
+frappe.db.delete, which do not fire doc_events.
+
+TTLs can be tuned from site_config.json with `dp_token_cache_ttl` and `dp_token_local_cache_ttl`.
+"""
+
+import time
+import frappe
+from typing import Any, Callable, Dict, Optional
+
+DEFAULT_SHARED_TTL_SECONDS = 300
+DEFAULT_LOCAL_TTL_SECONDS = 15
+LOCAL_MAX_ENTRIES = 10000
+
+TOKEN_SESSION_KEY = "dp_token_session:{}"
+EMPLOYEE_STATUS_KEY = "dp_token_employee_status:{}"
+APP_CONFIG_KEY = "dp_token_mobile_app_config"
+
+TOKEN_SESSION_FIELDS = ["name", "employee", "status", "expires_at", "app_name", "app_version"]
+
+# {(site, key): (expires_at_monotonic, value)}
+_local_cache: Dict[tuple, tuple] = {}
+
+
+def _shared_ttl() -> int:
+    return frappe.utils.cint(frappe.conf.get("dp_token_cache_ttl")) or DEFAULT_SHARED_TTL_SECONDS
+
+
+def _local_ttl() -> int:
+    return frappe.utils.cint(frappe.conf.get("dp_token_local_cache_ttl")) or DEFAULT_LOCAL_TTL_SECONDS
+
+
+def _get_cached(key: str, loader: Callable[[], Any]) -> Any:
+    """Return value from the worker tier, then Redis, then the loader. Missing records are not cached."""
+    local_key = (frappe.local.site, key)
+    now = time.monotonic()
+
+    entry = _local_cache.get(local_key)
+    if entry and entry[0] > now:
+        return entry[1]
+
+    value = frappe.cache.get_value(key)
+    if value is None:
+        value = loader()
+        if value is None:
+            _local_cache.pop(local_key, None)
+            return None
+        frappe.cache.set_value(key, value, expires_in_sec=_shared_ttl())
+
+    if len(_local_cache) >= LOCAL_MAX_ENTRIES:
+        _local_cache.clear()
+    _local_cache[local_key] = (now + _local_ttl(), value)
+
+    return value
+
+
+def _invalidate(key: str) -> None:
+    _local_cache.pop((frappe.local.site, key), None)
+    frappe.cache.delete_value(key)
+
+
+def get_token_session(token_id: str) -> Optional[Dict[str, Any]]:
+    """Return the DP Mobile Token fields needed for authentication, or None if the token does not exist"""
+    if not token_id:
+        return None
+
+    def load():
+        token = frappe.db.get_value("DP Mobile Token", token_id, TOKEN_SESSION_FIELDS, as_dict=True)
+        return dict(token) if token else None
+
+    session = _get_cached(TOKEN_SESSION_KEY.format(token_id), load)
+    return frappe._dict(session) if session else None
+
+
+def get_employee_status(employee: str) -> Optional[str]:
+    """Return Employee.status"""
+    if not employee:
+        return None
+
+    return _get_cached(
+        EMPLOYEE_STATUS_KEY.format(employee),
+        lambda: frappe.db.get_value("Employee", employee, "status")
+    )
+
+
+def get_required_app_version(app_name: str) -> Optional[str]:
+    """Return the `<app_name>_app_version` value from Mobile App Config"""
+
+    def load():
+        config = frappe.db.get_singles_dict("Mobile App Config")
+        return {key: value for key, value in config.items() if key.endswith("_app_version")}
+
+    versions = _get_cached(APP_CONFIG_KEY, load) or {}
+    return versions.get(f"{app_name}_app_version")
+
+
+def invalidate_token_session(token_id: str) -> None:
+    if token_id:
+        _invalidate(TOKEN_SESSION_KEY.format(token_id))
+
+
+def invalidate_employee_status(employee: str) -> None:
+    if employee:
+        _invalidate(EMPLOYEE_STATUS_KEY.format(employee))
+
+
+def invalidate_app_config() -> None:
+    _invalidate(APP_CONFIG_KEY)
@@ -0,0 +1,10 @@
+frappe.query_reports["Database Index Usage"] = {
+	filters: [
+		{
+			fieldname: "only_managed",
+			label: __("Only Indexes Managed by the App"),
+			fieldtype: "Check",
+			default: 0
+		}
+	]
+};
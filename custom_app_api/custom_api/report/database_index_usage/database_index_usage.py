@@ -0,0 +1,94 @@
+import frappe
+from frappe import _
+from custom_app_api.database_indexes import INDEXES, get_existing_indexes, get_index_usage, is_index_present
+
+def execute(filters=None):
+    if not filters:
+        filters = {}
+
+    frappe.only_for("System Manager")
+
+    columns = get_columns()
+    data = get_data(filters)
+
+    return columns, data
+
+def get_columns():
+    return [
+        {
+            "label": _("Table"),
+            "fieldname": "table_name",
+            "fieldtype": "Data",
+            "width": 180
+        },
+        {
+            "label": _("Index"),
+            "fieldname": "index_name",
+            "fieldtype": "Data",
+            "width": 300
+        },
+        {
+            "label": _("Columns"),
+            "fieldname": "columns",
+            "fieldtype": "Data",
+            "width": 300
+        },
+        {
+            "label": _("Managed"),
+            "fieldname": "managed",
+            "fieldtype": "Check",
+            "width": 90
+        },
+        {
+            "label": _("Status"),
+            "fieldname": "status",
+            "fieldtype": "Data",
+            "width": 100
+        },
+        {
+            "label": _("Rows Read"),
+            "fieldname": "rows_read",
+            "fieldtype": "Int",
+            "width": 130
+        }
+    ]
+
+def get_data(filters):
+    tables = sorted({f"tab{index['doctype']}" for index in INDEXES})
+    existing = get_existing_indexes(tables)
+    usage = get_index_usage()
+    usage_available = bool(usage)
+
+    data = []
+
+    # Indexes declared by the app, present or not
+    managed_names = set()
+    for index in INDEXES:
+        table = f"tab{index['doctype']}"
+        managed_names.add((table, index["index_name"]))
+        present = is_index_present(index, existing.get(table, {}))
+        data.append({
+            "table_name": table,
+            "index_name": index["index_name"],
+            "columns": ", ".join(index["columns"]),
+            "managed": 1,
+            "status": "Present" if present else "Missing",
+            "rows_read": usage.get(table, {}).get(index["index_name"]) if usage_available else None
+        })
+
+    # Every other index of the same tables, to spot unused or redundant ones
+    if not filters.get("only_managed"):
+        for table in tables:
+            for index_name, index_columns in existing.get(table, {}).items():
+                if (table, index_name) in managed_names:
+                    continue
+                data.append({
+                    "table_name": table,
+                    "index_name": index_name,
+                    "columns": ", ".join(index_columns),
+                    "managed": 0,
+                    "status": "Present",
+                    "rows_read": usage.get(table, {}).get(index_name) if usage_available else None
+                })
+
+    return data
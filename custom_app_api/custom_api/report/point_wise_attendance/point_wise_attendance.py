@@ -1,5 +1,6 @@
 import frappe
 from frappe import _
+from frappe.utils import cint
 from frappe.utils.nestedset import get_descendants_of
 
 def execute(filters=None):
@@ -11,8 +12,10 @@ def execute(filters=None):
         if filters.get("include_company_descendants"):
             filters.companies.extend(get_descendants_of("Company", filters.get("company")))
 
-    columns = get_columns(filters)
-    data = get_point_wise_attendance(filters)
+    # One designation x point x status aggregation feeds the rows, the summary and the chart
+    counts, point_zone_map = get_point_designation_counts(filters)
+    columns = get_columns(filters, get_breakdown_designations(counts))
+    data = get_point_wise_attendance(filters, counts, point_zone_map)
 
     # Initialize chart at the start
     chart = {
@@ -47,18 +50,8 @@ def execute(filters=None):
     total_on_leave = grand_total_row.get("on_leave", 0)
     total_marked = total_present + total_absent + total_on_leave
 
-    # Get all unique designations with employee counts
-    designation_data = frappe.get_all(
-        "Employee",
-        fields=["designation", "count(*) as total"],
-        filters={
-            "company": ("in", filters.companies),
-            "status": "Active",
-            "custom_point": ("in", [row["point"] for row in data if row.get("point")])
-        },
-        group_by="designation",
-        order_by="designation"
-    )
+    # Designation-wise totals over all points
+    designation_data = get_designation_totals(counts)
 
     # Handle case when no attendance records found
     if total_marked == 0:
@@ -132,33 +125,7 @@ def execute(filters=None):
     ]
     
     for desig in designation_data:
-        # Get attendance for this designation
-        attendance = frappe.get_all(
-            "Attendance",
-            fields=["status", "count(*) as count"],
-            filters={
-                "attendance_date": filters.date,
-                "docstatus": 1,
-                "employee": ("in", 
-                    frappe.get_all(
-                        "Employee",
-                        filters={
-                            "designation": desig.designation,
-                            "company": ("in", filters.companies),
-                            "status": "Active",
-                            "custom_point": ("in", [row["point"] for row in data if row.get("point")])
-                        },
-                        pluck="name"
-                    )
-                )
-            },
-            group_by="status"
-        )
-
-        # Calculate attendance counts and percentages
-        present = sum(a.count for a in attendance if a.status in ["Present", "Work From Home"])
-        absent = sum(a.count for a in attendance if a.status == "Absent")
-        on_leave = sum(a.count for a in attendance if a.status == "On Leave")
+        present, absent, on_leave = desig.present, desig.absent, desig.on_leave
         marked = present + absent + on_leave
         
         if marked > 0:
@@ -220,7 +187,7 @@ def execute(filters=None):
     # return columns, data, message, chart, report_summary
     return columns, data, message, None, None
 
-def get_columns(filters=None):
+def get_columns(filters=None, designations=None):
     columns = [
         {
             "label": _("Zone"),
@@ -270,32 +237,11 @@ def get_columns(filters=None):
     
     # Add designation-wise breakdown columns if requested
     if filters and filters.get("show_designation_wise_breakdown"):
-        # Get designations that actually have employees in the selected points
-        point_condition = ""
-        if filters.get("points"):
-            point_list = "', '".join(filters.get("points"))
-            point_condition = f" AND custom_point IN ('{point_list}')"
-            
-        zone_condition = ""
-        if filters.get("zones"):
-            zone_list = "', '".join(filters.get("zones"))
-            zone_condition = f" AND p.zone_name IN ('{zone_list}')"
-            
-        # Query to get only designations that have employees in the selected points/zones
-        designations = frappe.db.sql("""
-            SELECT DISTINCT e.designation
-            FROM `tabEmployee` e
-            JOIN `tabPoint` p ON e.custom_point = p.name
-            WHERE e.company IN %(companies)s
-            AND e.status = 'Active'
-            {0}
-            {1}
-            ORDER BY e.designation
-        """.format(point_condition, zone_condition), 
-        {"companies": filters.companies}, as_dict=True)
+        # Only designations that actually have employees in the selected points
+        if designations is None:
+            designations = get_breakdown_designations(get_point_designation_counts(filters)[0])
         
-        for desig in designations:
-            designation = desig.designation
+        for designation in designations:
             # Add columns for each designation
             columns.extend([
                 {
@@ -332,8 +278,8 @@ def get_columns(filters=None):
     
     return columns
 
-def get_point_wise_attendance(filters):
-    # First get allowed points based on permissions and filters
+def get_allowed_points(filters):
+    """Points the user may see, restricted by the zone, branch and points filters. Returns {point: zone}."""
     point_filters = {"is_active": 1}
     
     # Add zone filter if specified
@@ -348,93 +294,118 @@ def get_point_wise_attendance(filters):
         fields=["name", "zone_name"],
         filters=point_filters
     )
-    
-    # Create point to zone mapping
     point_zone_map = {p.name: p.zone_name for p in allowed_points}
-    
-    # Get all points and their employees
-    point_filters = {
-        "company": ("in", filters.companies),
-        "status": "Active",
-        "custom_point": ("in", [p.name for p in allowed_points])
-    }
-    
+
     # Add points filter if specified
     if filters.get("points"):
-        point_filters["custom_point"] = ("in", [
-            p for p in filters.get("points") 
-            if p in [ap.name for ap in allowed_points]
-        ])
-
-    points = frappe.get_all(
-        "Employee",
-        fields=[
-            "custom_point as point",
-            "count(*) as total_employees"
-        ],
-        filters=point_filters,
-        group_by="custom_point"
-    )
-
-    data = []
-    zone_wise_data = {}  # For grouping by zone
-
-    # Get all designations that have employees in the selected points
-    if filters.get("show_designation_wise_breakdown"):
-        all_designations = frappe.get_all(
-            "Employee",
-            fields=["designation"],
-            filters=point_filters,
-            distinct=True,
-            pluck="designation"
-        )
-    else:
-        all_designations = []
+        point_zone_map = {
+            point: zone for point, zone in point_zone_map.items()
+            if point in filters.get("points")
+        }
 
-    for point_data in points:
-        if not point_data.point:
+    return point_zone_map
+
+def get_point_designation_counts(filters):
+    """
+    Active employees and their attendance of the day per (point, designation), in one query:
+    [{point, designation, total_employees, present, absent, on_leave}]
+    Also returns the {point: zone} map of the allowed points.
+    """
+    point_zone_map = get_allowed_points(filters)
+    if not point_zone_map:
+        return [], point_zone_map
+
+    counts = frappe.db.sql("""
+        SELECT
+            e.custom_point AS point,
+            e.designation,
+            COUNT(DISTINCT e.name) AS total_employees,
+            SUM(CASE WHEN a.status IN ('Present', 'Work From Home') THEN 1 ELSE 0 END) AS present,
+            SUM(CASE WHEN a.status = 'Absent' THEN 1 ELSE 0 END) AS absent,
+            SUM(CASE WHEN a.status = 'On Leave' THEN 1 ELSE 0 END) AS on_leave
+        FROM `tabEmployee` e
+        LEFT JOIN `tabAttendance` a
+            ON a.employee = e.name
+            AND a.attendance_date = %(date)s
+            AND a.docstatus = 1
+        WHERE e.company IN %(companies)s
+        AND e.status = 'Active'
+        AND e.custom_point IN %(points)s
+        GROUP BY e.custom_point, e.designation
+    """, {
+        "date": filters.get("date"),
+        "companies": tuple(filters.companies),
+        "points": tuple(point_zone_map)
+    }, as_dict=True)
+
+    for row in counts:
+        row.present, row.absent, row.on_leave = cint(row.present), cint(row.absent), cint(row.on_leave)
+
+    return counts, point_zone_map
+
+def get_breakdown_designations(counts):
+    """Designations of the breakdown columns, in order"""
+    return sorted({row.designation for row in counts if row.designation})
+
+def get_designation_totals(counts):
+    """Totals per designation over all points, ordered by designation"""
+    totals = {}
+    for row in counts:
+        total = totals.setdefault(row.designation, frappe._dict(
+            designation=row.designation, total=0, present=0, absent=0, on_leave=0
+        ))
+        total.total += row.total_employees
+        total.present += row.present
+        total.absent += row.absent
+        total.on_leave += row.on_leave
+
+    return sorted(totals.values(), key=lambda d: d.designation or "")
+
+def set_designation_breakdown(row_data, designation_counts, designations):
+    for designation in designations:
+        # Replace spaces with underscores for fieldnames
+        safe_designation = designation.replace(" ", "_")
+        counts = designation_counts.get(designation)
+
+        # No employees with this designation at this point
+        if not counts:
+            row_data[f"{safe_designation}_total"] = 0
+            row_data[f"{safe_designation}_present"] = 0
+            row_data[f"{safe_designation}_absent"] = 0
+            row_data[f"{safe_designation}_on_leave"] = 0
+            row_data[f"{safe_designation}_attendance_percentage"] = 0
             continue
 
-        # Get zone for this point
-        zone = point_zone_map.get(point_data.point, "")
-
-        # Get employees for this point
-        point_employees = frappe.get_all(
-            "Employee",
-            fields=["name"],
-            filters={
-                "custom_point": point_data.point,
-                "company": ("in", filters.companies),
-                "status": "Active"
-            }
-        )
+        # Calculate attendance percentage for this designation
+        desig_total_marked = counts.present + counts.absent + counts.on_leave
+        desig_attendance_percentage = (counts.present / desig_total_marked * 100) if desig_total_marked else 0
 
-        # Get attendance for these employees
-        attendance_counts = frappe.get_all(
-            "Attendance",
-            fields=[
-                "status",
-                "count(*) as count"
-            ],
-            filters={
-                "attendance_date": filters.date,
-                "employee": ("in", [emp.name for emp in point_employees]),
-                "docstatus": 1
-            },
-            group_by="status"
-        )
+        row_data[f"{safe_designation}_total"] = counts.total_employees
+        row_data[f"{safe_designation}_present"] = counts.present
+        row_data[f"{safe_designation}_absent"] = counts.absent
+        row_data[f"{safe_designation}_on_leave"] = counts.on_leave
+        row_data[f"{safe_designation}_attendance_percentage"] = desig_attendance_percentage
+
+def get_point_wise_attendance(filters, counts=None, point_zone_map=None):
+    if counts is None:
+        counts, point_zone_map = get_point_designation_counts(filters)
+
+    show_breakdown = filters.get("show_designation_wise_breakdown")
+    all_designations = get_breakdown_designations(counts) if show_breakdown else []
+
+    # Group the (point, designation) counts by point
+    points = {}
+    for row in counts:
+        points.setdefault(row.point, {})[row.designation] = row
 
-        # Initialize counters
-        present = absent = on_leave = 0
+    data = []
+    for point, designation_counts in points.items():
+        # Get zone for this point
+        zone = point_zone_map.get(point, "")
 
-        # Process attendance counts
-        for count_data in attendance_counts:
-            if count_data.status in ["Present", "Work From Home"]:
-                present = count_data.count
-            elif count_data.status == "Absent":
-                absent = count_data.count
-            elif count_data.status == "On Leave":
-                on_leave = count_data.count
+        present = sum(row.present for row in designation_counts.values())
+        absent = sum(row.absent for row in designation_counts.values())
+        on_leave = sum(row.on_leave for row in designation_counts.values())
 
         # Calculate attendance percentage
         total_marked = present + absent + on_leave
@@ -442,8 +413,8 @@ def get_point_wise_attendance(filters):
 
         row_data = {
             "zone": zone,
-            "point": point_data.point,
-            "total_employees": point_data.total_employees,
+            "point": point,
+            "total_employees": sum(row.total_employees for row in designation_counts.values()),
             "present": present,
             "absent": absent,
             "on_leave": on_leave,
@@ -451,116 +422,14 @@ def get_point_wise_attendance(filters):
         }
 
         # Add designation-wise breakdown if requested
-        if filters.get("show_designation_wise_breakdown"):
-            for designation in all_designations:
-                # Replace spaces with underscores for fieldnames
-                safe_designation = designation.replace(" ", "_")
-                
-                # Get employees for this designation at this point
-                desig_employees = frappe.get_all(
-                    "Employee",
-                    fields=["name"],
-                    filters={
-                        "custom_point": point_data.point,
-                        "designation": designation,
-                        "company": ("in", filters.companies),
-                        "status": "Active"
-                    }
-                )
-                
-                # Get total employees for this designation
-                desig_total = len(desig_employees)
-                
-                # Skip if no employees with this designation at this point
-                if desig_total == 0:
-                    row_data[f"{safe_designation}_total"] = 0
-                    row_data[f"{safe_designation}_present"] = 0
-                    row_data[f"{safe_designation}_absent"] = 0
-                    row_data[f"{safe_designation}_on_leave"] = 0
-                    row_data[f"{safe_designation}_attendance_percentage"] = 0
-                    continue
-                
-                # Get attendance for these employees
-                desig_attendance = frappe.get_all(
-                    "Attendance",
-                    fields=[
-                        "status",
-                        "count(*) as count"
-                    ],
-                    filters={
-                        "attendance_date": filters.date,
-                        "employee": ("in", [emp.name for emp in desig_employees]),
-                        "docstatus": 1
-                    },
-                    group_by="status"
-                )
-
-                # Initialize counters for this designation
-                desig_present = desig_absent = desig_on_leave = 0
-
-                # Process attendance counts for this designation
-                for count_data in desig_attendance:
-                    if count_data.status in ["Present", "Work From Home"]:
-                        desig_present = count_data.count
-                    elif count_data.status == "Absent":
-                        desig_absent = count_data.count
-                    elif count_data.status == "On Leave":
-                        desig_on_leave = count_data.count
-
-                # Calculate attendance percentage for this designation
-                desig_total_marked = desig_present + desig_absent + desig_on_leave
-                desig_attendance_percentage = (desig_present / desig_total_marked * 100) if desig_total_marked else 0
-
-                # Add designation data to row
-                row_data[f"{safe_designation}_total"] = desig_total
-                row_data[f"{safe_designation}_present"] = desig_present
-                row_data[f"{safe_designation}_absent"] = desig_absent
-                row_data[f"{safe_designation}_on_leave"] = desig_on_leave
-                row_data[f"{safe_designation}_attendance_percentage"] = desig_attendance_percentage
+        if show_breakdown:
+            set_designation_breakdown(row_data, designation_counts, all_designations)
 
         data.append(row_data)
 
-        # Aggregate zone-wise data
-        if zone not in zone_wise_data:
-            zone_wise_data[zone] = {
-                "total_employees": 0,
-                "present": 0,
-                "absent": 0,
-                "on_leave": 0
-            }
-            
-            # Initialize designation counters for zone
-            if filters.get("show_designation_wise_breakdown"):
-                for designation in all_designations:
-                    safe_designation = designation.replace(" ", "_")
-                    zone_wise_data[zone][f"{safe_designation}_total"] = 0
-                    zone_wise_data[zone][f"{safe_designation}_present"] = 0
-                    zone_wise_data[zone][f"{safe_designation}_absent"] = 0
-                    zone_wise_data[zone][f"{safe_designation}_on_leave"] = 0
-        
-        zone_wise_data[zone]["total_employees"] += point_data.total_employees
-        zone_wise_data[zone]["present"] += present
-        zone_wise_data[zone]["absent"] += absent
-        zone_wise_data[zone]["on_leave"] += on_leave
-        
-        # Aggregate designation data for zone
-        if filters.get("show_designation_wise_breakdown"):
-            for designation in all_designations:
-                safe_designation = designation.replace(" ", "_")
-                zone_wise_data[zone][f"{safe_designation}_total"] += row_data.get(f"{safe_designation}_total", 0)
-                zone_wise_data[zone][f"{safe_designation}_present"] += row_data.get(f"{safe_designation}_present", 0)
-                zone_wise_data[zone][f"{safe_designation}_absent"] += row_data.get(f"{safe_designation}_absent", 0)
-                zone_wise_data[zone][f"{safe_designation}_on_leave"] += row_data.get(f"{safe_designation}_on_leave", 0)
-
     # Sort by zone and then attendance percentage
     data.sort(key=lambda x: (x["zone"] or "", x["attendance_percentage"]), reverse=True)
 
-    # Add zone subtotals (commented out)
-    final_data = []
-    current_zone = None
-    for row in data:
-        final_data.append(row)
-
     # Add grand total
     total_employees = sum(row["total_employees"] for row in data)
     total_present = sum(row["present"] for row in data)
@@ -579,7 +448,7 @@ def get_point_wise_attendance(filters):
     }
     
     # Add designation totals to grand total row
-    if filters.get("show_designation_wise_breakdown"):
+    if show_breakdown:
         for designation in all_designations:
             safe_designation = designation.replace(" ", "_")
             grand_total_row[f"{safe_designation}_total"] = sum(row.get(f"{safe_designation}_total", 0) for row in data)
@@ -598,6 +467,6 @@ def get_point_wise_attendance(filters):
                 if desig_total_marked else 0
             )
     
-    final_data.append(grand_total_row)
+    data.append(grand_total_row)
 
-    return final_data
\ No newline at end of file
+    return data
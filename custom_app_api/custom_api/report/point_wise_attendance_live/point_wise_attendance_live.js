@@ -67,44 +67,86 @@ frappe.query_reports["Point Wise Attendance Live"] = {
 	],
 	
 	onload: function(report) {
-		// Set up auto-refresh interval
-		report.page.add_inner_button(__('Auto Refresh'), function() {
-			if (!report.auto_refresh_interval) {
-				console.log('Starting auto-refresh...');
-				// Start auto-refresh
-				report.auto_refresh_interval = setInterval(() => {
-					console.log('Auto-refresh triggered at:', new Date().toLocaleTimeString());
-					report.refresh();
-				}, 60000); // 60000 ms = 1 minute
-				
-				// Change button label
-				report.page.inner_toolbar.find('.btn:contains("Auto Refresh")').text(__('Stop Auto Refresh'));
+		// Punch-ins arrive as live_attendance_update events on the Point rooms of the board,
+		// rows are patched in place instead of re-running the report
+		report.live_points = [];
+		report.live_updates = true;
+
+		frappe.realtime.on("live_attendance_update", (message) => {
+			apply_live_attendance_events(report, message.events || []);
+		});
+
+		report.page.add_inner_button(__('Stop Live Updates'), function() {
+			report.live_updates = !report.live_updates;
+
+			if (report.live_updates) {
+				subscribe_live_points(report);
+				report.refresh();
+				report.page.inner_toolbar.find('.btn:contains("Live Updates")').text(__('Stop Live Updates'));
 				frappe.show_alert({
-					message: __('Auto-refresh enabled - refreshing every minute'),
+					message: __('Live updates enabled'),
 					indicator: 'green'
 				}, 3);
 			} else {
-				console.log('Stopping auto-refresh...');
-				// Stop auto-refresh
-				clearInterval(report.auto_refresh_interval);
-				report.auto_refresh_interval = null;
-				
-				// Reset button label
-				report.page.inner_toolbar.find('.btn:contains("Stop Auto Refresh")').text(__('Auto Refresh'));
+				unsubscribe_live_points(report);
+				report.page.inner_toolbar.find('.btn:contains("Live Updates")').text(__('Live Updates'));
 				frappe.show_alert({
-					message: __('Auto-refresh disabled'),
+					message: __('Live updates disabled'),
 					indicator: 'orange'
 				}, 3);
 			}
 		});
 	},
 
-	onclose: function(report) {
-		// Clean up interval when report is closed
-		if (report.auto_refresh_interval) {
-			console.log('Cleaning up auto-refresh on report close');
-			clearInterval(report.auto_refresh_interval);
-			report.auto_refresh_interval = null;
+	after_datatable_render: function() {
+		if (frappe.query_report.live_updates) {
+			subscribe_live_points(frappe.query_report);
 		}
+	},
+
+	onclose: function(report) {
+		// Leave the Point rooms when report is closed
+		unsubscribe_live_points(report);
+		frappe.realtime.off("live_attendance_update");
 	}
 };
+
+function subscribe_live_points(report) {
+	const points = [...new Set((report.data || []).map(row => row.point).filter(Boolean))];
+
+	report.live_points
+		.filter(point => !points.includes(point))
+		.forEach(point => frappe.realtime.doc_unsubscribe("Point", point));
+	points
+		.filter(point => !report.live_points.includes(point))
+		.forEach(point => frappe.realtime.doc_subscribe("Point", point));
+
+	report.live_points = points;
+}
+
+function unsubscribe_live_points(report) {
+	(report.live_points || []).forEach(point => frappe.realtime.doc_unsubscribe("Point", point));
+	report.live_points = [];
+}
+
+function apply_live_attendance_events(report, events) {
+	if (!report.live_updates || !report.data || !report.datatable) return;
+
+	const date = report.get_filter_value("date");
+	const rows = {};
+	report.data.forEach(row => rows[row.employee] = row);
+
+	let changed = false;
+	events.forEach(event => {
+		const row = rows[event.employee];
+		if (!row || event.attendance_date !== date) return;
+
+		row.status = event.status;
+		row.doc_status = event.doc_status;
+		changed = true;
+	});
+
+	if (changed) {
+		report.datatable.refresh(report.data, report.columns);
+	}
+}
@@ -1,7 +1,11 @@
+import hashlib
 import frappe
 from frappe import _
 from frappe.utils.nestedset import get_descendants_of
 
+# Refreshes of the same board within this window share one computation
+LIVE_BOARD_CACHE_SECONDS = 30
+
 def execute(filters=None):
     if not filters:
         filters = {}
@@ -156,44 +160,65 @@ def get_point_wise_attendance(filters):
             if p in [ap.name for ap in allowed_points]
         ])
 
-    employees = frappe.get_all(
-        "Employee",
-        fields=[
-            "name", 
-            "employee_name",
-            "cell_number",
-            "custom_point",
-            "designation",
-            "custom_route"
-        ],
-        filters=employee_filters
-    )
+    points = employee_filters["custom_point"][1]
+    if not points:
+        return []
+
+    # Managers with the same date, companies and visible points share one computation
+    cache_key = "point_wise_attendance_live:" + hashlib.md5(
+        frappe.as_json([str(filters.date), sorted(filters.companies), sorted(points)]).encode()
+    ).hexdigest()
+    data = frappe.cache.get_value(cache_key)
+    if data is not None:
+        return data
+
+    # Today's attendance of every employee in one query, the submitted record wins over a draft
+    # and a draft over a cancelled one
+    employees = frappe.db.sql("""
+        SELECT
+            e.name,
+            e.employee_name,
+            e.cell_number,
+            e.custom_point,
+            e.designation,
+            e.custom_route,
+            a.status,
+            a.docstatus
+        FROM `tabEmployee` e
+        LEFT JOIN (
+            SELECT
+                employee,
+                status,
+                docstatus,
+                ROW_NUMBER() OVER (
+                    PARTITION BY employee
+                    ORDER BY CASE docstatus WHEN 1 THEN 0 WHEN 0 THEN 1 ELSE 2 END, modified DESC
+                ) AS attendance_rank
+            FROM `tabAttendance`
+            WHERE attendance_date = %(date)s
+        ) a ON a.employee = e.name AND a.attendance_rank = 1
+        WHERE e.company IN %(companies)s
+        AND e.status = 'Active'
+        AND e.custom_point IN %(points)s
+    """, {
+        "date": filters.date,
+        "companies": tuple(filters.companies),
+        "points": tuple(points)
+    }, as_dict=True)
 
     data = []
 
     for employee in employees:
-        # Get attendance for this employee
-        attendance = frappe.get_all(
-            "Attendance",
-            fields=["status", "docstatus"],
-            filters={
-                "attendance_date": filters.date,
-                "employee": employee.name
-            },
-            order_by="docstatus DESC",  # Prioritize submitted records
-            limit=1
-        )
-
         status = "Not Marked"
         doc_status = "Not Available"
 
-        if attendance:
-            status = attendance[0].status
-            if attendance[0].docstatus == 0:
+        if employee.docstatus is not None:
+            status = employee.status
+            if employee.docstatus == 0:
                 doc_status = "Draft"
-            elif attendance[0].docstatus == 1:
+            elif employee.docstatus == 1:
                 doc_status = "Submitted"
-            elif attendance[0].docstatus == 2:
+            elif employee.docstatus == 2:
                 doc_status = "Cancelled"
 
         row_data = {
@@ -213,4 +238,9 @@ def get_point_wise_attendance(filters):
     # Sort by zone and point
     data.sort(key=lambda x: (x["zone"] or "", x["point"] or "", x["employee_name"] or ""))
 
+    frappe.cache.set_value(
+        cache_key,
+        data,
+        expires_in_sec=frappe.utils.cint(frappe.conf.get("live_attendance_cache_ttl")) or LIVE_BOARD_CACHE_SECONDS
+    )
     return data
\ No newline at end of file
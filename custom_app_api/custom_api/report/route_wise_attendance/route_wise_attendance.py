@@ -22,6 +22,8 @@ from frappe.query_builder.functions import Count, Extract, Sum
 from frappe.utils import cint, cstr, getdate
 from frappe.utils.nestedset import get_descendants_of
 
+from custom_app_api.custom_api.helper_function.attendance_rollup import get_rollup_counts, is_rollup_read_enabled
+
 Filters = frappe._dict
 
 status_map = {
@@ -36,6 +38,14 @@ status_map = {
 
 day_abbr = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
 
+# Employee fields of the location group by options
+LOCATION_FIELDS = {
+	"Route": "custom_route",
+	"Area": "custom_area",
+	"Zone": "custom_zone",
+	"Point": "custom_point",
+}
+
 
 def execute(filters: Filters | None = None) -> tuple:
 	filters = frappe._dict(filters or {})
@@ -52,6 +62,15 @@ def execute(filters: Filters | None = None) -> tuple:
 		if filters.include_company_descendants:
 			filters.companies.extend(get_descendants_of("Company", filters.company))
 
+	# Route, Area, Zone, Point are aggregated in SQL and do not need the attendance map
+	if filters.group_by in LOCATION_FIELDS:
+		data = get_location_wise_attendance(filters)
+		if not data:
+			frappe.msgprint(_("No attendance records found."), alert=True, indicator="orange")
+			return [], [], None, None
+
+		return get_columns(filters), data, None, None
+
 	attendance_map = get_attendance_map(filters)
 	if not attendance_map:
 		frappe.msgprint(_("No attendance records found."), alert=True, indicator="orange")
@@ -190,13 +209,10 @@ def get_columns(filters: Filters) -> list[dict]:
 
 
 def get_data(filters: Filters, attendance_map: dict) -> list[dict]:
-	# Special handling for Route, Area, Zone, Point
-	if filters.group_by in ["Route", "Area", "Zone", "Point"]:
-		return get_location_wise_attendance(filters, attendance_map)
-	
 	# Standard handling for Branch, Department, etc.
 	employee_details, group_by_param_values = get_employee_related_details(filters)
 	holiday_map = get_holiday_map(filters)
+	summaries = get_employee_summaries(filters) if filters.summarized_view else None
 	data = []
 
 	if filters.group_by:
@@ -206,80 +222,84 @@ def get_data(filters: Filters, attendance_map: dict) -> list[dict]:
 			if not value:
 				continue
 
-			records = get_rows(employee_details[value], filters, holiday_map, attendance_map)
+			records = get_rows(employee_details[value], filters, holiday_map, attendance_map, summaries)
 
 			if records:
 				data.append({group_by_column: value})
 				data.extend(records)
 	else:
-		data = get_rows(employee_details, filters, holiday_map, attendance_map)
+		data = get_rows(employee_details, filters, holiday_map, attendance_map, summaries)
 
 	return data
 
 
-def get_location_wise_attendance(filters: Filters, attendance_map: dict) -> list[dict]:
-	"""Get summarized attendance data grouped by Route/Area/Zone/Point"""
+def get_location_wise_attendance(filters: Filters) -> list[dict]:
+	"""Get summarized attendance data grouped by Route/Area/Zone/Point.
+
+	Active employees are left joined to their submitted attendance of the period and counted per
+	location in one GROUP BY, so every location is a single row of the result set. When the site reads
+	from the Attendance Daily Rollup, only employees are counted here and attendance comes from the rollup.
+	Returns an empty list when no attendance was marked at all or the period filters are incomplete.
+	"""
 	Employee = frappe.qb.DocType("Employee")
-	
-	# Map group_by to custom field names
-	field_mapping = {
-		"Route": "custom_route",
-		"Area": "custom_area",
-		"Zone": "custom_zone",
-		"Point": "custom_point"
-	}
-	
-	group_field = field_mapping.get(filters.group_by)
-	
-	# Get all unique locations and their employee counts
-	locations = frappe.get_all(
-		"Employee",
-		fields=[
-			f"{group_field} as location",
-			"count(*) as total_employees"
-		],
-		filters={
-			"company": ("in", filters.companies),
-			"status": "Active"
-		},
-		group_by=group_field
+	Attendance = frappe.qb.DocType("Attendance")
+
+	location = Employee[LOCATION_FIELDS[filters.group_by]]
+	period = get_date_range(filters)
+	if not period:
+		return []
+
+	from_date, to_date = period
+	use_rollup = is_rollup_read_enabled() and not filters.employee
+
+	join_condition = (
+		(Attendance.employee == Employee.name)
+		& (Attendance.docstatus == 1)
+		& (Attendance.company.isin(filters.companies))
+		& (Attendance.attendance_date.between(from_date, to_date))
+	)
+	if filters.employee:
+		join_condition &= Attendance.employee == filters.employee
+
+	def count_status(*statuses):
+		return Sum(frappe.qb.terms.Case().when(Attendance.status.isin(statuses), 1).else_(0))
+
+	query = frappe.qb.from_(Employee).select(
+		location.as_("location"),
+		Count(Employee.name).distinct().as_("total_employees"),
 	)
+	if not use_rollup:
+		query = query.left_join(Attendance).on(join_condition).select(
+			count_status("Present", "Work From Home").as_("present"),
+			count_status("Absent").as_("absent"),
+			count_status("On Leave").as_("leaves"),
+		)
+
+	locations = (
+		query
+		.where(
+			(Employee.company.isin(filters.companies))
+			& (Employee.status == "Active")
+			& (location.isnotnull())
+			& (location != "")
+		)
+		.groupby(location)
+	).run(as_dict=True)
+
+	if use_rollup:
+		set_location_counts_from_rollup(filters, locations, from_date, to_date)
+
+	if not any(cint(loc.present) or cint(loc.absent) or cint(loc.leaves) for loc in locations):
+		return []
 
-	# Process attendance data for each location
 	data = []
 	for loc in locations:
-		if not loc.location:
-			continue
-		
-		location_employees = frappe.get_all(
-			"Employee",
-			fields=["name"],
-			filters={
-				group_field: loc.location,
-				"company": ("in", filters.companies),
-				"status": "Active"
-			}
-		)
-		
-		# Initialize counters
-		present = absent = leaves = 0
-		
-		# Count attendance for each employee in this location
-		for emp in location_employees:
-			if emp.name in attendance_map:
-				for shift_data in attendance_map[emp.name].values():
-					for status in shift_data.values():
-						if status in ["Present", "Work From Home"]:
-							present += 1
-						elif status == "Absent":
-							absent += 1
-						elif status == "On Leave":
-							leaves += 1
-		
+		present, absent, leaves = cint(loc.present), cint(loc.absent), cint(loc.leaves)
+
 		# Calculate attendance percentage
 		total_marked = present + absent + leaves
 		attendance_percentage = (present / total_marked * 100) if total_marked else 0
-		
+
 		data.append({
 			frappe.scrub(filters.group_by): loc.location,
 			"total_employees": loc.total_employees,
@@ -288,13 +308,50 @@ def get_location_wise_attendance(filters: Filters, attendance_map: dict) -> list
 			"total_leaves": leaves,
 			"attendance_percentage": attendance_percentage
 		})
-	
+
 	# Sort by attendance percentage in descending order
 	data.sort(key=lambda x: x["attendance_percentage"], reverse=True)
-	
+
 	return data
 
 
+def set_location_counts_from_rollup(filters: Filters, locations: list[dict], from_date, to_date) -> None:
+	"""Fill present, absent and leaves of every location from the Attendance Daily Rollup"""
+	# The live query filters both the employee's and the attendance's company
+	counts = get_rollup_counts(
+		frappe.scrub(filters.group_by), from_date, to_date, filters.companies,
+		attendance_companies=filters.companies
+	)
+
+	for loc in locations:
+		status_counts = counts.get(loc.location, {})
+		loc.present = status_counts.get("Present", 0) + status_counts.get("Work From Home", 0)
+		loc.absent = status_counts.get("Absent", 0)
+		loc.leaves = status_counts.get("On Leave", 0)
+
+
+def get_date_range(filters: Filters) -> tuple | None:
+	"""First and last date of the selected day, month or quarter, None while the period filters are incomplete"""
+	if filters.date_range == "Daily":
+		if not filters.specific_date:
+			return None
+		return getdate(filters.specific_date), getdate(filters.specific_date)
+
+	year = cint(filters.year)
+	if filters.date_range == "Quarterly":
+		from_month, to_month = cint(filters.from_month), cint(filters.to_month)
+	else:
+		from_month = to_month = cint(filters.month)
+
+	if not (year and 1 <= from_month <= to_month <= 12):
+		return None
+
+	return (
+		getdate(f"{year}-{from_month:02d}-01"),
+		getdate(f"{year}-{to_month:02d}-{monthrange(year, to_month)[1]}")
+	)
+
+
 def get_attendance_map(filters: Filters) -> dict:
 	"""Returns a dictionary of employee wise attendance map as per shifts for all the days of the month like
 	{
@@ -489,21 +546,26 @@ def get_holiday_map(filters: Filters) -> dict[str, list[dict]]:
 	return holiday_map
 
 
-def get_rows(employee_details: dict, filters: Filters, holiday_map: dict, attendance_map: dict) -> list[dict]:
+def get_rows(
+	employee_details: dict, filters: Filters, holiday_map: dict, attendance_map: dict, summaries: dict | None = None
+) -> list[dict]:
 	records = []
 	default_holiday_list = frappe.get_cached_value("Company", filters.company, "default_holiday_list")
 
+	if filters.summarized_view and summaries is None:
+		summaries = get_employee_summaries(filters)
+
 	for employee, details in employee_details.items():
 		emp_holiday_list = details.holiday_list or default_holiday_list
 		holidays = holiday_map.get(emp_holiday_list)
 
 		if filters.summarized_view:
-			attendance = get_attendance_status_for_summarized_view(employee, filters, holidays)
+			attendance = get_attendance_status_for_summarized_view(employee, filters, holidays, summaries)
 			if not attendance:
 				continue
 
-			leave_summary = get_leave_summary(employee, filters)
-			entry_exits_summary = get_entry_exits_summary(employee, filters)
+			leave_summary = summaries.leaves.get(employee, {})
+			entry_exits_summary = summaries.entry_exits.get(employee, {"total_late_entries": 0, "total_early_exits": 0})
 
 			row = {"employee": employee, "employee_name": details.employee_name}
 			set_defaults_for_summarized_view(filters, row)
@@ -534,14 +596,18 @@ def set_defaults_for_summarized_view(filters, row):
 			row[entry.get("fieldname")] = 0.0
 
 
-def get_attendance_status_for_summarized_view(employee: str, filters: Filters, holidays: list) -> dict:
+def get_attendance_status_for_summarized_view(
+	employee: str, filters: Filters, holidays: list, summaries: dict
+) -> dict:
 	"""Returns dict of attendance status for employee like
 	{'total_present': 1.5, 'total_leaves': 0.5, 'total_absent': 13.5, 'total_holidays': 8, 'unmarked_days': 5}
 	"""
-	summary, attendance_days = get_attendance_summary_and_days(employee, filters)
-	if not any(summary.values()):
+	summary = summaries.attendance.get(employee)
+	if not summary or not any(summary.values()):
 		return {}
 
+	attendance_days = summaries.days.get(employee, set())
+
 	total_days = get_total_days_in_month(filters)
 	total_holidays = total_unmarked_days = 0
 
@@ -564,56 +630,96 @@ def get_attendance_status_for_summarized_view(employee: str, filters: Filters, h
 	}
 
 
-def get_attendance_summary_and_days(employee: str, filters: Filters) -> tuple[dict, list]:
+def get_month_range(filters: Filters) -> tuple | None:
+	"""First and last date of the selected month, the period of the summarized view, None while no month is selected"""
+	year, month = cint(filters.year), cint(filters.month)
+	if not (year and 1 <= month <= 12):
+		return None
+
+	return getdate(f"{year}-{month:02d}-01"), getdate(f"{year}-{month:02d}-{monthrange(year, month)[1]}")
+
+
+def get_employee_summaries(filters: Filters) -> frappe._dict:
+	"""Returns the summarized view figures of all employees, computed with grouped queries over the month:
+	{
+	        'attendance': {'employee1': {'total_present': 20, 'total_absent': 2, 'total_leaves': 1, 'total_half_days': 0.5}},
+	        'days': {'employee1': {1, 2, 3, ...}},
+	        'leaves': {'employee1': {'sick_leave': 1.0}},
+	        'entry_exits': {'employee1': {'total_late_entries': 5, 'total_early_exits': 2}}
+	}
+	"""
 	Attendance = frappe.qb.DocType("Attendance")
+	summaries = frappe._dict(attendance={}, days={}, leaves={}, entry_exits={})
 
-	present_case = (
-		frappe.qb.terms.Case()
-		.when(((Attendance.status == "Present") | (Attendance.status == "Work From Home")), 1)
-		.else_(0)
-	)
-	sum_present = Sum(present_case).as_("total_present")
+	period = get_month_range(filters)
+	if not period:
+		return summaries
 
-	absent_case = frappe.qb.terms.Case().when(Attendance.status == "Absent", 1).else_(0)
-	sum_absent = Sum(absent_case).as_("total_absent")
+	from_date, to_date = period
 
-	leave_case = frappe.qb.terms.Case().when(Attendance.status == "On Leave", 1).else_(0)
-	sum_leave = Sum(leave_case).as_("total_leaves")
+	conditions = (
+		(Attendance.docstatus == 1)
+		& (Attendance.company.isin(filters.companies))
+		& (Attendance.attendance_date.between(from_date, to_date))
+	)
+	if filters.employee:
+		conditions &= Attendance.employee == filters.employee
 
-	half_day_case = frappe.qb.terms.Case().when(Attendance.status == "Half Day", 0.5).else_(0)
-	sum_half_day = Sum(half_day_case).as_("total_half_days")
+	def sum_status(status, value=1):
+		return Sum(frappe.qb.terms.Case().when(status, value).else_(0))
 
-	summary = (
+	rows = (
 		frappe.qb.from_(Attendance)
 		.select(
-			sum_present,
-			sum_absent,
-			sum_leave,
-			sum_half_day,
-		)
-		.where(
-			(Attendance.docstatus == 1)
-			& (Attendance.employee == employee)
-			& (Attendance.company.isin(filters.companies))
-			& (Extract("month", Attendance.attendance_date) == filters.month)
-			& (Extract("year", Attendance.attendance_date) == filters.year)
+			Attendance.employee,
+			sum_status(Attendance.status.isin(["Present", "Work From Home"])).as_("total_present"),
+			sum_status(Attendance.status == "Absent").as_("total_absent"),
+			sum_status(Attendance.status == "On Leave").as_("total_leaves"),
+			sum_status(Attendance.status == "Half Day", 0.5).as_("total_half_days"),
+			Count(frappe.qb.terms.Case().when(Attendance.late_entry == "1", "1")).as_("total_late_entries"),
+			Count(frappe.qb.terms.Case().when(Attendance.early_exit == "1", "1")).as_("total_early_exits"),
 		)
+		.where(conditions)
+		.groupby(Attendance.employee)
 	).run(as_dict=True)
 
+	for row in rows:
+		summaries.attendance[row.employee] = frappe._dict(
+			total_present=row.total_present,
+			total_absent=row.total_absent,
+			total_leaves=row.total_leaves,
+			total_half_days=row.total_half_days,
+		)
+		summaries.entry_exits[row.employee] = {
+			"total_late_entries": row.total_late_entries,
+			"total_early_exits": row.total_early_exits,
+		}
+
 	days = (
 		frappe.qb.from_(Attendance)
-		.select(Extract("day", Attendance.attendance_date).as_("day_of_month"))
+		.select(Attendance.employee, Extract("day", Attendance.attendance_date).as_("day_of_month"))
 		.distinct()
+		.where(conditions)
+	).run(as_dict=True)
+
+	for row in days:
+		summaries.days.setdefault(row.employee, set()).add(row.day_of_month)
+
+	day_case = frappe.qb.terms.Case().when(Attendance.status == "Half Day", 0.5).else_(1)
+	leave_details = (
+		frappe.qb.from_(Attendance)
+		.select(Attendance.employee, Attendance.leave_type, Sum(day_case).as_("leave_days"))
 		.where(
-			(Attendance.docstatus == 1)
-			& (Attendance.employee == employee)
-			& (Attendance.company.isin(filters.companies))
-			& (Extract("month", Attendance.attendance_date) == filters.month)
-			& (Extract("year", Attendance.attendance_date) == filters.year)
+			conditions
+			& ((Attendance.leave_type.isnotnull()) | (Attendance.leave_type != ""))
 		)
-	).run(pluck=True)
+		.groupby(Attendance.employee, Attendance.leave_type)
+	).run(as_dict=True)
 
-	return summary[0], days
+	for d in leave_details:
+		summaries.leaves.setdefault(d.employee, {})[frappe.scrub(d.leave_type)] = d.leave_days
+
+	return summaries
 
 
 def get_attendance_status_for_detailed_view(
@@ -657,63 +763,6 @@ def get_holiday_status(day: int, holidays: list) -> str:
 	return status
 
 
-def get_leave_summary(employee: str, filters: Filters) -> dict[str, float]:
-	"""Returns a dict of leave type and corresponding leaves taken by employee like:
-	{'leave_without_pay': 1.0, 'sick_leave': 2.0}
-	"""
-	Attendance = frappe.qb.DocType("Attendance")
-	day_case = frappe.qb.terms.Case().when(Attendance.status == "Half Day", 0.5).else_(1)
-	sum_leave_days = Sum(day_case).as_("leave_days")
-
-	leave_details = (
-		frappe.qb.from_(Attendance)
-		.select(Attendance.leave_type, sum_leave_days)
-		.where(
-			(Attendance.employee == employee)
-			& (Attendance.docstatus == 1)
-			& (Attendance.company.isin(filters.companies))
-			& ((Attendance.leave_type.isnotnull()) | (Attendance.leave_type != ""))
-			& (Extract("month", Attendance.attendance_date) == filters.month)
-			& (Extract("year", Attendance.attendance_date) == filters.year)
-		)
-		.groupby(Attendance.leave_type)
-	).run(as_dict=True)
-
-	leaves = {}
-	for d in leave_details:
-		leave_type = frappe.scrub(d.leave_type)
-		leaves[leave_type] = d.leave_days
-
-	return leaves
-
-
-def get_entry_exits_summary(employee: str, filters: Filters) -> dict[str, float]:
-	"""Returns total late entries and total early exits for employee like:
-	{'total_late_entries': 5, 'total_early_exits': 2}
-	"""
-	Attendance = frappe.qb.DocType("Attendance")
-
-	late_entry_case = frappe.qb.terms.Case().when(Attendance.late_entry == "1", "1")
-	count_late_entries = Count(late_entry_case).as_("total_late_entries")
-
-	early_exit_case = frappe.qb.terms.Case().when(Attendance.early_exit == "1", "1")
-	count_early_exits = Count(early_exit_case).as_("total_early_exits")
-
-	entry_exits = (
-		frappe.qb.from_(Attendance)
-		.select(count_late_entries, count_early_exits)
-		.where(
-			(Attendance.docstatus == 1)
-			& (Attendance.employee == employee)
-			& (Attendance.company.isin(filters.companies))
-			& (Extract("month", Attendance.attendance_date) == filters.month)
-			& (Extract("year", Attendance.attendance_date) == filters.year)
-		)
-	).run(as_dict=True)
-
-	return entry_exits[0]
-
-
 @frappe.whitelist()
 def get_attendance_years() -> str:
 	"""Returns all the years for which attendance records exist"""
@@ -1,6 +1,7 @@
 import frappe
 from frappe import _
 from frappe.utils.nestedset import get_descendants_of
+from custom_app_api.custom_api.helper_function.attendance_rollup import get_rollup_counts, is_rollup_read_enabled
 
 def execute(filters=None):
     if not filters:
@@ -203,11 +204,24 @@ def get_zone_wise_attendance(filters):
         group_by="custom_zone"
     )
 
+    # Counts of the day from the materialized rollup instead of one query per zone
+    rollup_counts = None
+    if is_rollup_read_enabled():
+        rollup_counts = get_rollup_counts("zone", filters.date, filters.date, filters.companies)
+
     data = []
     for zone_data in zones:
         if not zone_data.zone:
             continue
 
+        if rollup_counts is not None:
+            status_counts = rollup_counts.get(zone_data.zone, {})
+            present = status_counts.get("Present", 0) + status_counts.get("Work From Home", 0)
+            absent = status_counts.get("Absent", 0)
+            on_leave = status_counts.get("On Leave", 0)
+            data.append(get_zone_row(zone_data, present, absent, on_leave))
+            continue
+
         # Get employees for this zone
         zone_employees = frappe.get_all(
             "Employee",
@@ -246,17 +260,7 @@ def get_zone_wise_attendance(filters):
             elif count_data.status == "On Leave":
                 on_leave = count_data.count
 
-        # Calculate attendance percentage based on total employees instead of marked attendance
-        attendance_percentage = (present / zone_data.total_employees * 100) if zone_data.total_employees else 0
-
-        data.append({
-            "zone": zone_data.zone,
-            "total_employees": zone_data.total_employees,
-            "present": present,
-            "absent": absent,
-            "on_leave": on_leave,
-            "attendance_percentage": attendance_percentage
-        })
+        data.append(get_zone_row(zone_data, present, absent, on_leave))
 
     # Sort by attendance percentage in descending order
     data.sort(key=lambda x: x["attendance_percentage"], reverse=True)
@@ -281,3 +285,16 @@ def get_zone_wise_attendance(filters):
     })
 
     return data
+
+def get_zone_row(zone_data, present, absent, on_leave):
+    # Calculate attendance percentage based on total employees instead of marked attendance
+    attendance_percentage = (present / zone_data.total_employees * 100) if zone_data.total_employees else 0
+
+    return {
+        "zone": zone_data.zone,
+        "total_employees": zone_data.total_employees,
+        "present": present,
+        "absent": absent,
+        "on_leave": on_leave,
+        "attendance_percentage": attendance_percentage
+    }
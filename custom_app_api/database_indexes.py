@@ -0,0 +1,142 @@
+"""
+Database indexes managed by this app.
+
+INDEXES declares the composite indexes for the hot query shapes of the app. ensure_indexes() is run
+from after_install and after_migrate: it reads information_schema once and creates only the missing
+indexes, online (ALGORITHM=INPLACE, LOCK=NONE) so the tables stay writable while they are built.
+
+An index is considered present when an index with the same name exists, or when any index of the
+table already starts with the declared columns in the same order.
+"""
+
+import time
+import frappe
+from typing import Any, Dict, List
+
+INDEXES = [
+    {
+        # 10 second dedup in record_location, track reads for distance and maps
+        "doctype": "Route Tracking",
+        "index_name": "idx_route_tracking_attendance_recorded_at",
+        "columns": ["attendance", "recorded_at"]
+    },
+    {
+        # Today's attendance of an employee (punch in / out, location recording, close-out)
+        "doctype": "Attendance",
+        "index_name": "idx_attendance_employee_date_docstatus",
+        "columns": ["employee", "attendance_date", "docstatus"]
+    },
+    {
+        # OTP verification and resend
+        "doctype": "OTP",
+        "index_name": "idx_otp_phone_is_expired",
+        "columns": ["phone", "is_expired"]
+    },
+    {
+        # Visits of a sales person, by date
+        "doctype": "Visit Tracker",
+        "index_name": "idx_visit_tracker_visited_by_docstatus_date",
+        "columns": ["visited_by", "docstatus", "visit_date"]
+    },
+    {
+        # Farmers assigned to a sales person, by prospect type
+        "doctype": "Farmer Detail",
+        "index_name": "idx_farmer_detail_sales_person_prospect_type",
+        "columns": ["assigned_sales_person", "prospect_type"]
+    },
+]
+
+
+def get_existing_indexes(tables: List[str]) -> Dict[str, Dict[str, List[str]]]:
+    """Return {table: {index_name: [columns in order]}} from information_schema, in one query"""
+    if not tables:
+        return {}
+
+    rows = frappe.db.sql("""
+        SELECT TABLE_NAME, INDEX_NAME, COLUMN_NAME
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE()
+        AND TABLE_NAME IN %(tables)s
+        ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+    """, {"tables": tuple(tables)}, as_dict=1)
+
+    existing = {}
+    for row in rows:
+        existing.setdefault(row.TABLE_NAME, {}).setdefault(row.INDEX_NAME, []).append(row.COLUMN_NAME)
+    return existing
+
+
+def is_index_present(index: Dict[str, Any], table_indexes: Dict[str, List[str]]) -> bool:
+    if index["index_name"] in table_indexes:
+        return True
+
+    columns = index["columns"]
+    return any(existing[:len(columns)] == columns for existing in table_indexes.values())
+
+
+def ensure_indexes() -> List[str]:
+    """Create the missing indexes of INDEXES. Returns the names of the indexes created."""
+    tables = [f"tab{index['doctype']}" for index in INDEXES]
+    existing = get_existing_indexes(tables)
+    created = []
+
+    for index in INDEXES:
+        table = f"tab{index['doctype']}"
+
+        if not frappe.db.table_exists(index["doctype"]):
+            continue
+
+        if is_index_present(index, existing.get(table, {})):
+            continue
+
+        start_time = time.time()
+        columns = ", ".join(f"`{column}`" for column in index["columns"])
+        try:
+            frappe.db.sql_ddl(f"""
+                ALTER TABLE `{table}`
+                ADD INDEX `{index['index_name']}` ({columns}),
+                ALGORITHM=INPLACE, LOCK=NONE
+            """)
+            created.append(index["index_name"])
+            existing.setdefault(table, {})[index["index_name"]] = list(index["columns"])
+            print(f"Created index {index['index_name']} on {table} in {time.time() - start_time:.2f} seconds")
+        except Exception as e:
+            frappe.log_error(
+                message=f"Error creating index {index['index_name']} on {table}: {str(e)}\n{frappe.get_traceback()}",
+                title="Create Database Index Failed"
+            )
+
+    return created
+
+
+def get_index_usage() -> Dict[str, Dict[str, int]]:
+    """
+    Rows read through each index, {table: {index_name: rows_read}}.
+    Uses information_schema.INDEX_STATISTICS (MariaDB with userstat=1) and falls back to
+    performance_schema. Returns an empty dict when neither is available.
+    """
+    tables = tuple(f"tab{index['doctype']}" for index in INDEXES)
+    usage = {}
+
+    try:
+        rows = frappe.db.sql("""
+            SELECT TABLE_NAME AS table_name, INDEX_NAME AS index_name, ROWS_READ AS rows_read
+            FROM information_schema.INDEX_STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE()
+            AND TABLE_NAME IN %(tables)s
+        """, {"tables": tables}, as_dict=1)
+    except Exception:
+        try:
+            rows = frappe.db.sql("""
+                SELECT OBJECT_NAME AS table_name, INDEX_NAME AS index_name, COUNT_READ AS rows_read
+                FROM performance_schema.table_io_waits_summary_by_index_usage
+                WHERE OBJECT_SCHEMA = DATABASE()
+                AND OBJECT_NAME IN %(tables)s
+                AND INDEX_NAME IS NOT NULL
+            """, {"tables": tables}, as_dict=1)
+        except Exception:
+            rows = []
+
+    for row in rows:
+        usage.setdefault(row.table_name, {})[row.index_name] = frappe.utils.cint(row.rows_read)
+    return usage
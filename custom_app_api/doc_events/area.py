@@ -0,0 +1,6 @@
+from custom_app_api.custom_api.helper_function.permission_scope import clear_user_scope
+
+def clear_permission_scope(doc, method):
+    """A Lead's zones are the zones of their areas, drop every cached permission scope when an area moves zone"""
+    if method == "on_trash" or doc.has_value_changed("zone_name"):
+        clear_user_scope()
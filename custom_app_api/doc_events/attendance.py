@@ -0,0 +1,5 @@
+from custom_app_api.custom_api.helper_function.attendance_rollup import mark_attendance_dates_dirty
+
+def update_attendance_rollup(doc, method):
+    """The daily attendance rollup only counts submitted attendance, refresh its date on submit, cancel and update after submit"""
+    mark_attendance_dates_dirty([doc.attendance_date])
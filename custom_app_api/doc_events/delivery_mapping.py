@@ -0,0 +1,7 @@
+from custom_app_api.custom_api.helper_function.permission_scope import clear_employee_scope
+
+def clear_permission_scope(doc, method):
+    """Zones and areas of the mapping are cached in the employee's permission scope, also drop the previous employee's"""
+    old_doc = doc.get_doc_before_save()
+    for employee in {doc.employee, old_doc.employee if old_doc else None}:
+        clear_employee_scope(employee)
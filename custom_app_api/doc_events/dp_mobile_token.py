@@ -0,0 +1,5 @@
+from custom_app_api.custom_api.helper_function.token_session_cache import invalidate_token_session
+
+def clear_token_session_cache(doc, method):
+    """Drop the cached session so verify_dp_token sees status / version changes immediately"""
+    invalidate_token_session(doc.name)
@@ -1,5 +1,9 @@
 import frappe
 from frappe.utils import now_datetime, today
+from custom_app_api.custom_api.helper_function.token_session_cache import invalidate_employee_status
+from custom_app_api.custom_api.helper_function.permission_scope import clear_user_scope
+from custom_app_api.custom_api.helper_function.employee_hierarchy import move_employee, remove_employee
+from custom_app_api.custom_api.helper_function.attendance_rollup import EMPLOYEE_ROLLUP_FIELDS, mark_employee_attendance_dirty
 
 def after_save(doc, method):
     # Get the previous document state
@@ -55,6 +59,32 @@ def after_save(doc, method):
             if doc.grade == "L5" and doc.custom_route:
                 create_job_opening_for_route(doc)
 
+def clear_token_session_cache(doc, method):
+    """Employee status is cached by verify_dp_token, drop it after every save (status may be changed by db_set above)"""
+    invalidate_employee_status(doc.name)
+
+def clear_permission_scope(doc, method):
+    """Designation, branch and user_id drive the geographic permission scope, drop it for the old and new user"""
+    old_doc = doc.get_doc_before_save()
+    for user in {doc.user_id, old_doc.user_id if old_doc else None}:
+        if user:
+            clear_user_scope(user)
+
+def update_employee_hierarchy(doc, method):
+    """Keep the reporting hierarchy closure table in line with reports_to"""
+    old_doc = doc.get_doc_before_save()
+    if not old_doc or old_doc.reports_to != doc.reports_to:
+        move_employee(doc.name, doc.reports_to)
+
+def mark_attendance_rollup_dirty(doc, method):
+    """The attendance rollup groups by the current status, company, location and designation of the employee"""
+    old_doc = doc.get_doc_before_save()
+    if old_doc and any(old_doc.get(field) != doc.get(field) for field in EMPLOYEE_ROLLUP_FIELDS):
+        mark_employee_attendance_dirty(doc.name)
+
+def remove_from_employee_hierarchy(doc, method):
+    remove_employee(doc.name)
+
 def close_open_job_openings(employee_doc):
     try:
         # Find any open job openings for this route
@@ -0,0 +1,5 @@
+from custom_app_api.custom_api.helper_function.token_session_cache import invalidate_app_config
+
+def on_update(doc, method):
+    """Required app versions are cached by verify_dp_token, refresh them on every save"""
+    invalidate_app_config()
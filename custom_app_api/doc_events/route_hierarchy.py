@@ -0,0 +1,5 @@
+from custom_app_api.custom_api.helper_function.route_sync import clear_route_hierarchy_index
+
+def clear_hierarchy_index(doc, method):
+    """City, Zone, Area, Point and Route are cached by sf_analytics_id for the analytics feed jobs, drop the index on any change"""
+    clear_route_hierarchy_index()
@@ -0,0 +1,5 @@
+from custom_app_api.custom_api.helper_function.permission_scope import clear_user_scope
+
+def clear_permission_scope(doc, method):
+    """Roles are saved with the User, unrestricted roles are part of the cached permission scope"""
+    clear_user_scope(doc.name)
@@ -96,7 +96,8 @@ doctype_list_js = {
 # ------------
 
 # before_install = "custom_app_api.install.before_install"
-# after_install = "custom_app_api.install.after_install"
+after_install = "custom_app_api.install.after_install"
+after_migrate = "custom_app_api.install.after_migrate"
 
 # Uninstallation
 # ------------
@@ -166,7 +167,55 @@ doc_events = {
 	# 	"on_trash": "method"
 	# }
 	"Employee": {
-		"on_update": ["custom_app_api.doc_events.employee.after_save"]
+		"on_update": [
+			"custom_app_api.doc_events.employee.after_save",
+			"custom_app_api.doc_events.employee.clear_token_session_cache",
+			"custom_app_api.doc_events.employee.clear_permission_scope",
+			"custom_app_api.doc_events.employee.update_employee_hierarchy",
+			"custom_app_api.doc_events.employee.mark_attendance_rollup_dirty"
+		],
+		"on_trash": "custom_app_api.doc_events.employee.remove_from_employee_hierarchy"
+	},
+	"Delivery Mapping": {
+		"on_update": "custom_app_api.doc_events.delivery_mapping.clear_permission_scope",
+		"on_trash": "custom_app_api.doc_events.delivery_mapping.clear_permission_scope"
+	},
+	"User": {
+		"on_update": "custom_app_api.doc_events.user.clear_permission_scope"
+	},
+	"Area": {
+		"on_update": [
+			"custom_app_api.doc_events.area.clear_permission_scope",
+			"custom_app_api.doc_events.route_hierarchy.clear_hierarchy_index"
+		],
+		"on_trash": [
+			"custom_app_api.doc_events.area.clear_permission_scope",
+			"custom_app_api.doc_events.route_hierarchy.clear_hierarchy_index"
+		]
+	},
+	"City": {
+		"on_update": "custom_app_api.doc_events.route_hierarchy.clear_hierarchy_index",
+		"on_trash": "custom_app_api.doc_events.route_hierarchy.clear_hierarchy_index"
+	},
+	"Zone": {
+		"on_update": "custom_app_api.doc_events.route_hierarchy.clear_hierarchy_index",
+		"on_trash": "custom_app_api.doc_events.route_hierarchy.clear_hierarchy_index"
+	},
+	"Point": {
+		"on_update": "custom_app_api.doc_events.route_hierarchy.clear_hierarchy_index",
+		"on_trash": "custom_app_api.doc_events.route_hierarchy.clear_hierarchy_index"
+	},
+	"DP Mobile Token": {
+		"on_update": "custom_app_api.doc_events.dp_mobile_token.clear_token_session_cache",
+		"on_trash": "custom_app_api.doc_events.dp_mobile_token.clear_token_session_cache"
+	},
+	"Attendance": {
+		"on_submit": "custom_app_api.doc_events.attendance.update_attendance_rollup",
+		"on_cancel": "custom_app_api.doc_events.attendance.update_attendance_rollup",
+		"on_update_after_submit": "custom_app_api.doc_events.attendance.update_attendance_rollup"
+	},
+	"Mobile App Config": {
+		"on_update": "custom_app_api.doc_events.mobile_app_config.on_update"
 	},
 	"Employee Promotion": {
 		"before_save": "custom_app_api.doc_events.employee_promotion.before_save",
@@ -176,7 +225,9 @@ doc_events = {
         "after_insert": "custom_app_api.cron_functions.create_employee_referral_and_additional_salary.create_employee_referral_for_job_applicant"
     },
 	"Route": {
-		"after_insert": "custom_app_api.doc_events.route.after_insert"
+		"after_insert": "custom_app_api.doc_events.route.after_insert",
+		"on_update": "custom_app_api.doc_events.route_hierarchy.clear_hierarchy_index",
+		"on_trash": "custom_app_api.doc_events.route_hierarchy.clear_hierarchy_index"
 	},
 	"Additional Salary": {
 		"on_update": "custom_app_api.doc_events.additional_salary.on_update"
@@ -188,6 +239,10 @@ doc_events = {
 
 scheduler_events = {
 	"cron": {
+		"* * * * *": [
+			"custom_app_api.custom_api.helper_function.route_tracking_queue.flush_route_tracking_queue_if_pending",
+			"custom_app_api.custom_api.helper_function.attendance_rollup.refresh_dirty_attendance_rollups"
+		],
 		"*/30 * * * *": [
             "custom_app_api.cron_functions.create_job_vacancy.check_routes_for_vacancies",
 			#"custom_app_api.cron_functions.import_routes.import_routes",
@@ -196,9 +251,6 @@ scheduler_events = {
 		"0 1 * * *" :[
 			"custom_app_api.cron_functions.update_delivery_count_for_each_route.update_delivery_count_for_routes_v2"
 		],
-		"0 9 * * *": [
-			"custom_app_api.cron_functions.check_attendance_index_for_route_tracking.check_attendance_index_for_route_tracking"
-		],
 		"30 9 * * *": [
 			"custom_app_api.cron_functions.attendance_cron.auto_mark_employee_absent_and_submit_all_todays_attendance"
 		],
@@ -222,6 +274,9 @@ scheduler_events = {
 		"0 0 * * *": [
 			"custom_app_api.cron_functions.employee.check_notice_period_completion"
 		],
+		"0 3 * * *": [
+			"custom_app_api.custom_api.helper_function.route_tracking_archive.archive_route_tracking"
+		],
 		"0 11 L * *": [
             # "custom_app_api.cron_functions.additional_salary_packet_bonus.calculate_packet_bonus"
         ],
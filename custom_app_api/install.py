@@ -0,0 +1,9 @@
+from custom_app_api.database_indexes import ensure_indexes
+
+
+def after_install():
+    ensure_indexes()
+
+
+def after_migrate():
+    ensure_indexes()
@@ -0,0 +1,6 @@
+from custom_app_api.custom_api.helper_function.employee_hierarchy import rebuild_employee_hierarchy
+
+
+def execute():
+    """Backfill the Employee Hierarchy closure table, the Employee and Attendance permissions read from it"""
+    rebuild_employee_hierarchy()
@@ -0,0 +1,13 @@
+import frappe
+
+from custom_app_api.custom_api.helper_function.attendance_rollup import ROLLUP_DOCTYPE, mark_attendance_dates_dirty
+
+
+def execute():
+    """Rollup rows written before attendance_company existed are recomputed in the background"""
+    mark_attendance_dates_dirty(frappe.get_all(
+        ROLLUP_DOCTYPE,
+        filters={"attendance_company": ["is", "not set"]},
+        pluck="attendance_date",
+        distinct=True
+    ))
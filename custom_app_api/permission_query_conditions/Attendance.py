@@ -1,4 +1,5 @@
 import frappe
+from custom_app_api.custom_api.helper_function.employee_hierarchy import get_subordinate_condition
 
 def get_permission_query_conditions(user):
     """
@@ -41,32 +42,7 @@ def get_permission_query_conditions(user):
             conditions.append(f"custom_branch = '{employee.branch}'")
         return " and ".join(conditions)
     
-    # Get all subordinates using MariaDB recursive query
-    subordinates_query = """
-        WITH RECURSIVE emp_hierarchy AS (
-            /* Get direct subordinates first */
-            SELECT name, reports_to, 1 as level
-            FROM `tabEmployee`
-            WHERE reports_to = %(employee)s
-
-            UNION ALL
-            
-            /* Get subordinates of subordinates */
-            SELECT e.name, e.reports_to, eh.level + 1
-            FROM `tabEmployee` e
-            INNER JOIN emp_hierarchy eh ON e.reports_to = eh.name
-        )
-        SELECT name FROM emp_hierarchy
-    """
-    subordinates = frappe.db.sql(subordinates_query, {"employee": employee.name}, as_dict=1)
-    subordinate_names = [employee.name]  # Include self
-    subordinate_names.extend([d.name for d in subordinates])
-    # frappe.msgprint(f"Found subordinates: {subordinate_names}")
-    
-    # Add condition to show only subordinates' attendance records
-    if subordinate_names:
-        names_str = "','".join(subordinate_names)
-        conditions.append(f"employee in ('{names_str}')")
-        # frappe.msgprint(f"Final SQL condition: {' and '.join(conditions)}")
+    # Attendance of self and all subordinates, through the reporting hierarchy closure table
+    conditions.append(get_subordinate_condition(employee.name, "`tabAttendance`.employee"))
     
     return " and ".join(conditions)
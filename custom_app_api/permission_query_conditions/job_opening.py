@@ -1,4 +1,4 @@
-import frappe
+from custom_app_api.custom_api.helper_function.permission_scope import get_scope_condition
 
 def get_permission_query_conditions(user):
     """
@@ -8,20 +8,8 @@ def get_permission_query_conditions(user):
     Returns: string - SQL condition
     """
     
-    # Skip for System Manager or Administrator
-    if "System Manager" in frappe.get_roles(user) or user == "Administrator":
-        return ""
-    
-    #if the user role is PAN India Access - Data then aslo we will show the data for all the employees
-    if "PAN India Access - Data" in frappe.get_roles(user):
-        return ""
-    
-    #if the user role is Read Only then aslo we will show the data for all the employees
-    if "Read Only" in frappe.get_roles(user):
-        return ""
-    
-    # Get the routes accessible to the user
-    route_condition = frappe.get_attr("custom_app_api.permission_query_conditions.Route.get_permission_query_conditions")(user)
+    # Get the routes accessible to the user, from the cached permission scope
+    route_condition = get_scope_condition(user, "Route")
     
     if route_condition == "1=1" or not route_condition:
         return ""
@@ -6,14 +6,16 @@ frappe.ui.form.on("Attendance", {
 		if (frm.doc.name) {
 			// Fetch route tracking data for this attendance
 			frappe.call({
-				method: 'custom_app_api.custom_api.api_end_points.record_geo_location_api.get_unique_route_tracking',
+				method: 'custom_app_api.custom_api.api_end_points.record_geo_location_api.get_route_tracking_polyline',
+				type: 'GET',
 				args: {
-					attendance: frm.doc.name
+					attendance: frm.doc.name,
+					zoom: 16
 				},
 				callback: function(response) {
-					if (response.message && response.message.length > 0) {
-						// Convert the response to coordinates array
-						const coords = response.message.map(point => [point.latitude, point.longitude]);
+					if (response.message && response.message.polyline) {
+						// Convert the encoded polyline to coordinates array
+						const coords = decode_polyline(response.message.polyline, response.message.precision);
 						
 						// Get the map instance
 						let map = frm.fields_dict.custom_location_path.map;
@@ -25,16 +27,8 @@ frappe.ui.form.on("Attendance", {
 							opacity: 0.7
 						}).addTo(map);
 
-						// Calculate total distance
-						let totalDistance = 0;
-						for(let i = 0; i < coords.length - 1; i++) {
-							let point1 = L.latLng(coords[i]);
-							let point2 = L.latLng(coords[i + 1]);
-							totalDistance += point1.distanceTo(point2);
-						}
-						
-						// Convert distance to kilometers and round to 2 decimal places
-						let distanceInKm = (totalDistance / 1000).toFixed(2);
+						// Total distance is measured on the full track by the server
+						let distanceInKm = response.message.distance_km.toFixed(2);
 						
 						// Add distance info to the map
 						L.control.attribution({
@@ -72,3 +66,27 @@ frappe.ui.form.on("Attendance", {
 		}
 	}
 });
+
+// Google encoded polyline, see track_codec.encode_polyline
+function decode_polyline(encoded, precision) {
+	const factor = Math.pow(10, precision || 5);
+	const coords = [];
+	let index = 0, lat = 0, lng = 0;
+
+	while (index < encoded.length) {
+		const deltas = [];
+		for (let axis = 0; axis < 2; axis++) {
+			let result = 0, shift = 0, byte;
+			do {
+				byte = encoded.charCodeAt(index++) - 63;
+				result |= (byte & 0x1f) << shift;
+				shift += 5;
+			} while (byte >= 0x20);
+			deltas.push(result & 1 ? ~(result >> 1) : result >> 1);
+		}
+		lat += deltas[0];
+		lng += deltas[1];
+		coords.push([lat / factor, lng / factor]);
+	}
+	return coords;
+}